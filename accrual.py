@@ -0,0 +1,151 @@
+"""
+accrual.py: Earned-miles engine
+
+accrual_rules.json lists, per FFP and operating carrier, the earning rate of
+each cabin's booking codes. It is compiled once at startup into per-carrier
+lookup tables {booking code: [(FFP, cabin, rate)]}, so the miles a cash
+ticket earns in every program come from one dict lookup. Values use
+valuations.json (cents per point).
+
+Batch scoring of many tickets:
+
+    python accrual.py tickets.csv --output earnings.csv
+
+where tickets.csv has origin,destination,carrier,booking_code columns.
+"""
+
+import argparse
+import csv
+import sys
+from collections import namedtuple
+
+# Supported earning rule types
+ACCRUAL_TYPES = ('distance',)
+
+
+class EarnResult(namedtuple('EarnResult', 'ffp ffp_disp_name cabin rate miles value')):
+    """Miles one program credits for a ticket, and their value in dollars"""
+
+    __slots__ = ()
+
+
+class AccrualRules:
+    """Compiled earning tables: carrier -> booking code -> [(ffp, cabin, rate)]"""
+
+    def __init__(self, by_carrier, ffp_names, valuations):
+        self.by_carrier = by_carrier
+        self.ffp_names = ffp_names
+        self.valuations = valuations
+
+    def __len__(self):
+        return sum(len(codes) for codes in self.by_carrier.values())
+
+    def carriers(self):
+        return sorted(self.by_carrier)
+
+    def booking_codes(self, carrier):
+        return sorted(self.by_carrier.get(carrier, {}))
+
+    def earn(self, carrier, booking_code, distance):
+        """EarnResult of every program crediting this fare, highest value first"""
+        rules = self.by_carrier.get(carrier, {}).get(booking_code.strip().upper(), ())
+
+        results = []
+        for ffp_code, cabin, rate in rules:
+            miles = round(distance * rate)
+            value = miles * self.valuations.get(ffp_code, 0) / 100
+            results.append(EarnResult(ffp_code, self.ffp_names[ffp_code], cabin, rate, miles, value))
+
+        results.sort(key=lambda result: (-result.value, -result.miles, result.ffp))
+        return results
+
+    def score_tickets(self, engine, tickets):
+        """
+        Earnings of many cash tickets: (origin, destination, carrier, booking_code)
+        tuples in, one ranked EarnResult list per ticket out (same order).
+
+        Distances are computed in one batch per origin; unknown airports or
+        fares score an empty list.
+        """
+        by_origin = {}
+        for orig, dest, _, _ in tickets:
+            if orig in engine.coords and dest in engine.coords:
+                by_origin.setdefault(orig, set()).add(dest)
+
+        distances = {}
+        for orig, dests in by_origin.items():
+            dests = sorted(dests)
+            for dest, distance in zip(dests, engine.distances_from(orig, dests)):
+                distances[(orig, dest)] = distance
+
+        scored = []
+        for orig, dest, carrier, booking_code in tickets:
+            distance = distances.get((orig, dest))
+            scored.append([] if distance is None else self.earn(carrier, booking_code, distance))
+        return scored
+
+
+def compile_accrual_rules(rules, ffp_dict, earn_partners, valuations):
+    """Compile accrual_rules.json into AccrualRules, checking FFPs, partners and rule types"""
+    by_carrier = {}
+
+    for ffp_code, carriers in rules.items():
+        if ffp_code not in ffp_dict:
+            raise ValueError(f'Unknown FFP "{ffp_code}" in accrual rules')
+
+        can_earn = set(ffp_dict[ffp_code]['carriers']) | set(earn_partners.get(ffp_code, ()))
+
+        for carrier, cabins in carriers.items():
+            if carrier not in can_earn:
+                raise ValueError(f'{ffp_code} accrual rules list {carrier}, which is not an earning partner')
+
+            codes = by_carrier.setdefault(carrier, {})
+            for cabin, cabin_rules in cabins.items():
+                for rule in cabin_rules:
+                    if rule.get('type') not in ACCRUAL_TYPES:
+                        raise ValueError(f'Unknown accrual rule type "{rule.get("type")}" for {ffp_code}/{carrier}')
+
+                    for booking_code in rule['booking_codes']:
+                        codes.setdefault(booking_code.upper(), []).append(
+                            (ffp_code, cabin, float(rule['earning_rate'])))
+
+    ffp_names = {ffp_code: value.get('name', ffp_code) for ffp_code, value in ffp_dict.items()}
+    return AccrualRules(by_carrier, ffp_names, valuations)
+
+
+def main(argv=None):
+    from snapshot import load_snapshot
+
+    parser = argparse.ArgumentParser(description='Score cash tickets by miles earned in every program.')
+    parser.add_argument('tickets', help='CSV with origin,destination,carrier,booking_code columns')
+    parser.add_argument('--data-dir', default=None, help='data directory (default: assets/data)')
+    parser.add_argument('--output', default='earnings.csv', help='CSV report path')
+    args = parser.parse_args(argv)
+
+    snapshot = load_snapshot(args.data_dir) if args.data_dir else load_snapshot()
+
+    with open(args.tickets, newline='', encoding='utf-8') as f:
+        tickets = [
+            (row['origin'].strip().upper(), row['destination'].strip().upper(),
+             row['carrier'].strip().upper(), row['booking_code'].strip().upper())
+            for row in csv.DictReader(f)
+        ]
+
+    scored = snapshot.accrual_rules.score_tickets(snapshot.engine, tickets)
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['origin', 'destination', 'carrier', 'booking_code', 'rank', 'ffp', 'program',
+                         'cabin', 'rate', 'miles', 'value_usd'])
+        for ticket, results in zip(tickets, scored):
+            for rank, result in enumerate(results, start=1):
+                writer.writerow(list(ticket) + [rank, result.ffp, result.ffp_disp_name, result.cabin,
+                                                result.rate, result.miles, f'{result.value:.2f}'])
+
+    earning = sum(1 for results in scored if results)
+    print(f'✓ Scored {len(tickets)} tickets ({earning} earn in at least one program) into {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+airport_index.py: Search indexes for the autocomplete fields
+
+Built once at startup in gui.py and shared by the tabs (airports in every
+Tab2 segment panel, countries in Tab1/Tab4), so typing never has to rescan
+the full display lists. SpatialIndex answers "airports within R miles" for
+the pricing engine the same way.
+"""
+
+import bisect
+import math
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_text(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def trigrams(text):
+    """Set of 3-character substrings of an already normalized string"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class AirportIndex:
+    """Sorted IATA prefix index over the airport display strings"""
+
+    def __init__(self, airports_disp):
+        entries = sorted(
+            (disp.split(' - ')[0].strip().upper(), disp)
+            for disp in airports_disp
+        )
+
+        self.codes = [code for code, _ in entries]
+        self.disps = [disp for _, disp in entries]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def prefix_range(self, prefix, previous=None):
+        """
+        Return the (prefix, lo, hi) slice of codes starting with prefix.
+
+        `previous` is the state returned for the last keystroke. When the new
+        prefix extends it, the bisect is narrowed to the previous slice.
+        """
+        lo, hi = 0, len(self.codes)
+
+        if previous and prefix.startswith(previous[0]):
+            lo, hi = previous[1], previous[2]
+
+        start = bisect.bisect_left(self.codes, prefix, lo, hi)
+        end = bisect.bisect_left(self.codes, prefix + '\uffff', start, hi)
+
+        return prefix, start, end
+
+    def values(self, state, limit=None):
+        """Display strings for a prefix_range() state, capped at limit"""
+        _, lo, hi = state
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self.disps[lo:hi]
+
+
+class TrigramIndex:
+    """Substring search over a fixed list of display strings via trigram postings"""
+
+    def __init__(self, items, haystacks=None):
+        self.items = list(items)
+        if haystacks is None:
+            haystacks = [normalize_text(item) for item in self.items]
+        self.haystacks = haystacks
+
+        postings = {}
+        for idx, haystack in enumerate(haystacks):
+            for gram in trigrams(haystack):
+                postings.setdefault(gram, []).append(idx)
+
+        # Posting lists as sets so candidate lookup is a set intersection
+        self.postings = {gram: frozenset(ids) for gram, ids in postings.items()}
+
+    def match(self, query, previous=None):
+        """
+        Return the (query, ids) state of items whose text contains query.
+
+        When the query extends the previous one, only the previous matches
+        are re-checked, since a longer substring can only match fewer items.
+        """
+        q = normalize_text(query)
+
+        if previous and q.startswith(previous[0]):
+            candidates = previous[1]
+        elif len(q) < 3:
+            candidates = range(len(self.haystacks))
+        else:
+            postings = sorted(
+                (self.postings.get(gram, frozenset()) for gram in trigrams(q)),
+                key=len)
+            # Intersect smallest lists first; once the candidate set is small
+            # the substring check below is cheaper than more intersections
+            candidates = postings[0]
+            for posting in postings[1:]:
+                if len(candidates) <= 64:
+                    break
+                candidates = candidates & posting
+
+        haystacks = self.haystacks
+        ids = sorted(idx for idx in candidates if q in haystacks[idx])
+
+        return q, ids
+
+    def values(self, state, limit=None):
+        """Matching display strings in their original order, capped at limit"""
+        _, ids = state
+        if limit is not None:
+            ids = ids[:limit]
+        return [self.items[idx] for idx in ids]
+
+
+class AirportTextIndex(TrigramIndex):
+    """Trigram index over airport codes, names, regions and countries"""
+
+    def __init__(self, airports_list, airports_disp, country_names=None):
+        country_names = country_names or {}
+
+        self.codes = []
+        self.names = []
+        haystacks = []
+
+        for airport in airports_list:
+            country = airport.get('iso_country', '')
+            name = normalize_text(airport.get('name', ''))
+            location = normalize_text(' '.join([
+                airport.get('iso_region', ''),
+                country,
+                country_names.get(country, ''),
+            ]))
+            code = airport.get('iata_code', '').upper()
+
+            # Leading code lets a full "CODE - Name" display string match itself
+            haystacks.append(code.lower() + ' ' + name + ' | ' + location)
+
+            self.codes.append(code)
+            self.names.append(name)
+
+        super().__init__(airports_disp, haystacks)
+
+        self.code_ids = {code: idx for idx, code in enumerate(self.codes) if code}
+
+        # Static tie-break rank: shorter, then alphabetical names first
+        by_name = sorted(range(len(self.names)), key=lambda idx: (len(self.names[idx]), self.names[idx]))
+        self.order = [0] * len(by_name)
+        for rank, idx in enumerate(by_name):
+            self.order[idx] = rank
+
+    def values(self, state, limit=None):
+        """Ranked display strings for a match() state, capped at limit"""
+        q, ids = state
+        names = self.names
+        code_idx = self.code_ids.get(q.upper())
+        word = ' ' + q
+
+        # Bucket by match quality, then order each bucket by the static
+        # (name length, name) rank computed at build time
+        ranked = []
+        buckets = ([], [], [], [])
+        for idx in ids:
+            name = names[idx]
+            if idx == code_idx:
+                ranked.append(idx)
+            elif name.startswith(q):
+                buckets[0].append(idx)
+            elif word in name:
+                buckets[1].append(idx)
+            elif q in name:
+                buckets[2].append(idx)
+            else:
+                buckets[3].append(idx)
+
+        for bucket in buckets:
+            if limit is not None and len(ranked) >= limit:
+                break
+            ranked += sorted(bucket, key=self.order.__getitem__)
+
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.items[idx] for idx in ranked]
+
+
+class SpatialIndex:
+    """Fixed-degree lat/lon grid over airport coordinates for radius queries"""
+
+    CELL_DEGREES = 1.0
+    MILES_PER_DEGREE = 69.09  # along a meridian, for EARTH_RADIUS_MILES 3959
+
+    def __init__(self, coords, earth_radius_miles):
+        """`coords` maps IATA -> (lat, lon, cos(lat)) in radians"""
+        self.coords = coords
+        self.earth_radius_miles = earth_radius_miles
+        self.cells = {}
+
+        for code, (lat, lon, _) in coords.items():
+            self.cells.setdefault(self._cell(math.degrees(lat), math.degrees(lon)), []).append(code)
+
+    def _cell(self, lat_deg, lon_deg):
+        return (math.floor(lat_deg / self.CELL_DEGREES), math.floor(lon_deg / self.CELL_DEGREES))
+
+    def within(self, airport_iata, radius_miles):
+        """(distance, IATA) of other airports within radius_miles, nearest first"""
+        lat1, lon1, cos1 = self.coords[airport_iata]
+        lat_deg = math.degrees(lat1)
+        lon_deg = math.degrees(lon1)
+
+        dlat = radius_miles / self.MILES_PER_DEGREE
+        lat_lo = max(-90.0, lat_deg - dlat)
+        lat_hi = min(90.0, lat_deg + dlat)
+
+        # Longitude span widens towards the poles; near them scan whole rows
+        widest = max(abs(lat_lo), abs(lat_hi))
+        n_lon = round(360 / self.CELL_DEGREES)
+        if widest >= 89.0 or dlat / math.cos(math.radians(widest)) >= 180:
+            lon_cells = range(n_lon)
+        else:
+            dlon = dlat / math.cos(math.radians(widest))
+            first = math.floor((lon_deg - dlon) / self.CELL_DEGREES)
+            last = math.floor((lon_deg + dlon) / self.CELL_DEGREES)
+            lon_cells = range(first, last + 1)
+
+        lat_first = math.floor(lat_lo / self.CELL_DEGREES)
+        lat_last = math.floor(lat_hi / self.CELL_DEGREES)
+        lon_offset = n_lon // 2  # grid longitudes run -180..180
+
+        coords = self.coords
+        sin = math.sin
+        asin = math.asin
+        sqrt = math.sqrt
+        found = []
+
+        for lat_cell in range(lat_first, lat_last + 1):
+            for lon_cell in lon_cells:
+                # Wrap across the antimeridian
+                lon_cell = (lon_cell + lon_offset) % n_lon - lon_offset
+                for code in self.cells.get((lat_cell, lon_cell), ()):
+                    if code == airport_iata:
+                        continue
+                    lat2, lon2, cos2 = coords[code]
+                    a = sin((lat2 - lat1) / 2) ** 2 + cos1 * cos2 * sin((lon2 - lon1) / 2) ** 2
+                    distance = round(self.earth_radius_miles * 2 * asin(sqrt(a)))
+                    if distance <= radius_miles:
+                        found.append((distance, code))
+
+        found.sort()
+        return found
@@ -0,0 +1,94 @@
+"""
+breakeven.py: Award vs cash breakeven and sensitivity
+
+Pure arithmetic behind Tab3. An award costs k_miles x 10 x cpp + YQ dollars
+(cpp = cents per point from valuations.json); it is worth it when that is no
+more than the cash fare. sensitivity() evaluates every program over a grid
+of cash prices, YQ values and valuation scales in one pass.
+"""
+
+from collections import namedtuple
+
+# Most values one series may expand to (one sensitivity column or row each)
+MAX_SERIES_LENGTH = 50
+
+
+def award_cost(k_miles, cpp, yq):
+    """Dollar cost of an award: miles at cpp cents each, plus YQ"""
+    return k_miles * 10 * cpp + yq
+
+
+def breakeven_cpp(k_miles, cash_price, yq):
+    """Valuation (cents per point) at which the award costs exactly the cash fare, or None"""
+    if k_miles <= 0:
+        return None
+    return (cash_price - yq) / (k_miles * 10)
+
+
+def parse_series(text):
+    """
+    Numbers from '0, 50, 100' or a range 'start-stop/step' (stop included).
+
+    Raises ValueError on anything else, or above MAX_SERIES_LENGTH values.
+    """
+    text = text.strip()
+    if not text:
+        raise ValueError('Enter at least one value')
+
+    if '/' in text:
+        bounds, step = text.split('/', 1)
+        start, stop = bounds.split('-', 1)
+        start, stop, step = float(start), float(stop), float(step)
+        if step <= 0 or stop < start:
+            raise ValueError(f'Bad range "{text}": use start-stop/step with start <= stop and step > 0')
+        count = int(round((stop - start) / step)) + 1
+        values = None
+    else:
+        values = [float(part) for part in text.replace(';', ',').split(',') if part.strip()]
+        count = len(values)
+
+    if count > MAX_SERIES_LENGTH:
+        raise ValueError(f'"{text}" gives {count} values; use at most {MAX_SERIES_LENGTH}')
+
+    return values if values is not None else [start + i * step for i in range(count)]
+
+
+class Scenario(namedtuple('Scenario', 'program ffp_code k_miles yq cpp cost savings')):
+    """
+    One program under one (YQ, valuation) assumption: award cost (= breakeven
+    cash price) and cash price - cost for each cash price of the grid.
+    """
+
+    __slots__ = ()
+
+
+def sensitivity(programs, cash_prices, yq_values, cpp_scales):
+    """
+    Scenarios for every priced program x YQ x valuation scale.
+
+    `programs` is (program_name, ffp_code, k_miles, cpp) for each program; ones
+    without numeric miles or valuation are skipped. `cpp_scales` multiply each
+    program's valuation (1.0 = as configured). Scenarios come grouped by
+    program in input order, then by YQ and scale. Raises ValueError when one
+    program would get more than MAX_SERIES_LENGTH (YQ, scale) scenarios.
+    """
+    cash_prices = list(cash_prices)
+    if len(yq_values) * len(cpp_scales) > MAX_SERIES_LENGTH:
+        raise ValueError(f'{len(yq_values)} YQ values x {len(cpp_scales)} valuation scales is more than '
+                         f'{MAX_SERIES_LENGTH} scenarios per program')
+    scenarios = []
+
+    for program_name, ffp_code, k_miles, cpp in programs:
+        if not isinstance(k_miles, (int, float)) or not isinstance(cpp, (int, float)):
+            continue
+
+        points_value = k_miles * 10
+        for yq in yq_values:
+            for scale in cpp_scales:
+                scaled_cpp = cpp * scale
+                cost = points_value * scaled_cpp + yq
+                scenarios.append(Scenario(
+                    program_name, ffp_code, k_miles, yq, scaled_cpp, cost,
+                    tuple(cash - cost for cash in cash_prices)))
+
+    return scenarios
@@ -0,0 +1,264 @@
+"""
+budget.py: Miles-budget reverse queries
+
+"From JFK in business for at most 70k miles, where can I go?" BudgetIndex
+builds, per origin, every destination x FFP price of every cabin sorted by
+miles, so a budget query is a bisect plus a slice. Charts are priced from
+their tables with AwardChart.price_all(): a zone chart once per destination
+zone, a distance chart once per band, fanned out to the airports they cover.
+An index is built the first time its origin is asked for (prepare() lets the
+GUI do that off the UI thread) and kept in a small LRU cache.
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+
+from charts import STEP_ZONE_PAIRS
+from engine import CABINS
+
+# Origin indexes (all cabins) kept in memory at once
+BUDGET_CACHE_SIZE = 4
+
+
+class BudgetEntry(tuple):
+    """(miles, dest, ffp, carriers, chart_name, distance) row of a budget index"""
+
+    __slots__ = ()
+
+    miles = property(lambda self: self[0])
+    dest = property(lambda self: self[1])
+    ffp = property(lambda self: self[2])
+    carriers = property(lambda self: self[3])
+    chart_name = property(lambda self: self[4])
+    distance = property(lambda self: self[5])
+
+
+class BudgetIndex:
+    """Lazily built, cached per-origin miles index over a PricingEngine"""
+
+    def __init__(self, engine, cache_size=BUDGET_CACHE_SIZE):
+        self.engine = engine
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # origin -> {cabin: (miles, entries)}
+        self._building = {}           # origin -> threading.Event set when its build ends
+        self._lock = threading.Lock()
+        self._tables = None           # see _locations()
+        self._tables_lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def reachable(self, orig, cabin, max_miles, min_miles=0):
+        """Entries with min_miles <= miles <= max_miles, cheapest first"""
+        return [BudgetEntry(entry) for entry in self._range(orig, cabin, max_miles, min_miles)]
+
+    def best_per_destination(self, orig, cabin, max_miles):
+        """Cheapest entry per destination within budget, cheapest first"""
+        best = {}
+        for entry in self._range(orig, cabin, max_miles, 0):
+            best.setdefault(entry[1], entry)
+        return [BudgetEntry(entry) for entry in best.values()]
+
+    def is_ready(self, orig):
+        """True when queries from orig are answered without building"""
+        with self._lock:
+            return orig in self._cache
+
+    def prepare(self, orig):
+        """Build the index of orig now (blocking); safe to call from a worker thread"""
+        self._index(orig)
+
+    def close(self):
+        """Abandon builds in progress (they raise RuntimeError) and refuse new ones"""
+        self._closed.set()
+
+    def _range(self, orig, cabin, max_miles, min_miles):
+        """Index rows (plain tuples) with min_miles <= miles <= max_miles"""
+        if cabin not in CABINS:
+            raise ValueError(f'Unknown cabin "{cabin}"')
+
+        miles, entries = self._index(orig)[cabin]
+        lo = bisect.bisect_left(miles, min_miles)
+        hi = bisect.bisect_right(miles, max_miles)
+        return entries[lo:hi]
+
+    def _index(self, orig):
+        while True:
+            with self._lock:
+                index = self._cache.get(orig)
+                if index is not None:
+                    self._cache.move_to_end(orig)
+                    return index
+
+                building = self._building.get(orig)
+                if building is None:
+                    building = self._building[orig] = threading.Event()
+                    break
+
+            # Another thread builds this origin: wait, then read its result
+            building.wait()
+
+        try:
+            index = self._build(orig)
+            with self._lock:
+                self._cache[orig] = index
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return index
+        finally:
+            with self._lock:
+                del self._building[orig]
+            building.set()
+
+    def _locations(self):
+        """
+        Origin-independent destination tables, built once per index:
+        (codes, countries, zone tables, dest_groups per locator, profiles).
+        """
+        with self._tables_lock:
+            if self._tables is not None:
+                return self._tables
+
+            engine = self.engine
+            codes = sorted(code for code in engine.coords if code)
+            countries = [engine.airports[code][1] for code in codes]
+
+            zone_systems = sorted({
+                chart.zone_system for chart in engine.award_charts.values() if chart.locator == 'zone'
+            })
+            # Route-dependent selections only look at the destination country and
+            # a few zone systems, so destinations sharing those choose alike
+            residual_systems = sorted({
+                arg[0]
+                for by_carrier in engine.chart_selection.values()
+                for selection in by_carrier.values()
+                if selection.chart is None
+                for kind, arg, _ in selection.steps
+                if kind == STEP_ZONE_PAIRS
+            })
+            zone_tables = {}
+            for name in sorted(set(zone_systems) | set(residual_systems)):
+                if self._closed.is_set():
+                    raise RuntimeError('Budget index closed')
+                zone_tables[name] = [engine.zone_of(code, name) for code in codes]
+
+            def groups(locations):
+                grouped = {}
+                for i, location in enumerate(locations):
+                    grouped.setdefault(location, []).append(i)
+                return grouped
+
+            # Destination indices per location: AwardChart.price_all's dest_groups
+            dest_groups = {name: groups(table) for name, table in zone_tables.items()}
+            dest_groups['country'] = groups(countries)
+            dest_groups[None] = {None: list(range(len(codes)))}
+
+            profiles = list(groups(zip(countries, *(zone_tables[name] for name in residual_systems))).values())
+
+            self._tables = (codes, countries, zone_tables, dest_groups, profiles)
+            return self._tables
+
+    def _build(self, orig):
+        """Price every destination x FFP x cabin, keeping the cheapest chart per (dest, FFP)"""
+        engine = self.engine
+        engine.airport_detail(orig)
+
+        codes, countries, zone_tables, dest_groups, profiles = self._locations()
+        index_of = {code: i for i, code in enumerate(codes)}
+        orig_index = index_of.get(orig)
+
+        distances = engine.distances_from(orig, codes) if orig_index is not None else []
+        order = sorted(range(len(codes)), key=distances.__getitem__)
+        by_distance = ([distances[i] for i in order], order)
+
+        def zone_of(airport_iata, zone_system_name):
+            return zone_tables[zone_system_name][index_of[airport_iata]]
+
+        def country_of(airport_iata):
+            return countries[index_of[airport_iata]]
+
+        def locate(chart):
+            """(origin location, dest_groups) of a chart for this origin"""
+            if chart.locator == 'zone':
+                return zone_of(orig, chart.zone_system), dest_groups[chart.zone_system]
+            if chart.locator == 'country':
+                return country_of(orig), dest_groups['country']
+            return None, dest_groups[None]
+
+        interned = {}
+        entries = {cabin: [] for cabin in CABINS}
+        all_dests = [range(len(codes))]
+
+        for ffp_code, by_carrier in engine.chart_selection.items():
+            # Carriers with a route-independent chart share one price per destination
+            fixed = {}
+            residual = []
+            for carrier, selection in by_carrier.items():
+                if selection.chart is not None:
+                    fixed.setdefault(selection.chart, []).append(carrier)
+                elif not selection.error and not selection.warning:
+                    residual.append((carrier, selection))
+
+            # (chart name, cabin) -> miles per destination, for this FFP
+            vectors = {}
+
+            # Without residual carriers every destination has the same options
+            for indices in profiles if residual else all_dests:
+                if self._closed.is_set():
+                    raise RuntimeError('Budget index closed')
+
+                merged = {chart_name: list(carriers) for chart_name, carriers in fixed.items()}
+                for carrier, selection in residual:
+                    try:
+                        chart_name = selection.choose(orig, codes[indices[0]], zone_of, country_of)
+                    except ValueError:
+                        continue
+                    if chart_name is not None:
+                        merged.setdefault(chart_name, []).append(carrier)
+
+                options = []
+                for chart_name, carriers in merged.items():
+                    carriers = tuple(sorted(carriers))
+                    options.append((chart_name, interned.setdefault(carriers, carriers)))
+
+                for cabin in CABINS:
+                    priced = []
+                    for chart_name, carriers in options:
+                        vector = vectors.get((chart_name, cabin))
+                        if vector is None:
+                            chart = engine.award_charts[chart_name]
+                            orig_loc, groups = locate(chart)
+                            vector = vectors[(chart_name, cabin)] = chart.price_all(
+                                cabin, orig_loc, groups, distances, by_distance)
+                        priced.append((vector, chart_name, carriers))
+
+                    if len(priced) == 1:
+                        vector, chart_name, carriers = priced[0]
+                        entries[cabin].extend([
+                            (vector[i], codes[i], ffp_code, carriers, chart_name, distances[i])
+                            for i in indices if vector[i] is not None and i != orig_index
+                        ])
+                        continue
+
+                    for i in indices:
+                        if i == orig_index:
+                            continue
+                        best = None
+                        for vector, chart_name, carriers in priced:
+                            miles = vector[i]
+                            if miles is None:
+                                continue
+                            if best is None or miles < best[0]:
+                                best = (miles, chart_name, carriers)
+                            elif miles == best[0]:
+                                best = (miles, best[1], best[2] + carriers)
+
+                        if best is not None:
+                            carriers = tuple(sorted(best[2]))
+                            carriers = interned.setdefault(carriers, carriers)
+                            entries[cabin].append((best[0], codes[i], ffp_code, carriers, best[1], distances[i]))
+
+        index = {}
+        for cabin, cabin_entries in entries.items():
+            cabin_entries.sort()
+            index[cabin] = ([entry[0] for entry in cabin_entries], cabin_entries)
+        return index
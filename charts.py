@@ -0,0 +1,589 @@
+"""
+charts.py: Compiled award charts and chart selection
+
+award_charts.json is compiled once at startup into typed chart objects with
+normalized band arrays and zone-pair price maps, so pricing does no JSON
+navigation per lookup.
+
+Which charts an FFP can use for a carrier, and in which priority order, does
+not depend on the route either. It is worked out into a ChartSelection per
+FFP x carrier: either the final chart, or a short list of route predicates
+(zone pairs, domestic) evaluated per query.
+"""
+
+import bisect
+
+from results import (
+    PriceStatus, QUOTE_DYNAMIC, QUOTE_NO_CABIN, QUOTE_UNKNOWN_CHART, quote_error, quote_ok
+)
+
+# Step kinds of a residual decision list
+STEP_ZONE_PAIRS = 'zone_pairs'
+STEP_DOMESTIC = 'domestic'
+STEP_DOMESTIC_IN = 'domestic_in'
+
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+def _zone_pair_set(pairs):
+    """Expand from/to zone pairs into a set of (orig_zone, dest_zone) in both directions"""
+    pair_set = set()
+    for pair_from, pair_to in pairs:
+        for zone_a in _as_list(pair_from):
+            for zone_b in _as_list(pair_to):
+                pair_set.add((zone_a, zone_b))
+                pair_set.add((zone_b, zone_a))
+    return frozenset(pair_set)
+
+
+def _chart_zone_pairs(chart):
+    """From/to pairs of every cabin of a zone-based chart"""
+    return [(entry.get('from'), entry.get('to'))
+            for entries in chart.get('cabins').values()
+            for entry in entries]
+
+
+def _route_zone_pairs(chart):
+    """From/to pairs of the route_specific restriction of a distance-based chart"""
+    return [(entry.get('from'), entry.get('to')) for entry in chart.get('route_specific')]
+
+
+def _zone_step(chart_name, chart, pairs):
+    return (STEP_ZONE_PAIRS, (chart.get('zone_system'), _zone_pair_set(pairs)), chart_name)
+
+
+# ==================== COMPILED AWARD CHARTS ====================
+
+QUOTE_DISTANCE_EXCEEDED = quote_error(PriceStatus.NOT_PRICED, 'Distance exceeds award chart maximum.')
+QUOTE_ZONE_NOT_DEFINED = quote_error(PriceStatus.NOT_PRICED, 'Price of such route is not defined')
+QUOTE_HYBRID_NOT_FOUND = quote_error(PriceStatus.NOT_PRICED, 'Hybrid Zone unable to find such route.')
+QUOTE_OUT_OF_ZONE = quote_error(
+    PriceStatus.OUT_OF_ZONE, 'Origin or destination not included in the zone-based chart')
+QUOTE_NOT_DOMESTIC = quote_error(
+    PriceStatus.WRONG_CHART, 'Wrong chart: Domestic chart picked despite not being domestic')
+QUOTE_NOT_DOMESTIC_EXCEPTION = quote_error(
+    PriceStatus.WRONG_CHART, 'Wrong chart: Domestic chart picked despite not being special domestic case.')
+QUOTE_UNKNOWN_DOMESTIC = quote_error(PriceStatus.UNKNOWN_CHART, 'Unknown type of domestic chart.')
+QUOTE_DOMESTIC_NOT_DEFINED = quote_error(PriceStatus.NOT_PRICED, None)
+
+# Price table row kinds, see AwardChart.entries()
+TABLE_ZONE = 'zone'
+TABLE_BAND = 'band'
+TABLE_DOMESTIC = 'domestic'
+
+
+def _compile_bands(entries):
+    """Distance bands as a tuple of (min_miles, max_miles, miles), in chart order"""
+    return tuple((entry['min_miles'], entry['max_miles'], entry['miles']) for entry in entries)
+
+
+def _band_price(bands, distance):
+    """Miles of the first band containing distance, or None"""
+    for start_milage, end_milage, miles in bands:
+        if start_milage <= distance <= end_milage:
+            return miles
+    return None
+
+
+def _band_vector(bands, by_distance):
+    """Band miles per destination (None outside every band); earlier bands win, as in _band_price"""
+    sorted_distances, order = by_distance
+    vector = [None] * len(order)
+    for start_milage, end_milage, miles in reversed(bands):
+        lo = bisect.bisect_left(sorted_distances, start_milage)
+        hi = bisect.bisect_right(sorted_distances, end_milage)
+        for k in range(lo, hi):
+            vector[order[k]] = miles
+    return vector
+
+
+def _group_vector(chart, cabin, orig_loc, dest_groups, size):
+    """Miles per destination of a distance-independent chart: one price() per destination location"""
+    vector = [None] * size
+    for dest_loc, indices in dest_groups.items():
+        status, miles, _ = chart.price(cabin, orig_loc, dest_loc, None)
+        if status is PriceStatus.OK:
+            for i in indices:
+                vector[i] = miles
+    return vector
+
+
+def _band_entries(cabin, bands):
+    for start_milage, end_milage, miles in bands:
+        yield (cabin, TABLE_BAND, start_milage, end_milage, miles)
+
+
+def _compile_zone_prices(entries):
+    """Zone entries as {(orig_zone, dest_zone): miles}, both directions, first entry wins"""
+    prices = {}
+    for entry in entries:
+        for zone_a in _as_list(entry['from']):
+            for zone_b in _as_list(entry['to']):
+                prices.setdefault((zone_a, zone_b), entry['miles'])
+                prices.setdefault((zone_b, zone_a), entry['miles'])
+    return prices
+
+
+def _zone_entries(cabin, prices):
+    """Zone price map as table rows, each unordered pair once unless the directions differ"""
+    for (zone_a, zone_b), miles in prices.items():
+        if zone_b < zone_a and prices.get((zone_b, zone_a)) == miles:
+            continue
+        yield (cabin, TABLE_ZONE, zone_a, zone_b, miles)
+
+
+def _zone_price(prices, orig_zone, dest_zone):
+    """Miles between two zones, or None"""
+    if orig_zone and dest_zone:
+        return prices.get((orig_zone, dest_zone))
+    return None
+
+
+class AwardChart:
+    """
+    Base compiled chart.
+
+    `locator` tells the caller what price() expects as orig/dest: 'zone'
+    (zones in self.zone_system), 'country' (ISO countries) or None.
+    price() returns a results quote tuple (status, miles, message).
+    price_all() prices one origin against many destinations at once from the
+    chart tables: `dest_groups` maps each destination location to destination
+    indices, `distances` is per index and `by_distance` is (sorted distances,
+    indices in that order). It returns miles per index, None when not OK.
+    entries() lists the chart as flat price table rows (cabin, kind, a, b,
+    miles): zone pairs, distance bands (a..b miles) or domestic countries.
+    """
+
+    __slots__ = ('name', 'zone_system')
+
+    locator = None
+
+    def __init__(self, name, zone_system=None):
+        self.name = name
+        self.zone_system = zone_system
+
+    def price(self, cabin, orig_zone, dest_zone, distance):
+        return QUOTE_UNKNOWN_CHART
+
+    def price_all(self, cabin, orig_loc, dest_groups, distances, by_distance):
+        vector = [None] * len(distances)
+        for dest_loc, indices in dest_groups.items():
+            for i in indices:
+                status, miles, _ = self.price(cabin, orig_loc, dest_loc, distances[i])
+                if status is PriceStatus.OK:
+                    vector[i] = miles
+        return vector
+
+    def entries(self):
+        return iter(())
+
+
+class DistanceChart(AwardChart):
+    """Distance-banded chart"""
+
+    __slots__ = ('bands',)
+
+    def __init__(self, name, chart):
+        super().__init__(name)
+        self.bands = {cabin: _compile_bands(entries) for cabin, entries in chart['cabins'].items() if entries}
+
+    def price(self, cabin, orig_zone, dest_zone, distance):
+        bands = self.bands.get(cabin)
+        if bands is None:
+            return QUOTE_NO_CABIN
+
+        miles = _band_price(bands, distance)
+        return QUOTE_DISTANCE_EXCEEDED if miles is None else quote_ok(miles)
+
+    def price_all(self, cabin, orig_loc, dest_groups, distances, by_distance):
+        bands = self.bands.get(cabin)
+        if bands is None:
+            return [None] * len(distances)
+        return _band_vector(bands, by_distance)
+
+    def entries(self):
+        for cabin, bands in self.bands.items():
+            yield from _band_entries(cabin, bands)
+
+
+class DynamicChart(AwardChart):
+    """Dynamically priced chart"""
+
+    __slots__ = ()
+
+    def price(self, cabin, orig_zone, dest_zone, distance):
+        return QUOTE_DYNAMIC
+
+    def price_all(self, cabin, orig_loc, dest_groups, distances, by_distance):
+        return [None] * len(distances)
+
+
+class ZoneChart(AwardChart):
+    """Zone-to-zone chart"""
+
+    __slots__ = ('prices',)
+
+    locator = 'zone'
+
+    def __init__(self, name, chart):
+        super().__init__(name, chart['zone_system'])
+        self.prices = {cabin: _compile_zone_prices(entries) for cabin, entries in chart['cabins'].items() if entries}
+
+    def price(self, cabin, orig_zone, dest_zone, distance):
+        if not (orig_zone and dest_zone):
+            return QUOTE_OUT_OF_ZONE
+
+        prices = self.prices.get(cabin)
+        if prices is None:
+            return QUOTE_NO_CABIN
+
+        miles = prices.get((orig_zone, dest_zone))
+        return QUOTE_ZONE_NOT_DEFINED if miles is None else quote_ok(miles)
+
+    def price_all(self, cabin, orig_loc, dest_groups, distances, by_distance):
+        return _group_vector(self, cabin, orig_loc, dest_groups, len(distances))
+
+    def entries(self):
+        for cabin, prices in self.prices.items():
+            yield from _zone_entries(cabin, prices)
+
+
+class HybridChart(AwardChart):
+    """Zone chart with distance bands, tried in the chart's priority order"""
+
+    __slots__ = ('priority', 'distance_threshold', 'bands', 'prices')
+
+    locator = 'zone'
+
+    def __init__(self, name, chart):
+        super().__init__(name, chart['zone_system'])
+        self.priority = chart['priority']
+        self.distance_threshold = chart.get('distance_threshold')
+        self.bands = {}
+        self.prices = {}
+
+        for cabin, value_cabin in chart['cabins'].items():
+            if not value_cabin:
+                continue
+            self.bands[cabin] = _compile_bands(value_cabin.get('distance_based') or [])
+            self.prices[cabin] = _compile_zone_prices(value_cabin.get('zone_based') or [])
+
+    def price(self, cabin, orig_zone, dest_zone, distance):
+        if cabin not in self.bands:
+            return QUOTE_NO_CABIN
+
+        bands = self.bands[cabin]
+        prices = self.prices[cabin]
+        miles = None
+
+        if self.priority == 'zone_first':
+            if prices:
+                miles = _zone_price(prices, orig_zone, dest_zone)
+            if miles is None and bands:
+                miles = _band_price(bands, distance)
+
+        elif self.priority == 'distance_first':
+            if distance <= self.distance_threshold and bands:
+                miles = _band_price(bands, distance)
+            elif prices:
+                miles = _zone_price(prices, orig_zone, dest_zone)
+
+        return QUOTE_HYBRID_NOT_FOUND if miles is None else quote_ok(miles)
+
+    def price_all(self, cabin, orig_loc, dest_groups, distances, by_distance):
+        size = len(distances)
+        if cabin not in self.bands:
+            return [None] * size
+
+        bands = self.bands[cabin]
+        prices = self.prices[cabin]
+
+        zone_vector = [None] * size
+        if prices:
+            for dest_loc, indices in dest_groups.items():
+                miles = _zone_price(prices, orig_loc, dest_loc)
+                if miles is not None:
+                    for i in indices:
+                        zone_vector[i] = miles
+        band_vector = _band_vector(bands, by_distance) if bands else [None] * size
+
+        if self.priority == 'zone_first':
+            return [band if zone is None else zone for zone, band in zip(zone_vector, band_vector)]
+
+        if self.priority == 'distance_first':
+            threshold = self.distance_threshold
+            if not bands:
+                return zone_vector
+            return [
+                band if distance <= threshold else zone
+                for distance, zone, band in zip(distances, zone_vector, band_vector)
+            ] if prices else [
+                band if distance <= threshold else None
+                for distance, band in zip(distances, band_vector)
+            ]
+
+        return [None] * size
+
+    def entries(self):
+        for cabin in self.bands:
+            yield from _zone_entries(cabin, self.prices[cabin])
+            yield from _band_entries(cabin, self.bands[cabin])
+
+
+class DomesticChart(AwardChart):
+    """Domestic overwrite chart: one default price, or per-country exceptions"""
+
+    __slots__ = ('default', 'exceptions', 'prices')
+
+    locator = 'country'
+
+    def __init__(self, name, chart):
+        super().__init__(name)
+        self.default = bool(chart.get('default'))
+        self.exceptions = frozenset(chart.get('exceptions') or ())
+        self.prices = {}
+
+        for cabin, entries in chart['cabins'].items():
+            if not entries:
+                continue
+            if self.default:
+                self.prices[cabin] = entries[0]
+            else:
+                by_country = {}
+                for item in entries:
+                    for country, miles in item.items():
+                        by_country.setdefault(country, miles)
+                self.prices[cabin] = by_country
+
+    def price(self, cabin, orig_country, dest_country, distance):
+        if orig_country != dest_country:
+            return QUOTE_NOT_DOMESTIC
+
+        if self.default:
+            miles = self.prices.get(cabin)
+            return QUOTE_NO_CABIN if miles is None else quote_ok(miles)
+
+        if not self.exceptions:
+            return QUOTE_UNKNOWN_DOMESTIC
+
+        if orig_country not in self.exceptions:
+            return QUOTE_NOT_DOMESTIC_EXCEPTION
+
+        if cabin not in self.prices:
+            return QUOTE_NO_CABIN
+
+        miles = self.prices[cabin].get(orig_country)
+        return QUOTE_DOMESTIC_NOT_DEFINED if miles is None else quote_ok(miles)
+
+    def price_all(self, cabin, orig_country, dest_groups, distances, by_distance):
+        return _group_vector(self, cabin, orig_country, dest_groups, len(distances))
+
+    def entries(self):
+        """Default charts price any country alike, listed with country None"""
+        for cabin, prices in self.prices.items():
+            if self.default:
+                yield (cabin, TABLE_DOMESTIC, None, None, prices)
+            else:
+                for country, miles in prices.items():
+                    yield (cabin, TABLE_DOMESTIC, country, country, miles)
+
+
+CHART_TYPES = {
+    'distance_based': DistanceChart,
+    'zone_based': ZoneChart,
+    'hybrid_distance_zone': HybridChart,
+}
+
+
+def compile_award_charts(award_chart_dict):
+    """Compile award_charts.json into {chart_name: AwardChart}"""
+    compiled = {}
+
+    for name, chart in award_chart_dict.items():
+        chart_type = chart.get('type')
+        try:
+            if chart_type in CHART_TYPES:
+                compiled[name] = CHART_TYPES[chart_type](name, chart)
+            elif chart_type == 'dynamic':
+                compiled[name] = DynamicChart(name)
+            elif chart.get('is_domestic_overwrite'):
+                compiled[name] = DomesticChart(name, chart)
+            else:
+                compiled[name] = AwardChart(name)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f'Malformed award chart "{name}": {str(e)}')
+
+    return compiled
+
+
+class ChartSelection:
+    """Chart choice of one FFP for one carrier"""
+
+    __slots__ = ('chart', 'steps', 'fallback', 'error', 'warning')
+
+    def __init__(self, chart=None, steps=(), fallback=None, error=None, warning=None):
+        self.chart = chart        # final chart name, when the route does not matter
+        self.steps = steps        # tuple of (kind, arg, chart_name), first match wins
+        self.fallback = fallback  # chart name when no step matches
+        self.error = error        # raised as ValueError when selection is reached
+        self.warning = warning    # why no chart applies (reported once at startup)
+
+    def choose(self, orig, dest, zone_of, country_of):
+        """
+        Return the chart name for this route, or None.
+
+        `zone_of(iata, zone_system_name)` and `country_of(iata)` are only
+        called for the residual route predicates.
+        """
+        if self.chart is not None:
+            return self.chart
+
+        if self.error:
+            raise ValueError(self.error)
+
+        if self.warning:
+            return None
+
+        for kind, arg, chart_name in self.steps:
+            if kind == STEP_ZONE_PAIRS:
+                zone_system_name, pair_set = arg
+                orig_zone = zone_of(orig, zone_system_name)
+                dest_zone = zone_of(dest, zone_system_name)
+                if orig_zone and dest_zone and (orig_zone, dest_zone) in pair_set:
+                    return chart_name
+
+            else:
+                orig_country = country_of(orig)
+                dest_country = country_of(dest)
+                if orig_country == dest_country and (kind == STEP_DOMESTIC or orig_country in arg):
+                    return chart_name
+
+        if self.fallback is not None:
+            return self.fallback
+
+        raise ValueError('Somehow this FFP still has multiple charts for this search')
+
+
+def _specialize(candidates):
+    """Reduce an ordered {chart_name: chart} candidate dict to a ChartSelection"""
+    if len(candidates) == 1:
+        (name, _), = candidates.items()
+        return ChartSelection(chart=name)
+
+    num_specialoverwrite = sum(1 for value in candidates.values() if value.get('is_special_overwrite'))
+    num_domoverwrite = sum(1 for value in candidates.values()
+                           if not value.get('is_special_overwrite') and value.get('is_domestic_overwrite'))
+    num_normchart = len(candidates) - num_specialoverwrite - num_domoverwrite
+
+    if num_specialoverwrite > 1 or num_domoverwrite > 1 or num_normchart < 1:
+        return ChartSelection(error='More than 1 special chart. Unexpected')
+
+    steps = []
+    checked = set()
+
+    # Priority 1: Special overwrite chart
+    for name, value in candidates.items():
+        if value.get('is_special_overwrite'):
+            if value.get('type') == 'zone_based':
+                steps.append(_zone_step(name, value, _chart_zone_pairs(value)))
+                checked.add(name)
+            elif value.get('type') == 'distance_based' and value.get('route_specific'):
+                steps.append(_zone_step(name, value, _route_zone_pairs(value)))
+                checked.add(name)
+
+    # Priority 2: Domestic overwrite chart
+    for name, value in candidates.items():
+        if value.get('is_domestic_overwrite'):
+            if value.get('default'):
+                steps.append((STEP_DOMESTIC, None, name))
+            elif value.get('exceptions'):
+                steps.append((STEP_DOMESTIC_IN, frozenset(value.get('exceptions')), name))
+
+    # Priority 3: Regular charts
+    fallback = None
+    if num_normchart == 1:
+        fallback = next(name for name, value in candidates.items()
+                        if not value.get('is_domestic_overwrite') and not value.get('is_special_overwrite'))
+    else:
+        # Multiple normal charts with limits (special charts already failed in priority 1)
+        for name, value in candidates.items():
+            if name in checked:
+                continue
+            if value.get('type') == 'distance_based' and value.get('route_specific'):
+                steps.append(_zone_step(name, value, _route_zone_pairs(value)))
+            elif value.get('type') == 'zone_based':
+                steps.append(_zone_step(name, value, _chart_zone_pairs(value)))
+
+    if not steps and fallback is not None:
+        return ChartSelection(chart=fallback)
+
+    return ChartSelection(steps=tuple(steps), fallback=fallback)
+
+
+def compile_chart_selection(ffp_dict_redeem, award_chart_dict):
+    """Build {ffp_code: {carrier: ChartSelection}} for every redeemable carrier"""
+    selection = {}
+
+    for ffp_code, value in ffp_dict_redeem.items():
+        ffp_name = value.get('name')
+        ffp_self_carriers = value.get('carriers')
+        ffp_redeem_partner = value.get('redeem_partner') or ()
+
+        ffp_charts = {
+            name: chart
+            for name, chart in award_chart_dict.items()
+            if chart.get('ffp_code') == ffp_code and not chart.get('applies_to_multiple')
+        }
+        self_charts = {name: chart for name, chart in ffp_charts.items() if chart.get('applies_to') == 'self'}
+        specific_charts = {name: chart for name, chart in ffp_charts.items() if chart.get('applies_to') == 'specific'}
+        general_charts = {name: chart for name, chart in ffp_charts.items() if chart.get('applies_to') == 'all_partners'}
+
+        by_carrier = {}
+
+        for carrier in ffp_self_carriers:
+            by_carrier[carrier] = self_charts
+
+        for carrier in ffp_redeem_partner:
+            if carrier in by_carrier:
+                continue
+
+            if specific_charts:
+                # Program has partner-specific chart, else falls back to its general chart
+                candidates = {
+                    name: chart for name, chart in specific_charts.items()
+                    if carrier in chart.get('specific_partners')
+                }
+                by_carrier[carrier] = candidates or general_charts
+            elif general_charts:
+                by_carrier[carrier] = general_charts
+            else:
+                by_carrier[carrier] = None
+
+        compiled = {}
+        for carrier, candidates in by_carrier.items():
+            if candidates is None:
+                compiled[carrier] = ChartSelection(
+                    warning=f'Program {ffp_name} has no defined partner chart despite having partners.')
+            elif not candidates:
+                compiled[carrier] = ChartSelection(
+                    warning=f'No chart found for carrier {carrier} in program {ffp_name}')
+            else:
+                compiled[carrier] = _specialize(candidates)
+
+        selection[ffp_code] = compiled
+
+    return selection
+
+
+def selection_warnings(selection):
+    """Warnings of (FFP, carrier) pairs that have no usable chart"""
+    return [chosen.warning for by_carrier in selection.values()
+            for chosen in by_carrier.values() if chosen.warning]
+
+
+def count_route_dependent(selection):
+    """Number of (FFP, carrier) pairs whose chart still depends on the route"""
+    return sum(1 for by_carrier in selection.values()
+               for chosen in by_carrier.values() if chosen.steps)
@@ -0,0 +1,513 @@
+"""
+datastore.py: Indexed SQLite data store and on-demand engine backend
+
+The JSON files in assets/data are parsed in full at startup. For batch jobs
+and scripts that touch a handful of airports, the importer materializes one
+data version into an indexed SQLite file instead:
+
+    python datastore.py --data-dir assets/data --output ffp_data.sqlite
+
+Tables: airports, carriers, partnerships (redeem / earn), zone_members (zone
+of every airport in every zone system), chart_entries (every chart's price
+table, as charts.Chart.entries()), plus the small JSON documents the engine
+compiles (award charts, zone systems, multi-segment rules, FFPs).
+
+StorePricingEngine is a PricingEngine over that file: charts and rules are
+compiled from the stored documents (a few hundred KB), while airports,
+coordinates, radius and destination queries go to SQLite on demand through
+a small in-memory hot cache. Opening it does not scale with the airport
+count, and memory grows with the airports actually used.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from charts import compile_award_charts, compile_chart_selection
+from engine import EARTH_RADIUS_MILES, SWEEP_FILTERS, PricingEngine, multipart_chart_names
+from multiseg_rules import compile_multiseg_rules
+from result_cache import data_version
+from zones import compile_zone_systems
+
+# Bump when the table layout changes
+STORE_FORMAT = 1
+
+# Airports kept in memory per store, most recently used
+HOT_CACHE_SIZE = 4096
+
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180  # along a meridian
+
+# Distances are rounded before the radius test, so an airport up to half a mile
+# beyond the radius still matches; the bounding box must include it
+BOX_PADDING_MILES = 0.5
+
+# Radii spot-checked by --check, plus the exact distance of a neighbour
+CHECK_RADII = (25, 50, 100, 150, 300)
+
+_SCHEMA = '''
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE documents (name TEXT PRIMARY KEY, body TEXT NOT NULL);
+CREATE TABLE airports (
+    iata TEXT PRIMARY KEY, continent TEXT, country TEXT, region TEXT, lat REAL, lon REAL, name TEXT);
+CREATE INDEX airports_continent ON airports (continent);
+CREATE INDEX airports_country ON airports (country);
+CREATE INDEX airports_lat ON airports (lat);
+CREATE TABLE carriers (code TEXT PRIMARY KEY, name TEXT, country TEXT, alliance TEXT);
+CREATE TABLE partnerships (ffp TEXT NOT NULL, carrier TEXT NOT NULL, relationship TEXT NOT NULL);
+CREATE INDEX partnerships_ffp ON partnerships (ffp, relationship);
+CREATE INDEX partnerships_carrier ON partnerships (carrier);
+CREATE TABLE zone_members (
+    zone_system TEXT NOT NULL, iata TEXT NOT NULL, zone TEXT NOT NULL, PRIMARY KEY (zone_system, iata));
+CREATE INDEX zone_members_zone ON zone_members (zone_system, zone);
+CREATE TABLE chart_entries (
+    chart TEXT NOT NULL, cabin TEXT NOT NULL, kind TEXT NOT NULL, a TEXT, b TEXT, miles INTEGER);
+CREATE INDEX chart_entries_chart ON chart_entries (chart, cabin);
+'''
+
+# Stored JSON documents: name -> snapshot attribute path
+_DOCUMENTS = {
+    'award_charts': ('award_chart_dict',),
+    'zone_systems': ('zonesystems',),
+    'multiseg_rules': ('multisegrules',),
+    'ffps': ('ffp', 'ffps'),
+    'alliances': ('alliance', 'alliances'),
+}
+
+
+# ==================== IMPORTER ====================
+
+def _band_bound(value):
+    return None if value is None else str(value)
+
+
+def build_store(snapshot, path):
+    """Write the prepared data of a snapshot.DataSnapshot into a new SQLite file at path"""
+    engine = snapshot.engine
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(_SCHEMA)
+
+        conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('format', str(STORE_FORMAT)),
+            ('data_version', data_version(snapshot.data_digests)),
+            ('source', snapshot.JSONDIR),
+        ])
+
+        for name, attrs in _DOCUMENTS.items():
+            value = snapshot
+            for attr in attrs:
+                value = getattr(value, attr) if not isinstance(value, dict) else value[attr]
+            conn.execute('INSERT INTO documents VALUES (?, ?)', (name, json.dumps(value)))
+
+        # First entry of an IATA code wins, as in PricingEngine
+        conn.executemany('INSERT OR IGNORE INTO airports VALUES (?, ?, ?, ?, ?, ?, ?)', [
+            (airport.get('iata_code'), airport.get('continent'), airport.get('iso_country'),
+             airport.get('iso_region'), airport.get('latitude_deg'), airport.get('longitude_deg'),
+             airport.get('name'))
+            for airport in snapshot.airports if airport.get('iata_code')
+        ])
+
+        conn.executemany('INSERT OR IGNORE INTO carriers VALUES (?, ?, ?, ?)', [
+            (carrier['code'], carrier['name'], carrier['country'],
+             snapshot.carrier_alliance.get(carrier['code']))
+            for carrier in snapshot.carriers['carriers']
+        ])
+
+        for relationship, partners in (('redeem', snapshot.redeem_partners), ('earn', snapshot.earn_partners)):
+            conn.executemany('INSERT INTO partnerships VALUES (?, ?, ?)', [
+                (ffp_code, carrier, relationship)
+                for ffp_code, carriers in partners.items() for carrier in sorted(carriers)
+            ])
+
+        codes = [code for code in engine.airports if code]
+        for zone_system_name in engine.zone_systems:
+            rows = []
+            for code in codes:
+                zone = engine.zone_of(code, zone_system_name)
+                if zone is not None:
+                    rows.append((zone_system_name, code, zone))
+            conn.executemany('INSERT INTO zone_members VALUES (?, ?, ?)', rows)
+
+        for chart_name, chart in engine.award_charts.items():
+            conn.executemany('INSERT INTO chart_entries VALUES (?, ?, ?, ?, ?, ?)', [
+                (chart_name, cabin, kind, _band_bound(a), _band_bound(b), miles)
+                for cabin, kind, a, b, miles in chart.entries()
+            ])
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+
+
+# ==================== STORE ====================
+
+class DataStore:
+    """Read-only queries over a store file, with a hot cache of airport rows"""
+
+    def __init__(self, path, hot_cache_size=HOT_CACHE_SIZE):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'Missing data store: {path}')
+
+        self.path = path
+        self.hot_cache_size = hot_cache_size
+        self._lock = threading.Lock()
+        self._airports = OrderedDict()  # IATA -> detail tuple, or None for unknown codes
+        self._conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+
+        self.meta = dict(self._query('SELECT key, value FROM meta'))
+        if self.meta.get('format') != str(STORE_FORMAT):
+            raise ValueError(f'{path}: data store format {self.meta.get("format")}, expected {STORE_FORMAT}')
+        self.data_version = self.meta['data_version']
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def document(self, name):
+        rows = self._query('SELECT body FROM documents WHERE name = ?', (name,))
+        if not rows:
+            raise ValueError(f'{self.path}: missing document "{name}"')
+        return json.loads(rows[0][0])
+
+    # ---------- Airports ----------
+
+    def airport(self, airport_iata):
+        """(continent, country, region, lat, lon, name) of an airport, or None"""
+        with self._lock:
+            if airport_iata in self._airports:
+                self._airports.move_to_end(airport_iata)
+                return self._airports[airport_iata]
+
+            row = self._conn.execute(
+                'SELECT continent, country, region, lat, lon, name FROM airports WHERE iata = ?',
+                (airport_iata,)).fetchone()
+            detail = tuple(row) if row else None
+
+            self._airports[airport_iata] = detail
+            if len(self._airports) > self.hot_cache_size:
+                self._airports.popitem(last=False)
+            return detail
+
+    def airport_count(self, with_coords=False):
+        sql = 'SELECT COUNT(*) FROM airports'
+        if with_coords:
+            sql += ' WHERE lat IS NOT NULL AND lon IS NOT NULL'
+        return self._query(sql)[0][0]
+
+    def airport_codes(self, with_coords=False):
+        sql = 'SELECT iata FROM airports'
+        if with_coords:
+            sql += ' WHERE lat IS NOT NULL AND lon IS NOT NULL'
+        return [code for code, in self._query(sql + ' ORDER BY iata')]
+
+    def airport_rows(self):
+        """(iata, detail) of every airport, streamed without filling the hot cache"""
+        return [
+            (row[0], tuple(row[1:]))
+            for row in self._query('SELECT iata, continent, country, region, lat, lon, name FROM airports')
+        ]
+
+    def airports_where(self, kind, value):
+        """IATA codes with coordinates in a continent or country, sorted"""
+        column = {'continent': 'continent', 'country': 'country'}[kind]
+        return [code for code, in self._query(
+            f'SELECT iata FROM airports WHERE {column} = ? AND lat IS NOT NULL AND lon IS NOT NULL ORDER BY iata',
+            (value,))]
+
+    def airports_in_box(self, lat_lo, lat_hi, lon_ranges):
+        """(iata, lat, lon) in degrees within a latitude band and any of the (lon_lo, lon_hi) ranges"""
+        clauses = ' OR '.join('lon BETWEEN ? AND ?' for _ in lon_ranges)
+        params = [lat_lo, lat_hi] + [bound for lon_range in lon_ranges for bound in lon_range]
+        return self._query(
+            f'SELECT iata, lat, lon FROM airports WHERE lat BETWEEN ? AND ? AND ({clauses})', params)
+
+    def zone_members(self, zone_system_name, zone_name):
+        """IATA codes with coordinates in a zone, sorted"""
+        return [code for code, in self._query(
+            'SELECT z.iata FROM zone_members z JOIN airports a ON a.iata = z.iata '
+            'WHERE z.zone_system = ? AND z.zone = ? AND a.lat IS NOT NULL AND a.lon IS NOT NULL '
+            'ORDER BY z.iata', (zone_system_name, zone_name))]
+
+    # ---------- Carriers, partnerships, charts ----------
+
+    def carriers(self):
+        """[(code, name, country, alliance)] sorted by code"""
+        return self._query('SELECT code, name, country, alliance FROM carriers ORDER BY code')
+
+    def partners(self, relationship):
+        """{ffp: frozenset(carriers)} for 'redeem' or 'earn', self carriers excluded"""
+        partners = {}
+        for ffp_code, carrier in self._query(
+                'SELECT ffp, carrier FROM partnerships WHERE relationship = ?', (relationship,)):
+            partners.setdefault(ffp_code, set()).add(carrier)
+        return {ffp_code: frozenset(carriers) for ffp_code, carriers in partners.items()}
+
+    def chart_entries(self, chart_name, cabin=None):
+        """[(cabin, kind, a, b, miles)] of one chart; band bounds come back as strings"""
+        if cabin is None:
+            return self._query('SELECT cabin, kind, a, b, miles FROM chart_entries WHERE chart = ?', (chart_name,))
+        return self._query(
+            'SELECT cabin, kind, a, b, miles FROM chart_entries WHERE chart = ? AND cabin = ?', (chart_name, cabin))
+
+
+# ==================== ENGINE BACKEND ====================
+
+class StoreAirports(Mapping):
+    """IATA -> airport detail tuple, read from a DataStore on demand"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, airport_iata):
+        detail = self.store.airport(airport_iata)
+        if detail is None:
+            raise KeyError(airport_iata)
+        return detail
+
+    def get(self, airport_iata, default=None):
+        detail = self.store.airport(airport_iata)
+        return default if detail is None else detail
+
+    def __contains__(self, airport_iata):
+        return self.store.airport(airport_iata) is not None
+
+    def __iter__(self):
+        return iter(self.store.airport_codes())
+
+    def __len__(self):
+        return self.store.airport_count()
+
+    def items(self):
+        return self.store.airport_rows()
+
+
+class StoreCoords(Mapping):
+    """IATA -> (lat, lon, cos(lat)) in radians, for airports with coordinates"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, airport_iata):
+        detail = self.store.airport(airport_iata)
+        if detail is None or detail[3] is None or detail[4] is None:
+            raise KeyError(airport_iata)
+        lat = math.radians(detail[3])
+        return (lat, math.radians(detail[4]), math.cos(lat))
+
+    def __contains__(self, airport_iata):
+        detail = self.store.airport(airport_iata)
+        return detail is not None and detail[3] is not None and detail[4] is not None
+
+    def __iter__(self):
+        return iter(self.store.airport_codes(with_coords=True))
+
+    def __len__(self):
+        return self.store.airport_count(with_coords=True)
+
+
+class StoreSpatialIndex:
+    """airport_index.SpatialIndex.within() as an indexed bounding-box query"""
+
+    def __init__(self, store, coords, earth_radius_miles):
+        self.store = store
+        self.coords = coords
+        self.earth_radius_miles = earth_radius_miles
+
+    def within(self, airport_iata, radius_miles):
+        """(distance, IATA) of other airports within radius_miles, nearest first"""
+        lat1, lon1, cos1 = self.coords[airport_iata]
+        lat_deg = math.degrees(lat1)
+        lon_deg = math.degrees(lon1)
+
+        dlat = (radius_miles + BOX_PADDING_MILES) / MILES_PER_DEGREE
+        lat_lo = max(-90.0, lat_deg - dlat)
+        lat_hi = min(90.0, lat_deg + dlat)
+
+        # Longitude span widens towards the poles; near them take every longitude
+        widest = max(abs(lat_lo), abs(lat_hi))
+        if widest >= 89.0 or dlat / math.cos(math.radians(widest)) >= 180:
+            lon_ranges = [(-180.0, 180.0)]
+        else:
+            dlon = dlat / math.cos(math.radians(widest))
+            lon_lo, lon_hi = lon_deg - dlon, lon_deg + dlon
+            lon_ranges = [(max(lon_lo, -180.0), min(lon_hi, 180.0))]
+            # Wrap across the antimeridian
+            if lon_lo < -180.0:
+                lon_ranges.append((lon_lo + 360.0, 180.0))
+            if lon_hi > 180.0:
+                lon_ranges.append((-180.0, lon_hi - 360.0))
+
+        sin = math.sin
+        asin = math.asin
+        sqrt = math.sqrt
+        found = []
+
+        for code, lat2, lon2 in self.store.airports_in_box(lat_lo, lat_hi, lon_ranges):
+            if code == airport_iata:
+                continue
+            lat2 = math.radians(lat2)
+            lon2 = math.radians(lon2)
+            a = sin((lat2 - lat1) / 2) ** 2 + cos1 * math.cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+            distance = round(self.earth_radius_miles * 2 * asin(sqrt(a)))
+            if distance <= radius_miles:
+                found.append((distance, code))
+
+        found.sort()
+        return found
+
+
+class StorePricingEngine(PricingEngine):
+    """PricingEngine whose airport data is queried from a DataStore on demand"""
+
+    __slots__ = ('store',)
+
+    def __init__(self, store):
+        award_chart_dict = store.document('award_charts')
+        ffp_dict = store.document('ffps')
+        stored_partners = store.partners('redeem')
+        redeem_partners = {ffp_code: stored_partners.get(ffp_code, frozenset()) for ffp_code in ffp_dict}
+
+        alliance_members = {
+            alliance['code']: frozenset(alliance.get('members', []))
+            for alliance in store.document('alliances')
+        }
+
+        # Same shape as gui.App.prepare_tab1_data builds
+        ffp_dict_redeem = {}
+        for ffp_code, value in ffp_dict.items():
+            ffp_dict_redeem[ffp_code] = {k: v for k, v in value.items() if k in ('name', 'carriers')}
+            if redeem_partners.get(ffp_code):
+                ffp_dict_redeem[ffp_code]['redeem_partner'] = redeem_partners[ffp_code]
+
+        zone_systems = compile_zone_systems(store.document('zone_systems'))
+        coords = StoreCoords(store)
+
+        frozen = dict(
+            store=store,
+            airports=StoreAirports(store),
+            ffp_dict_redeem=ffp_dict_redeem,
+            award_chart_dict=award_chart_dict,
+            zone_systems=zone_systems,
+            award_charts=compile_award_charts(award_chart_dict),
+            chart_selection=compile_chart_selection(ffp_dict_redeem, award_chart_dict),
+            multiseg_rules=compile_multiseg_rules(
+                store.document('multiseg_rules'), award_chart_dict, ffp_dict, redeem_partners, alliance_members),
+            multipart_charts=multipart_chart_names(award_chart_dict),
+            coords=coords,
+            spatial=StoreSpatialIndex(store, coords, EARTH_RADIUS_MILES),
+        )
+        for name, value in frozen.items():
+            object.__setattr__(self, name, value)
+
+    def match_destinations(self, kind, value, exclude=None):
+        """PricingEngine.match_destinations through the store's indexes"""
+        if kind in ('continent', 'country'):
+            matches = self.store.airports_where(kind, value)
+        elif kind == 'zone':
+            zone_system_name, zone_name = value
+            if zone_system_name not in self.zone_systems:
+                raise ValueError(f'Unknown zone system "{zone_system_name}"')
+            matches = self.store.zone_members(zone_system_name, zone_name)
+        else:
+            raise ValueError(f'Unknown destination filter "{kind}", expected one of {", ".join(SWEEP_FILTERS)}')
+
+        return [code for code in matches if code != exclude]
+
+
+def open_store_engine(path, hot_cache_size=HOT_CACHE_SIZE):
+    """StorePricingEngine over the store file at path"""
+    return StorePricingEngine(DataStore(path, hot_cache_size))
+
+
+def check_store(engine, store_engine, samples=200, seed=0):
+    """
+    Differences between store_engine and the in-memory engine it was built from.
+
+    Compares nearby_airports for samples random airports (at CHECK_RADII and
+    at the exact distance of a neighbour, the radius edge) and every
+    continent, country and zone match_destinations. Returns a list of
+    description strings, empty when the engines agree.
+    """
+    mismatches = []
+    rng = random.Random(seed)
+    codes = sorted(code for code in engine.coords)
+
+    for code in rng.sample(codes, min(samples, len(codes))):
+        neighbours = engine.nearby_airports(code, max(CHECK_RADII))
+        radii = list(CHECK_RADII)
+        if neighbours:
+            radii.append(rng.choice(neighbours)[0])
+        for radius in radii:
+            expected = sorted(engine.nearby_airports(code, radius))
+            got = sorted(store_engine.nearby_airports(code, radius))
+            if got != expected:
+                missing = sorted(set(expected) - set(got))
+                extra = sorted(set(got) - set(expected))
+                mismatches.append(f'nearby_airports({code!r}, {radius}): missing {missing}, extra {extra}')
+
+    details = list(engine.airports.values())
+    filters = [('continent', value) for value in sorted({d[0] for d in details if d[0]})]
+    filters += [('country', value) for value in sorted({d[1] for d in details if d[1]})]
+    for zone_system_name, zone_system in engine.zone_systems.items():
+        filters += [('zone', (zone_system_name, zone_name)) for zone_name, _ in zone_system.zones]
+
+    for kind, value in filters:
+        expected = sorted(engine.match_destinations(kind, value))
+        got = sorted(store_engine.match_destinations(kind, value))
+        if got != expected:
+            mismatches.append(f'match_destinations({kind!r}, {value!r}): '
+                              f'missing {sorted(set(expected) - set(got))}, extra {sorted(set(got) - set(expected))}')
+
+    return mismatches
+
+
+def main(argv=None):
+    from snapshot import load_snapshot
+
+    parser = argparse.ArgumentParser(description='Import a data directory into an indexed SQLite data store.')
+    parser.add_argument('--data-dir', default=None, help='data directory (default: assets/data)')
+    parser.add_argument('--output', default='ffp_data.sqlite', help='store file to write (replaced)')
+    parser.add_argument('--check', type=int, default=0, metavar='N',
+                        help='compare lookups on N random airports against the JSON data')
+    args = parser.parse_args(argv)
+
+    snapshot = load_snapshot(args.data_dir) if args.data_dir else load_snapshot()
+    build_store(snapshot, args.output)
+
+    store = DataStore(args.output)
+    print(f'✓ Wrote {store.airport_count()} airports, {len(store.carriers())} carriers and '
+          f'{len(snapshot.engine.award_charts)} charts to {args.output} (data version {store.data_version[:12]})')
+    store.close()
+
+    if args.check:
+        store_engine = open_store_engine(args.output)
+        mismatches = check_store(snapshot.engine, store_engine, args.check)
+        store_engine.store.close()
+        for mismatch in mismatches:
+            print(f'  ! {mismatch}')
+        if mismatches:
+            print(f'ERROR: {len(mismatches)} store lookups differ from the JSON data')
+            return 1
+        print(f'✓ Store lookups match the JSON data ({args.check} airports checked)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
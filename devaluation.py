@@ -0,0 +1,211 @@
+"""
+devaluation.py: Award price diff between two data versions
+
+Loads two data directories, compiles each into a price table keyed by
+(FFP, carrier, cabin, zone pair / distance band / domestic country) and diffs
+the tables directly, so a release's devaluations show up without re-pricing
+any airport pair:
+
+    python devaluation.py old_data/ assets/data --output devaluation.csv
+
+Carriers come from each version's chart selection, so partners.json changes
+(a carrier moving to another chart, or losing its partner chart) show up as
+well as award_charts.json price changes. Distance bands are cut on the union
+of both versions' band edges first, so moving an edge shows up as the price
+change of the distances it moved, not as a removed and an added band.
+"""
+
+import argparse
+import csv
+import sys
+
+from charts import TABLE_BAND, DynamicChart
+from snapshot import load_snapshot
+
+# 'now_dynamic': the entry is gone because the carrier moved to dynamic pricing
+CHANGE_KINDS = ('more_expensive', 'now_dynamic', 'cheaper', 'removed', 'added')
+
+REPORT_COLUMNS = ['change', 'ffp', 'carrier', 'cabin', 'kind', 'zone_system', 'from', 'to',
+                  'old_miles', 'new_miles', 'change_pct', 'old_chart', 'new_chart']
+
+
+def _selection_charts(selection):
+    """Charts a carrier can be priced on, in selection priority order"""
+    if selection.chart is not None:
+        return [selection.chart]
+
+    if selection.error or selection.warning:
+        return []
+
+    charts = [chart_name for _, _, chart_name in selection.steps]
+    if selection.fallback is not None:
+        charts.append(selection.fallback)
+    return list(dict.fromkeys(charts))
+
+
+def price_table(snapshot):
+    """
+    {(ffp, carrier, cabin, kind, zone_system, a, b): (miles, chart_name)}
+
+    When several charts of one carrier list the same entry, the one chart
+    selection would try first wins.
+    """
+    engine = snapshot.engine
+    chart_entries = {name: list(chart.entries()) for name, chart in engine.award_charts.items()}
+
+    table = {}
+    for ffp_code, by_carrier in engine.chart_selection.items():
+        for carrier, selection in by_carrier.items():
+            for chart_name in _selection_charts(selection):
+                zone_system = engine.award_charts[chart_name].zone_system
+                for cabin, kind, a, b, miles in chart_entries[chart_name]:
+                    key = (ffp_code, carrier, cabin, kind, zone_system, a, b)
+                    table.setdefault(key, (miles, chart_name))
+
+    return table
+
+
+def _covering_band(bands, lo, hi):
+    """First (a, b, (miles, chart)) band covering lo..hi, or None"""
+    for band in bands:
+        if band[0] <= lo and hi <= band[1]:
+            return band
+    return None
+
+
+def split_bands(old_table, new_table):
+    """
+    Both price tables with their distance bands cut on the union of the two
+    versions' band edges, per (ffp, carrier, cabin, zone system)
+
+    Each piece is priced by the first band of its table covering it; adjacent
+    pieces of the same band in both versions are joined again.
+    """
+    old_split, new_split, bands = {}, {}, {}
+    for index, (table, split) in enumerate(((old_table, old_split), (new_table, new_split))):
+        for key, value in table.items():
+            if key[3] == TABLE_BAND:
+                bands.setdefault(key[:5], ([], []))[index].append((key[5], key[6], value))
+            else:
+                split[key] = value
+
+    for group, (old_bands, new_bands) in bands.items():
+        edges = sorted({a for a, _, _ in old_bands + new_bands} | {b + 1 for _, b, _ in old_bands + new_bands})
+        run = None  # [lo, hi, old band, new band]
+        pieces = []
+        for lo, next_lo in zip(edges, edges[1:]):
+            hi = next_lo - 1
+            old = _covering_band(old_bands, lo, hi)
+            new = _covering_band(new_bands, lo, hi)
+            if run is not None and run[1] + 1 == lo and run[2:] == [old, new]:
+                run[1] = hi
+            else:
+                run = [lo, hi, old, new]
+                pieces.append(run)
+
+        for lo, hi, old, new in pieces:
+            if old is not None:
+                old_split[group + (lo, hi)] = old[2]
+            if new is not None:
+                new_split[group + (lo, hi)] = new[2]
+
+    return old_split, new_split
+
+
+def dynamic_carriers(snapshot):
+    """{(ffp, carrier): dynamic chart name} for carriers that can be priced dynamically"""
+    engine = snapshot.engine
+    dynamic = {}
+
+    for ffp_code, by_carrier in engine.chart_selection.items():
+        for carrier, selection in by_carrier.items():
+            for chart_name in _selection_charts(selection):
+                if isinstance(engine.award_charts[chart_name], DynamicChart):
+                    dynamic.setdefault((ffp_code, carrier), chart_name)
+
+    return dynamic
+
+
+def diff_tables(old_table, new_table, new_dynamic=None):
+    """
+    Rows (change, key, old (miles, chart) or None, new (miles, chart) or None),
+    biggest increase first. Pass dynamic_carriers() of the new version to tell
+    entries lost to dynamic pricing from plain removals.
+    """
+    new_dynamic = new_dynamic or {}
+    rows = []
+
+    for key, old in old_table.items():
+        new = new_table.get(key)
+        if new is None:
+            dynamic_chart = new_dynamic.get(key[:2])
+            if dynamic_chart is not None:
+                rows.append(('now_dynamic', key, old, (None, dynamic_chart)))
+            else:
+                rows.append(('removed', key, old, None))
+        elif new[0] > old[0]:
+            rows.append(('more_expensive', key, old, new))
+        elif new[0] < old[0]:
+            rows.append(('cheaper', key, old, new))
+
+    for key, new in new_table.items():
+        if key not in old_table:
+            rows.append(('added', key, None, new))
+
+    def _order(row):
+        change, key, old, new = row
+        pct = (new[0] - old[0]) / old[0] if old and new and new[0] is not None and old[0] else 0
+        return (CHANGE_KINDS.index(change), -pct, tuple(str(part) for part in key))
+
+    rows.sort(key=_order)
+    return rows
+
+
+def write_report(fileobj, rows):
+    """Write diff rows as CSV"""
+    writer = csv.writer(fileobj)
+    writer.writerow(REPORT_COLUMNS)
+
+    for change, (ffp_code, carrier, cabin, kind, zone_system, a, b), old, new in rows:
+        pct = ''
+        if old and new and new[0] is not None and old[0]:
+            pct = f'{(new[0] - old[0]) / old[0] * 100:+.1f}'
+
+        writer.writerow([change, ffp_code, carrier, cabin, kind, zone_system or '',
+                         '' if a is None else a, '' if b is None else b,
+                         old[0] if old else '', new[0] if new and new[0] is not None else '', pct,
+                         old[1] if old else '', new[1] if new else ''])
+
+
+def summarize(rows):
+    """{ffp: {change: count}}"""
+    summary = {}
+    for change, key, _, _ in rows:
+        counts = summary.setdefault(key[0], dict.fromkeys(CHANGE_KINDS, 0))
+        counts[change] += 1
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report award price changes between two data directories.')
+    parser.add_argument('old_dir', help='data directory of the previous release')
+    parser.add_argument('new_dir', help='data directory of the new release')
+    parser.add_argument('--output', default='devaluation.csv', help='CSV report path')
+    args = parser.parse_args(argv)
+
+    new_snapshot = load_snapshot(args.new_dir)
+    old_table, new_table = split_bands(price_table(load_snapshot(args.old_dir)), price_table(new_snapshot))
+    rows = diff_tables(old_table, new_table, dynamic_carriers(new_snapshot))
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        write_report(f, rows)
+
+    print(f'✓ Compared {len(old_table)} / {len(new_table)} price entries, {len(rows)} changed')
+    for ffp_code, counts in sorted(summarize(rows).items()):
+        print(f'{ffp_code:<4}' + '  '.join(f'{change} {counts[change]}' for change in CHANGE_KINDS))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,628 @@
+"""
+engine.py: Award pricing engine
+
+PricingEngine is an immutable snapshot of the prepared data (airports, FFPs,
+compiled charts, chart selection, zone systems, multi-segment rules). Built
+once per data load in gui.py and handed to Tab2; queries never modify it and
+return new results.PriceResult objects, so one engine can serve concurrent
+queries from a thread pool.
+
+The only state touched while querying is the zones.ZoneSystem airport memo,
+a pure read-through cache: racing threads compute and store the same value.
+"""
+
+import csv
+import math
+from types import MappingProxyType
+
+from airport_index import SpatialIndex
+from results import PriceResult, PriceStatus
+
+# Cabins in display order, lowest first
+CABINS = ('economy', 'premium_economy', 'business', 'first')
+
+# Destination filter kinds for sweep_destinations
+SWEEP_FILTERS = ('continent', 'country', 'zone')
+
+# Alternatives per endpoint priced by search_nearby, nearest first
+NEARBY_MAX_ALTERNATIVES = 8
+
+EARTH_RADIUS_MILES = 3959
+
+
+def multipart_chart_names(award_chart_dict):
+    """FFP -> its multi-partner chart (first one listed)"""
+    multipart_charts = {}
+    for name, value in award_chart_dict.items():
+        if value.get('applies_to_multiple'):
+            multipart_charts.setdefault(value.get('ffp_code'), name)
+    return multipart_charts
+
+
+class PricingEngine:
+    """Read-only pricing engine over one prepared data snapshot"""
+
+    __slots__ = ('airports', 'ffp_dict_redeem', 'award_chart_dict', 'zone_systems', 'award_charts',
+                 'chart_selection', 'multiseg_rules', 'multipart_charts', 'coords', 'spatial')
+
+    def __init__(self, airports_list, ffp_dict_redeem, award_chart_dict, zone_systems, award_charts,
+                 chart_selection, multiseg_rules):
+        # IATA -> (continent, country, region, lat, lon, name); first entry wins
+        airports = {}
+        for airport in airports_list:
+            airports.setdefault(airport.get('iata_code'), (
+                airport.get('continent'),
+                airport.get('iso_country'),
+                airport.get('iso_region'),
+                airport.get('latitude_deg'),
+                airport.get('longitude_deg'),
+                airport.get('name'),
+            ))
+
+        # IATA -> (lat, lon, cos(lat)) in radians, for batch distances
+        coords = {}
+        for code, detail in airports.items():
+            lat, lon = detail[3], detail[4]
+            if lat is not None and lon is not None:
+                lat = math.radians(lat)
+                coords[code] = (lat, math.radians(lon), math.cos(lat))
+
+        multipart_charts = multipart_chart_names(award_chart_dict)
+
+        frozen = dict(
+            airports=MappingProxyType(airports),
+            ffp_dict_redeem=MappingProxyType(ffp_dict_redeem),
+            award_chart_dict=MappingProxyType(award_chart_dict),
+            zone_systems=MappingProxyType(zone_systems),
+            award_charts=MappingProxyType(award_charts),
+            chart_selection=MappingProxyType(chart_selection),
+            multiseg_rules=multiseg_rules,
+            multipart_charts=MappingProxyType(multipart_charts),
+            coords=MappingProxyType(coords),
+            spatial=SpatialIndex(MappingProxyType(coords), EARTH_RADIUS_MILES),
+        )
+        for name, value in frozen.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PricingEngine is immutable; build a new one from reloaded data')
+
+    # ==================== PUBLIC QUERY API ====================
+
+    def airport_detail(self, airport_iata):
+        """(continent, country, region, lat, lon, name) of an airport"""
+        return self._getAirportDetail(airport_iata)
+
+    def zone_of(self, airport_iata, zone_system_name):
+        """Zone of an airport in the named zone system, or None"""
+        return self._getAirportZone(airport_iata, zone_system_name)
+
+    def distance(self, orig, dest):
+        """Great-circle distance in miles between two airports"""
+        return self._calculateGcdistance(orig, dest)
+
+    def distances_from(self, orig, dests):
+        """Great-circle distances from orig to each of dests, in one batch"""
+        lat1, lon1, cos1 = self.coords[orig]
+        coords = self.coords
+        sin = math.sin
+        asin = math.asin
+        sqrt = math.sqrt
+
+        distances = []
+        for dest in dests:
+            lat2, lon2, cos2 = coords[dest]
+            a = sin((lat2 - lat1) / 2) ** 2 + cos1 * cos2 * sin((lon2 - lon1) / 2) ** 2
+            distances.append(round(EARTH_RADIUS_MILES * 2 * asin(sqrt(a))))
+
+        return distances
+
+    def nearby_airports(self, airport_iata, radius_miles):
+        """(distance, IATA) of other airports within radius_miles, nearest first"""
+        self._getAirportDetail(airport_iata)
+        if airport_iata not in self.coords:
+            return []
+        return self.spatial.within(airport_iata, radius_miles)
+
+    def match_destinations(self, kind, value, exclude=None):
+        """
+        Sorted IATA codes of airports in a continent, country or zone.
+
+        For kind 'zone', value is (zone_system_name, zone_name). Airports
+        without coordinates are skipped since they cannot be priced.
+        """
+        if kind == 'continent':
+            matches = [code for code, detail in self.airports.items() if detail[0] == value]
+        elif kind == 'country':
+            matches = [code for code, detail in self.airports.items() if detail[1] == value]
+        elif kind == 'zone':
+            zone_system_name, zone_name = value
+            if zone_system_name not in self.zone_systems:
+                raise ValueError(f'Unknown zone system "{zone_system_name}"')
+            zone_system = self.zone_systems[zone_system_name]
+            matches = [code for code in self.airports if self._fitAirportWithZone(code, zone_system) == zone_name]
+        else:
+            raise ValueError(f'Unknown destination filter "{kind}", expected one of {", ".join(SWEEP_FILTERS)}')
+
+        return sorted(code for code in matches if code and code != exclude and code in self.coords)
+
+    def find_charts(self, orig, dest, distance, carrier, ffp_dict=None):
+        """Unpriced PriceResult per FFP that can redeem this carrier on this route"""
+        return self._findChart_SingleSeg(orig, dest, distance, carrier, ffp_dict)
+
+    def price_chart(self, result, orig, dest, cabin, distance):
+        """New PriceResult with the chart of `result` priced for this segment"""
+        return self._findPrice_SingleSeg(result, orig, dest, cabin, distance)
+
+    def search_segment(self, orig, dest, carrier, cabin, distance):
+        """All FFP prices for one segment"""
+        return [
+            self._findPrice_SingleSeg(chart, orig, dest, cabin, distance)
+            for chart in self._findChart_SingleSeg(orig, dest, distance, carrier)
+        ]
+
+    def search_all_cabins(self, orig, dest, carrier, distance, cabins=CABINS):
+        """
+        Program x cabin price grid for one segment.
+
+        Returns one tuple of PriceResult (one per cabin, in `cabins` order) per
+        FFP. Chart selection and route location run once; only the final
+        band/zone lookup is repeated per cabin.
+        """
+        grid = []
+
+        for chart in self._findChart_SingleSeg(orig, dest, distance, carrier):
+            compiled = self.award_charts[chart.chart_name]
+            orig_loc, dest_loc = self._locateRoute(compiled, orig, dest)
+            grid.append(tuple(
+                chart.priced(compiled.price(cabin, orig_loc, dest_loc, distance))
+                for cabin in cabins
+            ))
+
+        return grid
+
+    def search_any_carrier(self, orig, dest, cabin, distance):
+        """
+        Every carrier x FFP price for one segment, ranked by miles.
+
+        Returns a list of (carrier, PriceResult). Each chart is located and
+        priced once per call however many carriers select it.
+        """
+        quotes = {}
+        ranked = []
+
+        for ffp_code, by_carrier in self.chart_selection.items():
+            ffp_name = self.ffp_dict_redeem[ffp_code].get('name')
+
+            for carrier, selection in by_carrier.items():
+                try:
+                    chart_name = selection.choose(orig, dest, self._getAirportZone, self._getAirportCountry)
+                except ValueError as e:
+                    # One ambiguous chart set must not abort the whole sweep
+                    ranked.append((carrier, PriceResult.failed(ffp_code, ffp_name, 'N/A', PriceStatus.NO_CHART, str(e))))
+                    continue
+
+                if chart_name is None:
+                    continue
+
+                quote = quotes.get(chart_name)
+                if quote is None:
+                    quote = quotes[chart_name] = self._quoteChart(chart_name, orig, dest, cabin, distance)
+
+                ranked.append((carrier, PriceResult(ffp_code, ffp_name, chart_name, *quote)))
+
+        ranked.sort(key=lambda item: item[1].sort_key())
+        return ranked
+
+    def sweep_destinations(self, orig, carrier, cabin, kind, value):
+        """
+        Price one origin/carrier/cabin against every matching destination.
+
+        Returns (dest, distance, PriceResult) rows grouped by destination and
+        ranked by miles within each. Distances are computed in one batch and
+        the carrier's chart selections are looked up once for all destinations.
+        """
+        self._getAirportDetail(orig)
+
+        dests = self.match_destinations(kind, value, exclude=orig)
+        distances = self.distances_from(orig, dests)
+
+        selections = [
+            (ffp_code, self.ffp_dict_redeem[ffp_code].get('name'), by_carrier[carrier])
+            for ffp_code, by_carrier in self.chart_selection.items()
+            if carrier in by_carrier
+        ]
+
+        rows = []
+        for dest, distance in zip(dests, distances):
+            results = []
+
+            for ffp_code, ffp_name, selection in selections:
+                try:
+                    chart_name = selection.choose(orig, dest, self._getAirportZone, self._getAirportCountry)
+                except ValueError as e:
+                    results.append(PriceResult.failed(ffp_code, ffp_name, 'N/A', PriceStatus.NO_CHART, str(e)))
+                    continue
+
+                if chart_name is not None:
+                    quote = self._quoteChart(chart_name, orig, dest, cabin, distance)
+                    results.append(PriceResult(ffp_code, ffp_name, chart_name, *quote))
+
+            results.sort(key=PriceResult.sort_key)
+            rows.extend((dest, distance, result) for result in results)
+
+        return rows
+
+    def search_nearby(self, orig, dest, carrier, cabin, radius_miles, max_alternatives=NEARBY_MAX_ALTERNATIVES,
+                      distance=None):
+        """
+        Price one segment and its alternatives with origin and/or destination
+        swapped for an airport within radius_miles.
+
+        Returns (orig, dest, distance, PriceResult) rows over every endpoint
+        combination, ranked by miles; the original pair is included, priced at
+        distance when given (the routing flown), alternatives at great-circle
+        distance. Errors pricing the original pair are raised; alternatives
+        that fail are skipped.
+        """
+        for code in (orig, dest):
+            if code not in self.coords:
+                self._getAirportDetail(code)
+                raise ValueError(f'Airport {code} has no coordinates')
+
+        origs = [orig] + [code for _, code in self.nearby_airports(orig, radius_miles)[:max_alternatives]]
+        dests = [dest] + [code for _, code in self.nearby_airports(dest, radius_miles)[:max_alternatives]]
+
+        rows = []
+        for alt_orig in origs:
+            alt_dests = [alt_dest for alt_dest in dests if alt_dest != alt_orig]
+            for alt_dest, alt_distance in zip(alt_dests, self.distances_from(alt_orig, alt_dests)):
+                if (alt_orig, alt_dest) == (orig, dest):
+                    if distance is not None:
+                        alt_distance = distance
+                    results = self.search_segment(alt_orig, alt_dest, carrier, cabin, alt_distance)
+                else:
+                    try:
+                        results = self.search_segment(alt_orig, alt_dest, carrier, cabin, alt_distance)
+                    except ValueError:
+                        # An ambiguous chart on one alternative must not drop the others
+                        continue
+                rows.extend((alt_orig, alt_dest, alt_distance, result) for result in results)
+
+        rows.sort(key=lambda row: row[3].sort_key())
+        return rows
+
+    def price_itinerary(self, carriers, origs, dests, cabin, distances):
+        """All FFP prices for a multi-segment itinerary, or a message string"""
+        return self._multiseg_price(carriers, origs, dests, cabin, distances)
+
+    # ==================== HELPER FUNCTIONS ====================
+
+    def _getAirportDetail(self, airport_iata):
+        """Get airport details by IATA code"""
+        detail = self.airports.get(airport_iata)
+        if detail is None:
+            raise ValueError(f'Airport mismatch: {airport_iata} not found')
+        return detail
+
+    def _calculateGcdistance(self, orig, dest):
+        """Calculate great-circle distance between two airports"""
+        _, _, _, lat1, lon1, _ = self._getAirportDetail(orig)
+        _, _, _, lat2, lon2, _ = self._getAirportDetail(dest)
+
+        lat1 = math.radians(lat1)
+        lat2 = math.radians(lat2)
+        lon1 = math.radians(lon1)
+        lon2 = math.radians(lon2)
+
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+
+        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+        c = 2 * math.asin(math.sqrt(a))
+
+        earth_radius_miles = 3959
+        distance = round(earth_radius_miles * c)
+
+        return distance
+
+    def _fitAirportWithZone(self, airport_iata, zone_system):
+        """Match airport to zone based on continent/country/region/airport"""
+        return zone_system.zone_of(airport_iata, self._getAirportRegion)
+
+    def _getAirportRegion(self, airport_iata):
+        """Get (continent, country, region) for zone matching"""
+        continent, country, region, _, _, _ = self._getAirportDetail(airport_iata)
+        return continent, country, region
+
+    def _getAirportZone(self, airport_iata, zone_system_name):
+        """Zone of an airport in the named zone system, or None"""
+        return self._fitAirportWithZone(airport_iata, self.zone_systems[zone_system_name])
+
+    def _getAirportCountry(self, airport_iata):
+        """Get ISO country for domestic chart matching"""
+        _, country, _, _, _, _ = self._getAirportDetail(airport_iata)
+        return country
+
+    # ==================== FIND CHART LOGIC ====================
+
+    def _findChart_attachChart(self, ffpcode, ffpname, chartname, allchartlist):
+        """Attach an unpriced chart result to results list"""
+        allchartlist.append(PriceResult.unpriced(ffpcode, ffpname, chartname))
+        return allchartlist, True
+
+    def _findChart_SingleSeg(self, orig, dest, distance, carrier, ffp_dict=None):
+        """Find which award chart each FFP should use for this segment"""
+        chart_allffp = []
+
+        # Use provided scope or default to full list
+        search_scope = ffp_dict if ffp_dict else self.ffp_dict_redeem
+
+        for ffp_code, value in search_scope.items():
+            # Chart priority is precompiled per (FFP, carrier); only route predicates remain
+            selection = self.chart_selection.get(ffp_code, {}).get(carrier)
+            if selection is None:
+                # Carrier is not a partner with this FFP (normal case)
+                continue
+
+            chart_name = selection.choose(orig, dest, self._getAirportZone, self._getAirportCountry)
+            if chart_name is not None:
+                self._findChart_attachChart(ffp_code, value.get('name'), chart_name, chart_allffp)
+
+        return chart_allffp
+
+    # ==================== FIND PRICE LOGIC ====================
+
+    def _locateRoute(self, chart, orig_iata, dest_iata):
+        """Route endpoints in the terms the compiled chart prices on (zones, countries or None)"""
+        if chart.locator == 'zone':
+            zone_system = self.zone_systems[chart.zone_system]
+            return (self._fitAirportWithZone(orig_iata, zone_system),
+                    self._fitAirportWithZone(dest_iata, zone_system))
+
+        if chart.locator == 'country':
+            return self._getAirportCountry(orig_iata), self._getAirportCountry(dest_iata)
+
+        return None, None
+
+    def _quoteChart(self, chart_name, orig_iata, dest_iata, cabin, distance):
+        """(status, miles, message) quote of one chart for a single segment"""
+        chart = self.award_charts[chart_name]
+        orig, dest = self._locateRoute(chart, orig_iata, dest_iata)
+        return chart.price(cabin, orig, dest, distance)
+
+    def _findPrice_SingleSeg(self, result, orig_iata, dest_iata, cabin, distance):
+        """Price a chart result for a single segment, returning a new PriceResult"""
+        return result.priced(self._quoteChart(result.chart_name, orig_iata, dest_iata, cabin, distance))
+
+    # ==================== MULTI-SEGMENT HELPER FUNCTIONS ====================
+
+    def _getMultiPartChart(self, ffpname):
+        """Get multi-part chart for FFP"""
+        return self.multipart_charts.get(ffpname)
+
+    def _cumulativePricing(self, ffpname, origins, destinations, distances, carrier_eff, cabin, subchart):
+        """Calculate cumulative pricing for all segments"""
+        orig_eff = origins[0]
+        dest_eff = destinations[-1]
+        distance_eff = sum(distances)
+
+        # Create subchart dict for this FFP
+        ffp_subchart = {ffpname: subchart[ffpname]} if ffpname in subchart else {ffpname: self.ffp_dict_redeem.get(ffpname, {})}
+
+        charts = self._findChart_SingleSeg(orig_eff, dest_eff, distance_eff, carrier_eff, ffp_dict=ffp_subchart)
+
+        if charts:
+            chart = self._findPrice_SingleSeg(charts[0], orig_eff, dest_eff, cabin, distance_eff)  # since only 1 ffp is involved
+        else:
+            chart = PriceResult.failed(ffpname, subchart.get(ffpname, {}).get('name', ffpname), 'N/A',
+                                       PriceStatus.NO_CHART, 'No chart found.')
+
+        return chart
+
+    def _cumulativePricing_multipartchart(self, ffpname, origins, destinations, distances, cabin, subchart):
+        """Calculate cumulative pricing using multi-part chart"""
+        multipartchart = self._getMultiPartChart(ffpname)
+
+        chart = PriceResult.unpriced(ffpname, subchart.get(ffpname, {}).get('name', ffpname), multipartchart)
+
+        orig_eff = origins[0]
+        dest_eff = destinations[-1]
+        distance_eff = sum(distances)
+
+        return self._findPrice_SingleSeg(chart, orig_eff, dest_eff, cabin, distance_eff)
+
+    def _persegPricing(self, origins, destinations, distances, carriers, cabin, ffpname, subchart):
+        """Calculate per-segment pricing"""
+        num_seg = len(origins)
+        awardmile_tot = []
+
+        for iseg in range(num_seg):
+            orig_eff = origins[iseg]
+            dest_eff = destinations[iseg]
+            carrier_eff = carriers[iseg]
+            distance_eff = distances[iseg]
+
+            ffp_subchart = {ffpname: subchart[ffpname]} if ffpname in subchart else {ffpname: self.ffp_dict_redeem.get(ffpname, {})}
+
+            charts = self._findChart_SingleSeg(orig_eff, dest_eff, distance_eff, carrier_eff, ffp_dict=ffp_subchart)
+
+            if charts:
+                chart_seg = self._findPrice_SingleSeg(charts[0], orig_eff, dest_eff, cabin, distance_eff)  # since only 1 ffp is involved
+                awardmile_tot.append(chart_seg)
+            else:
+                awardmile_tot.append(None)
+
+        return awardmile_tot
+
+    def _handlePersegPricingReturn(self, ffpname, ffp_disp_name, awardmile_tot, skip_segments=()):
+        """Sum per-segment results (minus skipped segments) into one 'Per Segment' result"""
+        if all(item is not None and item.status is PriceStatus.OK for item in awardmile_tot):
+            miles = sum(item.miles for index, item in enumerate(awardmile_tot) if index not in skip_segments)
+            return PriceResult(ffpname, ffp_disp_name, 'Per Segment', PriceStatus.OK, miles, None)
+
+        return PriceResult.failed(ffpname, ffp_disp_name, 'Per Segment', PriceStatus.INCOMPLETE,
+                                  'Per Segment Pricing: At least price for one segment is non-int type.')
+
+    # ==================== MULTI-SEGMENT RULES ====================
+
+    def _multiseg_apply_rule(self, rule, ffpname, origs, dests, distances, carriers, carrier_eff,
+                             checked_carriers, cabin, subchart):
+        """Price one itinerary case with its compiled rule from multiseg_rules.json"""
+        ffp_disp_name = subchart[ffpname]['name']
+
+        if rule.require is not None and not all(item in rule.require for item in checked_carriers):
+            msg = rule.message.format(name=ffp_disp_name)
+            return PriceResult.failed(ffpname, ffp_disp_name, 'N/A', PriceStatus.NOT_ALLOWED, msg)
+
+        action = rule.action
+        if action == 'cumulative' and carriers[0] in rule.per_segment_carriers:
+            action = 'per_segment'
+
+        if action == 'cumulative':
+            chart = self._cumulativePricing(ffpname, origs, dests, distances, carrier_eff, cabin, subchart)
+
+        elif action == 'multipart':
+            # Multipartner chart, distance based cumulative pricing
+            chart = self._cumulativePricing_multipartchart(ffpname, origs, dests, distances, cabin, subchart)
+
+        elif action == 'per_segment':
+            result = self._persegPricing(origs, dests, distances, carriers, cabin, ffpname, subchart)
+            chart = self._handlePersegPricingReturn(ffpname, ffp_disp_name, result)
+
+        elif action == 'per_segment_skip_connections':
+            # Per segment pricing, but short connections feeding a long haul from the hub are free
+            zone_system = self.zone_systems[rule.zone_system]
+            num_seg = len(origs)
+
+            flg_existlonghaul = False
+            connectionsegment = []
+
+            for i in range(num_seg):
+                orig_zone = self._fitAirportWithZone(origs[i], zone_system)
+                dest_zone = self._fitAirportWithZone(dests[i], zone_system)
+
+                if orig_zone and dest_zone:
+                    if orig_zone in rule.connection_zones and dest_zone in rule.connection_zones:
+                        connectionsegment.append(i)
+                    elif (orig_zone in rule.hub_zones and dest_zone not in rule.connection_zones) or \
+                            (orig_zone not in rule.connection_zones and dest_zone in rule.hub_zones):
+                        flg_existlonghaul = True
+
+            result = self._persegPricing(origs, dests, distances, carriers, cabin, ffpname, subchart)
+
+            skip_segments = connectionsegment if flg_existlonghaul else ()
+            chart = self._handlePersegPricingReturn(ffpname, ffp_disp_name, result, skip_segments)
+
+        else:
+            msg = rule.message.format(name=ffp_disp_name)
+            chart = PriceResult.failed(ffpname, ffp_disp_name, 'N/A', PriceStatus.NOT_ALLOWED, msg)
+
+        return chart
+
+    def _multiseg_apply_program_rule(self, rule, ffpname, origs, dests, distances, unique_carriers, cabin, subchart):
+        """Price an itinerary for an FFP with its own program rule (QF, AC, AA)"""
+        ffp_disp_name = subchart[ffpname]['name']
+
+        if rule.rule_type == 'chart_by_carriers':
+            num_partners = sum(1 for item in unique_carriers if item not in rule.self_carriers)
+
+            for chart_name, allowed, min_partners in rule.chart_rules:
+                if num_partners >= min_partners and all(item in allowed for item in unique_carriers):
+                    chart = PriceResult.unpriced(ffpname, ffp_disp_name, chart_name)
+                    return self._findPrice_SingleSeg(chart, origs[0], dests[-1], cabin, sum(distances))
+
+            return PriceResult.failed(ffpname, ffp_disp_name, 'N/A', PriceStatus.NOT_ALLOWED, rule.message)
+
+        # dynamic_partners
+        if all(item in rule.dynamic for item in unique_carriers):
+            return PriceResult.failed(ffpname, ffp_disp_name, 'N/A', PriceStatus.DYNAMIC, rule.message)
+
+        carrier_eff = next(item for item in unique_carriers if item not in rule.dynamic)
+        return self._cumulativePricing(ffpname, origs, dests, distances, carrier_eff, cabin, subchart)
+
+    # ==================== MULTI-SEGMENT PRICE LOGIC ====================
+
+    def _multiseg_price(self, carriers, origs, dests, cabin, distances):
+        """Calculate award miles for multi-segment itinerary (rules from multiseg_rules.json)"""
+        unique_carriers = list(set(carriers))
+
+        # First, find which programs take all carriers as redeem partners
+        ffp2keep = {}
+
+        for ffpname, ffpcontent in self.ffp_dict_redeem.items():
+            ffp_self_carriers = ffpcontent['carriers']
+            ffp_redeempartners = ffpcontent.get('redeem_partner')
+
+            if ffp_redeempartners:
+                ffp_redeem = ffp_redeempartners.union(ffp_self_carriers)
+            else:
+                ffp_redeem = ffp_self_carriers
+
+            if all(item in ffp_redeem for item in unique_carriers):
+                ffp2keep[ffpname] = ffpcontent
+
+        result_list = []
+
+        if ffp2keep:
+            for ffpname, ffpcontent in ffp2keep.items():
+                subchart = {ffpname: ffpcontent}
+                ffp_self_carriers = ffpcontent['carriers']
+                ffp_redeempartners = ffpcontent.get('redeem_partner', [])
+
+                # ===== SPECIAL CASES: programs with their own rule =====
+                program_rule = self.multiseg_rules.program(ffpname)
+                if program_rule:
+                    chart = self._multiseg_apply_program_rule(
+                        program_rule, ffpname, origs, dests, distances, unique_carriers, cabin, subchart)
+                    result_list.append(chart)
+                    continue
+
+                # ===== GENERAL CASES: classification =====
+                is_self_involved = any(c in ffp_self_carriers for c in unique_carriers)
+
+                checked_carriers = unique_carriers
+                carrier_eff = carriers[0]
+
+                if all(c in ffp_self_carriers for c in unique_carriers):
+                    # Transfer involving only self as carrier
+                    case = 'self_only'
+                elif len(unique_carriers) == 1:
+                    # Transfer involving only one partner as carrier
+                    case = 'single_partner'
+                elif is_self_involved:
+                    # Transfer involving self and one partner as carrier: price on the partner
+                    case = 'self_and_partner'
+                    if unique_carriers[0] in ffp_self_carriers:
+                        carrier_eff = unique_carriers[1]
+                    else:
+                        carrier_eff = unique_carriers[0]
+                    checked_carriers = [carrier_eff]
+                else:
+                    # Transfer involving more than one partner as carrier
+                    case = 'multi_partner'
+
+                rule = self.multiseg_rules.rule(case, ffpname)
+                chart = self._multiseg_apply_rule(rule, ffpname, origs, dests, distances, carriers,
+                                                  carrier_eff, checked_carriers, cabin, subchart)
+                result_list.append(chart)
+
+        else:
+            # No FFP can redeem those carriers together
+            result_list = 'No FFP can be used for this carriers combination.'
+
+        return result_list
+
+
+def write_sweep_csv(fileobj, engine, orig, carrier, cabin, rows):
+    """Write sweep_destinations() rows as CSV, one line per destination x program"""
+    writer = csv.writer(fileobj)
+    writer.writerow(['origin', 'destination', 'destination_name', 'country', 'carrier', 'cabin', 'distance',
+                     'ffp', 'program', 'chart', 'status', 'miles', 'message'])
+
+    for dest, distance, result in rows:
+        _, country, _, _, _, name = engine.airport_detail(dest)
+        writer.writerow([orig, dest, name, country, carrier, cabin, distance,
+                         result.ffp, result.ffp_disp_name, result.chart_name, result.status.value,
+                         '' if result.miles is None else result.miles,
+                         '' if result.message is None else result.message])
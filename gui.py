@@ -11,6 +11,10 @@ import os
 
 import json
 
+import time
+
+import hashlib
+
 import tkinter as tk
 
 from tkinter import ttk, messagebox
@@ -23,12 +27,32 @@ from tab3 import Tab3Frame
 
 from tab4_simp import Tab4Frame
 
+from airport_index import AirportIndex, AirportTextIndex, TrigramIndex
+
+from zones import compile_zone_systems, count_unique_zones
+
+from charts import compile_award_charts, compile_chart_selection, count_route_dependent, selection_warnings
+
+from engine import PricingEngine
+
+from multiseg_rules import compile_multiseg_rules
+
+from accrual import compile_accrual_rules
+
+from search_context import SearchContext
+
+from result_cache import CachedEngine, ResultCache, data_version
+
 BASEDIR = os.path.dirname(__file__)
 
 ASSETSDIR = os.path.join(BASEDIR, 'assets')
 
 JSONDIR = os.path.join(ASSETSDIR, 'data')
 
+# Optional on-disk pricing result cache: set FFP_RESULT_CACHE to a SQLite file path
+
+RESULT_CACHE_FILE = os.environ.get('FFP_RESULT_CACHE')
+
 class App(tk.Tk):
 
 	"""Main application class with centralized data loading"""
@@ -49,21 +73,7 @@ class App(tk.Tk):
 
 		# Initialize search context for tab communication
 
-		self.search_context = {
-
-			'carrier_code': None,
-
-			'origin': None,
-
-			'destination': None,
-
-			'distance': None,
-
-			'cabin': None,
-
-			'results': None
-
-		}
+		self.search_context = SearchContext()
 
 		print('=' * 70)
 
@@ -79,12 +89,16 @@ class App(tk.Tk):
 
 			self.validate_data()
 
+			self.prepare_partnerships()
+
 			self.prepare_tab1_data()
 
 			self.prepare_tab2_data()
 
 			self.prepare_tab4_data()
 
+			self.open_result_cache()
+
 			self.setup_ui()
 
 		except Exception as e:
@@ -125,28 +139,38 @@ class App(tk.Tk):
 
 			'zonesystems': 'zone_systems.json',
 
+			'multisegrules': 'multiseg_rules.json',
+
 			'valuations': 'valuations.json',
 
 			'airports': 'airports_filtered.json',
 
 			'countries': 'countries.json',
 
+			'accrualrules': 'accrual_rules.json',
+
 		}
 
-		# Load each file
+		# Load each file, keeping a content digest so compiled data can be reused when unchanged
+
+		self.data_digests = {}
 
 		for attr_name, filename in json_files.items():
 
-			filepath = os.path.join(self.JSONDIR, filename)
+			filepath = self.data_file_path(filename)
 
 			try:
 
-				with open(filepath, 'r', encoding='utf-8') as f:
+				with open(filepath, 'rb') as f:
 
-					data = json.load(f)
+					raw = f.read()
+
+					data = json.loads(raw.decode('utf-8'))
 
 					setattr(self, attr_name, data)
 
+					self.data_digests[attr_name] = hashlib.sha1(raw).hexdigest()
+
 					print(f'✓ Loaded {filename}')
 
 			except FileNotFoundError:
@@ -157,6 +181,12 @@ class App(tk.Tk):
 
 				raise ValueError(f'Invalid JSON in {filename}: {str(e)}')
 
+	def data_file_path(self, filename):
+
+		"""Path of a data file in the data directory"""
+
+		return os.path.join(self.JSONDIR, filename)
+
 	def validate_data(self):
 
 		"""Validate loaded data for consistency and structure"""
@@ -195,10 +225,18 @@ class App(tk.Tk):
 
 				raise ValueError('zone_systems.json must contain "shared_groups" key')
 
+			if 'cases' not in self.multisegrules:
+
+				raise ValueError('multiseg_rules.json must contain "cases" key')
+
 			if not isinstance(self.countries, list):
 
 				raise ValueError('countries.json must be a list of {code,name} objects')
 
+			if not isinstance(self.accrualrules, dict):
+
+				raise ValueError('accrual_rules.json must be a dictionary of FFP -> carrier -> cabin rules')
+
 			# Validate airports structure
 
 			if not isinstance(self.airports, list):
@@ -275,11 +313,13 @@ class App(tk.Tk):
 
 			raise ValueError(f'Data validation failed: {str(e)}')
 
-	def prepare_tab1_data(self):
+	def prepare_partnerships(self):
 
-		"""Prepare Tab1-specific data structures at startup"""
+		"""Compile carriers, alliances and partnerships into one shared graph at startup"""
 
-		print('\nPreparing Tab1 data...')
+		print('\nCompiling partnership graph...')
+
+		start = time.perf_counter()
 
 		try:
 
@@ -291,241 +331,245 @@ class App(tk.Tk):
 
 			partners_list = self.partners['programs']
 
-			countries_list = self.countries
+			# Alliance code -> member set
 
-			# Extract alliance members
+			alliance_members = {
 
-			OW_member = alliance_list[0].get('members')
+				alliance['code']: frozenset(alliance.get('members', []))
 
-			SA_member = alliance_list[1].get('members')
+				for alliance in alliance_list
 
-			ST_member = alliance_list[2].get('members')
+			}
 
-			carriers_alliance = ['StarAlliance', 'OneWorld', 'SkyTeam', 'None']
+			# Carrier -> alliance label (later entries win, so Star Alliance takes precedence)
 
-			# Build carrierlist_tab1 and carriers_country_tab1
+			carrier_alliance = {}
 
-			carrierlist_tab1 = []
+			for alliance_code, alliance_label in [('ST', 'SkyTeam'), ('OW', 'OneWorld'), ('SA', 'StarAlliance')]:
 
-			carriers_country_tab1 = []
+				for member in alliance_members.get(alliance_code, ()):
 
-			for carrier in carriers_list:
+					carrier_alliance[member] = alliance_label
 
-				carrier_code = carrier['code']
+			country_names = {c['code']: c['name'] for c in self.countries}
 
-				carrier_name = carrier['name']
+			# Build carrier display tables in one pass
 
-				carrier_displayName = carrier_code + ' - ' + carrier_name
+			carrierlist_tab1 = []
 
-				carrier_country = carrier['country']
+			carriers_disp = []
 
-				matched_country = [c for c in countries_list if c['code'] == carrier_country]
+			carriers_country = set()
 
-				if not matched_country:
+			for carrier in carriers_list:
 
-					raise ValueError(f'Unknown country code "{carrier_country}" in carriers.json')
+				carrier_displayName = carrier['code'] + ' - ' + carrier['name']
 
-				carrier_displayCountry = matched_country[0]['code'] + ' - ' + matched_country[0]['name']
+				carrier_country = carrier['country']
 
-				if carrier_displayCountry not in carriers_country_tab1:
+				if carrier_country not in country_names:
 
-					carriers_country_tab1.append(carrier_displayCountry)
+					raise ValueError(f'Unknown country code "{carrier_country}" in carriers.json')
 
-				# Determine alliance
+				carrier_displayCountry = carrier_country + ' - ' + country_names[carrier_country]
 
-				if carrier_code in SA_member:
+				carriers_country.add(carrier_displayCountry)
 
-					carrier_alliance = carriers_alliance[0]
+				carriers_disp.append(carrier_displayName)
 
-				elif carrier_code in OW_member:
+				carrierlist_tab1.append({
 
-					carrier_alliance = carriers_alliance[1]
+					'name': carrier_displayName,
 
-				elif carrier_code in ST_member:
+					'country': carrier_displayCountry,
 
-					carrier_alliance = carriers_alliance[2]
+					'alliance': carrier_alliance.get(carrier['code'], 'None')
 
-				else:
+				})
 
-					carrier_alliance = carriers_alliance[3]
+			# Expand every partnership once, feeding both redeem and earn directions
 
-				carrier_dict = {
+			redeem_partners = {ffp_name: set() for ffp_name in ffp_dict}
 
-					'name': carrier_displayName,
+			earn_partners = {ffp_name: set() for ffp_name in ffp_dict}
 
-					'country': carrier_displayCountry,
+			for partnership in partners_list:
 
-					'alliance': carrier_alliance
+				ffp_name = partnership['ffp']
 
-				}
+				if ffp_name not in ffp_dict:
 
-				carrierlist_tab1.append(carrier_dict)
+					continue
 
-			carriers_country_tab1 = sorted(carriers_country_tab1)
+				if partnership.get('type') == 'alliance':
 
-			# Build ffp_dict_redeem
+					alliance_name = partnership.get('alliance')
 
-			keep = {'name', 'carriers'}
+					if alliance_name not in alliance_members:
 
-			ffp_dict_redeem = {
+						raise ValueError(f'Unrecognized alliance "{alliance_name}" in partnership definition')
 
-				name: {k: v for k, v in value.items() if k in keep}
+					members = alliance_members[alliance_name]
 
-				for name, value in ffp_dict.items()
+				elif partnership.get('type') == 'individual':
 
-			}
+					members = partnership.get('carriers')
 
-			for ffp_name, ffp_value in ffp_dict_redeem.items():
+				else:
 
-				ffp_self_carriers = ffp_value['carriers']
+					raise ValueError(f'Unknown partnership relationship in partnership definition')
 
-				partner_carrier = []
+				relationship = partnership.get('relationship')
 
-				for partnership in partners_list:
+				if relationship in ('both', 'redeem_only'):
 
-					if partnership['ffp'] == ffp_name and partnership.get('relationship') in ['both', 'redeem_only']:
+					redeem_partners[ffp_name].update(members)
 
-						if partnership.get('type') == 'alliance':
+				if relationship in ('both', 'earn_only'):
 
-							alliance_name = partnership.get('alliance')
+					earn_partners[ffp_name].update(members)
 
-							if alliance_name == "OW":
+			# Remove self carriers
 
-								partner_carrier += OW_member
+			for ffp_name, ffp_value in ffp_dict.items():
 
-							elif alliance_name == "SA":
+				self_carriers = set(ffp_value['carriers'])
 
-								partner_carrier += SA_member
+				redeem_partners[ffp_name] = frozenset(redeem_partners[ffp_name] - self_carriers)
 
-							elif alliance_name == "ST":
+				earn_partners[ffp_name] = frozenset(earn_partners[ffp_name] - self_carriers)
 
-								partner_carrier += ST_member
+			# Store compiled graph as app attributes
 
-							else:
+			self.alliance_members = alliance_members
 
-								raise ValueError(f'Unrecognized alliance "{alliance_name}" in partnership definition')
+			self.carrier_alliance = carrier_alliance
 
-						elif partnership.get('type') == 'individual':
+			self.country_names = country_names
 
-							partner_carrier += partnership.get('carriers')
+			self.carrierlist_tab1 = carrierlist_tab1
 
-						else:
+			self.carriers_country_tab1 = sorted(carriers_country)
 
-							raise ValueError(f'Unknown partnership relationship in partnership definition')
+			self.carriers_disp = carriers_disp
 
-				# Remove duplicates and self carriers
+			self.redeem_partners = redeem_partners
 
-				partner_carrier = list(dict.fromkeys(partner_carrier))
+			self.earn_partners = earn_partners
 
-				partner_carrier = [item for item in partner_carrier if item not in ffp_self_carriers]
+			elapsed_ms = (time.perf_counter() - start) * 1000
 
-				if partner_carrier:
+			print(f'✓ Compiled {len(partners_list)} partnerships for {len(ffp_dict)} FFPs in {elapsed_ms:.1f} ms')
 
-					ffp_value['redeem_partner'] = partner_carrier
+		except Exception as e:
 
-			# Store prepared data as app attributes
+			raise ValueError(f'Partnership compilation failed: {str(e)}')
 
-			self.carrierlist_tab1 = carrierlist_tab1
+	def prepare_tab1_data(self):
 
-			self.carriers_country_tab1 = carriers_country_tab1
+		"""Prepare Tab1-specific data structures at startup"""
 
-			self.ffp_dict_redeem = ffp_dict_redeem
+		print('\nPreparing Tab1 data...')
 
-			print(f'✓ Prepared {len(carrierlist_tab1)} carriers for Tab1')
+		try:
 
-			print(f'✓ Prepared {len(carriers_country_tab1)} countries for Tab1')
+			ffp_dict = self.ffp['ffps']
 
-			print(f'✓ Prepared {len(ffp_dict_redeem)} FFPs with redeem partners')
+			carrierlist_tab1 = self.carrierlist_tab1
 
-		except Exception as e:
+			carriers_country_tab1 = self.carriers_country_tab1
 
-			raise ValueError(f'Tab1 data preparation failed: {str(e)}')
+			# Build country -> alliance -> carrier names hierarchy for the selector cascade
 
-	def prepare_tab2_data(self):
+			carrier_hierarchy_tab1 = {country: {} for country in carriers_country_tab1}
 
-		"""Prepare Tab2-specific data structures at startup"""
+			for carrier_dict in carrierlist_tab1:
 
-		print('\nPreparing Tab2 data...')
+				alliances = carrier_hierarchy_tab1[carrier_dict['country']]
 
-		try:
+				alliances.setdefault(carrier_dict['alliance'], []).append(carrier_dict['name'])
 
-			carriers_list = self.carriers['carriers']
+			# Build country search index shared by Tab1 and Tab4
 
-			airports_list = self.airports
+			country_index_tab1 = TrigramIndex(carriers_country_tab1)
 
-			zone_system_dict = self.zonesystems['zone_definitions']
+			# Build ffp_dict_redeem from the compiled partnership graph
 
-			zone_system_ref = self.zonesystems['shared_groups']
+			keep = {'name', 'carriers'}
 
-			award_chart_dict = self.award_charts['award_charts']
+			ffp_dict_redeem = {
 
-			alliance_list = self.alliance['alliances']
+				name: {k: v for k, v in value.items() if k in keep}
 
-			# Define legal zone types
+				for name, value in ffp_dict.items()
 
-			legal_zone_type = [
+			}
 
-				"continents", "countries", "regions", "airports",
+			for ffp_name, ffp_value in ffp_dict_redeem.items():
 
-				"countries_exclude", "regions_exclude", "airports_exclude"
+				if self.redeem_partners[ffp_name]:
 
-			]
+					ffp_value['redeem_partner'] = self.redeem_partners[ffp_name]
 
-			# Expand zone system references
+			# Store prepared data as app attributes
 
-			def handleZoneSystemReference(datalist, glb_shared_dict, zone_group_dict):
+			self.carrier_hierarchy_tab1 = carrier_hierarchy_tab1
 
-				overall_list = []
+			self.country_index_tab1 = country_index_tab1
 
-				for element_str in datalist:
+			self.ffp_dict_redeem = ffp_dict_redeem
+
+			print(f'✓ Prepared {len(carrierlist_tab1)} carriers for Tab1')
+
+			print(f'✓ Prepared {len(carriers_country_tab1)} countries for Tab1')
 
-					if element_str.startswith('$lcl_shared.'):
+			print(f'✓ Prepared {len(ffp_dict_redeem)} FFPs with redeem partners')
 
-						referred_group = element_str.split('.')[1]
+		except Exception as e:
 
-						collected_local_refer = zone_group_dict.get('local_shared_groups')
+			raise ValueError(f'Tab1 data preparation failed: {str(e)}')
 
-						if collected_local_refer:
+	def prepare_tab2_data(self):
 
-							for name, value in collected_local_refer.items():
+		"""Prepare Tab2-specific data structures at startup"""
 
-								if name == referred_group:
+		print('\nPreparing Tab2 data...')
 
-									overall_list += value
+		try:
 
-					elif element_str.startswith('$glb_shared.'):
+			airports_list = self.airports
 
-						referred_group = element_str.split('.')[1]
+			award_chart_dict = self.award_charts['award_charts']
 
-						for name, value in glb_shared_dict.items():
+			# Compile zone systems (reference expansion, frozensets, shared zone bodies)
 
-							if name == referred_group:
+			zone_digest = self.data_digests['zonesystems'] + self.data_digests['airports']
 
-								overall_list += value
+			zone_systems = compile_zone_systems(self.zonesystems, zone_digest)
 
-					else:
+			# Compile award charts into typed chart objects
 
-						overall_list.append(element_str)
+			award_charts = compile_award_charts(award_chart_dict)
 
-				return list(set(overall_list))
+			# Specialize chart selection per (FFP, carrier) so only route predicates remain per query
 
-			# Process zone system to expand all references
+			chart_selection = compile_chart_selection(self.ffp_dict_redeem, award_chart_dict)
 
-			for name, value in zone_system_dict.items():
+			# Compile multi-segment rules into a (case, FFP) dispatch table
 
-				group_zones = value.get('zones')
+			multiseg_rules = compile_multiseg_rules(
 
-				if group_zones:
+				self.multisegrules, award_chart_dict, self.ffp['ffps'],
 
-					for name2, value2 in group_zones.items():
+				self.redeem_partners, self.alliance_members)
 
-						for name3, value3 in value2.items():
+			# Freeze everything the search needs into one immutable engine snapshot
 
-							if name3 in legal_zone_type and any(item.startswith('$') for item in value3):
+			engine = PricingEngine(
 
-								temp = handleZoneSystemReference(value3, zone_system_ref, value)
+				airports_list, self.ffp_dict_redeem, award_chart_dict, zone_systems,
 
-								value2[name3] = temp
+				award_charts, chart_selection, multiseg_rules)
 
 			# Build airports display list
 
@@ -537,136 +581,146 @@ class App(tk.Tk):
 
 				airports_disp.append(tempstring)
 
-			# Build carriers display list
+			# Build sorted IATA prefix index for autocomplete
 
-			carriers_disp = []
+			airport_index = AirportIndex(airports_disp)
 
-			for carrier in carriers_list:
+			# Build trigram index for name/region/country search
 
-				carrier_code = carrier['code']
+			airport_text_index = AirportTextIndex(airports_list, airports_disp, self.country_names)
 
-				carrier_name = carrier['name']
+			# Carriers display list comes from the compiled partnership graph
 
-				carrier_displayName = carrier_code + ' - ' + carrier_name
-
-				carriers_disp.append(carrier_displayName)
+			carriers_disp = self.carriers_disp
 
 			# Store prepared data as app attributes
 
 			self.airports_disp = airports_disp
 
-			self.airports_list = airports_list
+			self.airport_index = airport_index
 
-			self.carriers_disp = carriers_disp
+			self.airport_text_index = airport_text_index
 
-			self.award_chart_dict = award_chart_dict
+			self.airports_list = airports_list
 
-			self.legal_zone_type = legal_zone_type
+			self.award_chart_dict = award_chart_dict
 
-			self.zone_system_dict = zone_system_dict
+			self.zone_systems = zone_systems
 
-			self.alliance_list = alliance_list
+			self.engine = engine
 
 			print(f'✓ Prepared {len(airports_disp)} airports for Tab2')
 
+			print(f'✓ Indexed {len(airport_text_index.postings)} airport name trigrams')
+
 			print(f'✓ Prepared {len(carriers_disp)} carriers for Tab2')
 
-			print('✓ Expanded zone system references')
+			print(f'✓ Compiled {len(zone_systems)} zone systems ({count_unique_zones(zone_systems)} unique zones)')
 
-			print(f'✓ Prepared {len(award_chart_dict)} award charts')
+			print(f'✓ Compiled {len(award_charts)} award charts')
 
-		except Exception as e:
+			num_selection = sum(len(by_carrier) for by_carrier in chart_selection.values())
 
-			raise ValueError(f'Tab2 data preparation failed: {str(e)}')
+			print(f'✓ Specialized chart selection for {num_selection} FFP/carrier pairs ({count_route_dependent(chart_selection)} route-dependent)')
 
-	def prepare_tab4_data(self):
+			print(f'✓ Compiled multi-segment rules for {len(self.ffp["ffps"])} FFPs')
 
-		"""Prepare Tab4-specific data structures at startup (Earning partners)"""
+			for warning in selection_warnings(chart_selection):
 
-		print('\nPreparing Tab4 data...')
+				print(f'  ! {warning}')
 
-		try:
+		except Exception as e:
 
-			ffp_dict = self.ffp['ffps']
+			raise ValueError(f'Tab2 data preparation failed: {str(e)}')
 
-			alliance_list = self.alliance['alliances']
+	def open_result_cache(self):
 
-			partners_list = self.partners['programs']
+		"""Serve repeat Tab2 queries from the on-disk result cache, when one is configured"""
 
-			# Extract alliance members
+		self.result_cache = None
 
-			OW_member = alliance_list[0].get('members')
+		if not RESULT_CACHE_FILE:
 
-			SA_member = alliance_list[1].get('members')
+			return
 
-			ST_member = alliance_list[2].get('members')
+		try:
 
-			# Build ffp_dict_earn (similar to ffp_dict_redeem but for earning)
+			self.result_cache = ResultCache(RESULT_CACHE_FILE, data_version(self.data_digests))
 
-			keep = {'name', 'carriers'}
+		except Exception as e:
 
-			ffp_dict_earn = {
+			# The cache is an optimization: run without it rather than fail startup
 
-				name: {k: v for k, v in value.items() if k in keep}
+			print(f'  ! Result cache disabled ({RESULT_CACHE_FILE}): {str(e)}')
 
-				for name, value in ffp_dict.items()
+			return
 
-			}
+		self.engine = CachedEngine(self.engine, self.result_cache)
 
-			for ffp_name, ffp_value in ffp_dict_earn.items():
+		print(f'✓ Result cache {RESULT_CACHE_FILE}: {len(self.result_cache)} entries for this data version')
 
-				ffp_self_carriers = ffp_value['carriers']
+	def destroy(self):
 
-				partner_carrier = []
+		"""Close the result cache (flushing its pending hit times) with the window"""
 
-				for partnership in partners_list:
+		if getattr(self, 'result_cache', None) is not None:
 
-					if partnership['ffp'] == ffp_name and partnership.get('relationship') in ['both', 'earn_only']:
+			try:
 
-						if partnership.get('type') == 'alliance':
+				self.result_cache.close()
 
-							alliance_name = partnership.get('alliance')
+			except Exception as e:
 
-							if alliance_name == "OW":
+				print(f'  ! Result cache close failed: {str(e)}')
 
-								partner_carrier += OW_member
+			self.result_cache = None
 
-							elif alliance_name == "SA":
+		super().destroy()
 
-								partner_carrier += SA_member
+	def prepare_tab4_data(self):
 
-							elif alliance_name == "ST":
+		"""Prepare Tab4-specific data structures at startup (Earning partners)"""
+
+		print('\nPreparing Tab4 data...')
+
+		try:
 
-								partner_carrier += ST_member
+			ffp_dict = self.ffp['ffps']
 
-							else:
+			# Build ffp_dict_earn (similar to ffp_dict_redeem but for earning)
 
-								raise ValueError(f'Unrecognized alliance "{alliance_name}" in partnership definition')
+			keep = {'name', 'carriers'}
+
+			ffp_dict_earn = {
 
-						elif partnership.get('type') == 'individual':
+				name: {k: v for k, v in value.items() if k in keep}
 
-							partner_carrier += partnership.get('carriers')
+				for name, value in ffp_dict.items()
 
-						else:
+			}
 
-							raise ValueError(f'Unknown partnership relationship in partnership definition')
+			for ffp_name, ffp_value in ffp_dict_earn.items():
 
-				# Remove duplicates and self carriers
+				if self.earn_partners[ffp_name]:
 
-				partner_carrier = list(dict.fromkeys(partner_carrier))
+					ffp_value['earn_partner'] = self.earn_partners[ffp_name]
 
-				partner_carrier = [item for item in partner_carrier if item not in ffp_self_carriers]
+			# Compile booking-code earning rates into per-carrier lookup tables
 
-				if partner_carrier:
+			accrual_rules = compile_accrual_rules(
 
-					ffp_value['earn_partner'] = partner_carrier
+				self.accrualrules, ffp_dict, self.earn_partners, self.valuations)
 
 			# Store prepared data as app attributes
 
 			self.ffp_dict_earn = ffp_dict_earn
 
+			self.accrual_rules = accrual_rules
+
 			print(f'✓ Prepared {len(ffp_dict_earn)} FFPs with earning partners')
 
+			print(f'✓ Compiled {len(accrual_rules)} booking-code earning rules for {len(accrual_rules.carriers())} carriers')
+
 		except Exception as e:
 
 			raise ValueError(f'Tab4 data preparation failed: {str(e)}')
@@ -677,24 +731,14 @@ class App(tk.Tk):
 
 		Receive search results from Tab 2 and pass them to Tab 3.
 
-		`results` should be a list of result dictionaries from Tab 2.
+		`results` should be a list of results.PriceResult from Tab 2.
 
 		"""
 
-		# Optionally store to app-wide context too
+		# Publish to the shared context; Tab 3 is subscribed and rebuilds when shown
 
 		self.search_context['results'] = results
 
-		# Forward to Tab 3 if it exists and supports load_data()
-
-		if hasattr(self, 'tab3') and hasattr(self.tab3, 'load_data'):
-
-			self.tab3.load_data(results)
-
-		else:
-
-			print("DEBUG: Tab 3 not available or does not implement load_data().")
-
 	def setup_ui(self):
 
 		"""Setup main UI with tabs"""
@@ -715,7 +759,9 @@ class App(tk.Tk):
 
 				carriers_country_tab1=self.carriers_country_tab1,
 
-				carrierlist_tab1=self.carrierlist_tab1,
+				carrier_hierarchy_tab1=self.carrier_hierarchy_tab1,
+
+				country_index_tab1=self.country_index_tab1,
 
 				ffp_dict_redeem=self.ffp_dict_redeem
 
@@ -743,19 +789,13 @@ class App(tk.Tk):
 
 				airports_disp=self.airports_disp,
 
-				airports_list=self.airports_list,
-
-				carriers_disp=self.carriers_disp,
-
-				ffp_dict_redeem=self.ffp_dict_redeem,
-
-				award_chart_dict=self.award_chart_dict,
+				airport_index=self.airport_index,
 
-				legal_zone_type=self.legal_zone_type,
+				airport_text_index=self.airport_text_index,
 
-				zone_system_dict=self.zone_system_dict,
+				carriers_disp=self.carriers_disp,
 
-				alliance_members = self.alliance_list
+				engine=self.engine
 
 			)
 
@@ -801,11 +841,17 @@ class App(tk.Tk):
 
 				carriers_country_tab1=self.carriers_country_tab1,
 
-				carrierlist_tab1=self.carrierlist_tab1,
+				carrier_hierarchy_tab1=self.carrier_hierarchy_tab1,
+
+				country_index_tab1=self.country_index_tab1,
 
 				ffp_dict_earn=self.ffp_dict_earn,
 
-				ffp_dict=self.ffp['ffps']
+				ffp_dict=self.ffp['ffps'],
+
+				accrual_rules=self.accrual_rules,
+
+				engine=self.engine
 
 			)
 
@@ -831,6 +877,8 @@ class App(tk.Tk):
 
 			self.validate_data()
 
+			self.prepare_partnerships()
+
 			self.prepare_tab1_data()
 
 			self.prepare_tab2_data()
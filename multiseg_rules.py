@@ -0,0 +1,154 @@
+"""
+multiseg_rules.py: Compiled multi-segment pricing rules
+
+multiseg_rules.json (next to ffp.json) declares how each FFP prices an
+itinerary with more than one segment. It is compiled once at startup into
+a dispatch table keyed by (case, FFP) with all carrier sets precomputed,
+so pricing never rebuilds partner lists and data updates need no code edits.
+"""
+
+# Itinerary classes, see Tab2Frame._multiseg_price
+CASES = ('self_only', 'single_partner', 'self_and_partner', 'multi_partner')
+
+CASE_ACTIONS = ('cumulative', 'per_segment', 'per_segment_skip_connections', 'multipart', 'not_allowed')
+
+PROGRAM_TYPES = ('chart_by_carriers', 'dynamic_partners')
+
+
+class CaseRule:
+    """How one FFP prices one itinerary case"""
+
+    __slots__ = ('action', 'require', 'message', 'per_segment_carriers',
+                 'zone_system', 'hub_zones', 'connection_zones')
+
+    def __init__(self, action, require=None, message=None, per_segment_carriers=frozenset(),
+                 zone_system=None, hub_zones=frozenset(), connection_zones=frozenset()):
+        self.action = action
+        self.require = require  # frozenset the checked carriers must fall in, or None
+        self.message = message
+        self.per_segment_carriers = per_segment_carriers
+        self.zone_system = zone_system
+        self.hub_zones = hub_zones
+        self.connection_zones = connection_zones
+
+
+class ProgramRule:
+    """FFP-specific rule that replaces case classification entirely"""
+
+    __slots__ = ('rule_type', 'chart_rules', 'dynamic', 'self_carriers', 'message')
+
+    def __init__(self, rule_type, chart_rules=(), dynamic=frozenset(), self_carriers=frozenset(), message=None):
+        self.rule_type = rule_type
+        self.chart_rules = chart_rules  # tuple of (chart_name, allowed carriers, min_partners)
+        self.dynamic = dynamic
+        self.self_carriers = self_carriers
+        self.message = message
+
+
+class MultiSegRules:
+    """Dispatch table: program rules by FFP, case rules by (case, FFP)"""
+
+    DEFAULT = CaseRule('cumulative')
+
+    def __init__(self, programs, cases):
+        self.programs = programs
+        self.cases = cases
+
+    def program(self, ffp_code):
+        return self.programs.get(ffp_code)
+
+    def rule(self, case, ffp_code):
+        return self.cases[case].get(ffp_code, self.DEFAULT)
+
+
+def _chart_partners(chart_names, award_chart_dict):
+    carriers = set()
+    for chart_name in chart_names:
+        if chart_name not in award_chart_dict:
+            raise ValueError(f'Unknown award chart "{chart_name}" in multi-segment rules')
+        carriers.update(award_chart_dict[chart_name].get('specific_partners') or [])
+    return carriers
+
+
+def _compile_carrier_set(spec, ffp_code, award_chart_dict, ffp_dict, redeem_partners, alliance_members):
+    """Resolve a carrier set spec (alliance / charts / literal carriers / self) to a frozenset"""
+    carriers = set(spec.get('carriers', []))
+
+    if 'alliance' in spec:
+        if spec['alliance'] not in alliance_members:
+            raise ValueError(f'Unrecognized alliance "{spec["alliance"]}" in multi-segment rules')
+        carriers |= alliance_members[spec['alliance']]
+
+    carriers |= _chart_partners(spec.get('carriers_from_charts', []), award_chart_dict)
+
+    if 'redeem_partners_except_charts' in spec:
+        excluded = _chart_partners(spec['redeem_partners_except_charts'], award_chart_dict)
+        carriers |= set(redeem_partners.get(ffp_code, ())) - excluded
+
+    if spec.get('include_self'):
+        carriers |= set(ffp_dict[ffp_code]['carriers'])
+
+    return frozenset(carriers)
+
+
+def compile_multiseg_rules(rules, award_chart_dict, ffp_dict, redeem_partners, alliance_members):
+    """Compile multiseg_rules.json into a MultiSegRules dispatch table"""
+    programs = {}
+    for ffp_code, spec in rules.get('programs', {}).items():
+        if ffp_code not in ffp_dict:
+            raise ValueError(f'Unknown FFP "{ffp_code}" in multi-segment program rules')
+
+        program_type = spec.get('type')
+        if program_type not in PROGRAM_TYPES:
+            raise ValueError(f'Unknown multi-segment program rule type "{program_type}" for {ffp_code}')
+
+        chart_rules = []
+        for chart_spec in spec.get('rules', []):
+            _chart_partners([chart_spec['chart']], award_chart_dict)
+            allowed = _compile_carrier_set(chart_spec, ffp_code, award_chart_dict, ffp_dict,
+                                           redeem_partners, alliance_members)
+            chart_rules.append((chart_spec['chart'], allowed, chart_spec.get('min_partners', 0)))
+
+        dynamic = frozenset()
+        if 'dynamic' in spec:
+            dynamic = _compile_carrier_set(spec['dynamic'], ffp_code, award_chart_dict, ffp_dict,
+                                           redeem_partners, alliance_members)
+
+        programs[ffp_code] = ProgramRule(
+            program_type,
+            chart_rules=tuple(chart_rules),
+            dynamic=dynamic,
+            self_carriers=frozenset(ffp_dict[ffp_code]['carriers']),
+            message=spec.get('message'))
+
+    cases = {case: {} for case in CASES}
+    for case, case_rules in rules.get('cases', {}).items():
+        if case not in cases:
+            raise ValueError(f'Unknown multi-segment case "{case}"')
+
+        for spec in case_rules:
+            action = spec.get('action')
+            if action not in CASE_ACTIONS:
+                raise ValueError(f'Unknown multi-segment action "{action}" in case {case}')
+
+            for ffp_code in spec['ffps']:
+                if ffp_code not in ffp_dict:
+                    raise ValueError(f'Unknown FFP "{ffp_code}" in multi-segment case {case}')
+                if ffp_code in cases[case]:
+                    raise ValueError(f'FFP "{ffp_code}" listed twice in multi-segment case {case}')
+
+                require = None
+                if 'require' in spec:
+                    require = _compile_carrier_set(spec['require'], ffp_code, award_chart_dict, ffp_dict,
+                                                   redeem_partners, alliance_members)
+
+                cases[case][ffp_code] = CaseRule(
+                    action,
+                    require=require,
+                    message=spec.get('message'),
+                    per_segment_carriers=frozenset(spec.get('per_segment_carriers', [])),
+                    zone_system=spec.get('zone_system'),
+                    hub_zones=frozenset(spec.get('hub_zones', [])),
+                    connection_zones=frozenset(spec.get('connection_zones', [])))
+
+    return MultiSegRules(programs, cases)
@@ -0,0 +1,194 @@
+"""
+result_cache.py: Persistent pricing result cache
+
+An optional SQLite file of single-segment and multi-segment pricing results,
+shared across sessions and processes. Entries are keyed by the normalized
+query and a data version (a hash of the data file digests), so editing any
+data file makes the old entries miss, while sessions still running on other
+data keep their own. The file is bounded to max_entries over all versions,
+least recently used entries evicted first, so stale versions age out.
+
+CachedEngine wraps a PricingEngine and consults the cache before pricing;
+every other engine attribute is passed through unchanged. Cache errors (e.g.
+a file locked by another process) are reported and the engine result used.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from results import PriceResult, PriceStatus
+
+# Bump when the pricing code changes results for the same data
+CACHE_FORMAT = 1
+
+DEFAULT_MAX_ENTRIES = 50000
+
+# Hits are written back (last_used) in batches, not on every read
+TOUCH_FLUSH_SIZE = 256
+
+
+def data_version(data_digests):
+    """One hash over the per-file content digests of gui.App.load_all_data"""
+    joined = ';'.join(f'{name}={digest}' for name, digest in sorted(data_digests.items()))
+    return hashlib.sha1(f'{CACHE_FORMAT}|{joined}'.encode('utf-8')).hexdigest()
+
+
+def _encode(results):
+    """Results (list of PriceResult, or a message string) as JSON"""
+    if isinstance(results, str):
+        return json.dumps(results)
+    return json.dumps([
+        [r.ffp, r.ffp_disp_name, r.chart_name, r.status.value, r.miles, r.message] for r in results
+    ])
+
+
+def _decode(payload):
+    data = json.loads(payload)
+    if isinstance(data, str):
+        return data
+    return [
+        PriceResult(ffp, name, chart, PriceStatus(status), miles, message)
+        for ffp, name, chart, status, miles, message in data
+    ]
+
+
+class ResultCache:
+    """SQLite-backed {query key: pricing results} for one data version"""
+
+    def __init__(self, path, version, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' version TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL, last_used REAL NOT NULL,'
+            ' PRIMARY KEY (version, key))')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+
+    def __len__(self):
+        """Entries for this data version"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM results WHERE version = ?', (self.version,)).fetchone()[0]
+
+    def get(self, key):
+        """Cached results for key, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload FROM results WHERE key = ? AND version = ?', (key, self.version)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                self._flush_touched()
+
+        return _decode(row[0])
+
+    def put(self, key, results):
+        payload = _encode(results)
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO results (version, key, payload, last_used) VALUES (?, ?, ?, ?)',
+                    (self.version, key, payload, time.time()))
+                self._evict()
+                self._conn.execute('COMMIT')
+            except sqlite3.Error:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def clear(self):
+        """Drop this data version's entries"""
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute('DELETE FROM results WHERE version = ?', (self.version,))
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                'UPDATE results SET last_used = ? WHERE version = ? AND key = ?',
+                [(used, self.version, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self):
+        """Trim to max_entries, least recently used first (inside put's transaction)"""
+        count = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._flush_touched()
+            self._conn.execute(
+                'DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY last_used LIMIT ?)',
+                (excess,))
+
+
+def segment_key(orig, dest, carrier, cabin, distance):
+    return f'seg|{orig}|{dest}|{carrier}|{cabin}|{distance}'
+
+
+def itinerary_key(carriers, origs, dests, cabin, distances):
+    return 'itin|{}|{}|{}|{}|{}'.format(
+        ','.join(carriers), ','.join(origs), ','.join(dests), cabin, ','.join(str(d) for d in distances))
+
+
+class CachedEngine:
+    """PricingEngine whose search_segment / price_itinerary go through a ResultCache"""
+
+    def __init__(self, engine, cache):
+        object.__setattr__(self, 'engine', engine)
+        object.__setattr__(self, 'cache', cache)
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PricingEngine is immutable; build a new one from reloaded data')
+
+    def search_segment(self, orig, dest, carrier, cabin, distance):
+        key = segment_key(orig, dest, carrier, cabin, distance)
+        return self._cached(key, self.engine.search_segment, orig, dest, carrier, cabin, distance)
+
+    def price_itinerary(self, carriers, origs, dests, cabin, distances):
+        key = itinerary_key(carriers, origs, dests, cabin, distances)
+        return self._cached(key, self.engine.price_itinerary, carriers, origs, dests, cabin, distances)
+
+    def _cached(self, key, price, *args):
+        """Cached results for key, else price(*args); cache failures fall back to the engine"""
+        try:
+            results = self.cache.get(key)
+        except sqlite3.Error as e:
+            print(f'  ! Result cache read failed: {e}')
+            results = None
+        if results is not None:
+            return results
+
+        results = price(*args)
+        try:
+            self.cache.put(key, results)
+        except sqlite3.Error as e:
+            print(f'  ! Result cache write failed: {e}')
+        return results
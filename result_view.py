@@ -0,0 +1,156 @@
+"""
+result_view.py: Virtual-scrolling text result list
+
+Tab2 results can run to thousands of lines (multi-segment searches print every
+sub-itinerary). ResultView keeps the lines in a Python list and only ever puts
+the rows that fit on screen into its Listbox, so showing a result costs one
+delete + one insert however long it is. Lines appended in one event handler
+are rendered once, when Tk is idle. The selected line is kept in the model
+too, so keyboard navigation and selection run over all lines, not just the
+rendered window.
+"""
+
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+
+class ResultView(ttk.Frame):
+    """Listbox look-alike that renders only the visible window of `lines`"""
+
+    def __init__(self, parent, font=("Courier", 10), bg="#f5f5f5", height=25):
+        super().__init__(parent)
+        self.lines = []
+        self.top = 0                  # index of the first visible line
+        self.rows = height            # visible rows, updated on resize
+        self.active = None            # index of the selected line, or None
+        self._render_pending = None
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.listbox = tk.Listbox(self, height=height, font=font, bg=bg, activestyle="none")
+        self.listbox.grid(row=0, column=0, sticky="nsew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self._line_height = tkfont.Font(font=font).metrics("linespace")
+
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(int(-1 * e.delta / 120) * 3))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(3))
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+
+        # Keys move over the whole model; "break" keeps the Listbox from moving
+        # within the rendered window only
+        self.listbox.bind("<Up>", lambda e: self._move_active(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_active(1))
+        self.listbox.bind("<Prior>", lambda e: self._move_active(-self.rows))
+        self.listbox.bind("<Next>", lambda e: self._move_active(self.rows))
+        self.listbox.bind("<Home>", lambda e: self._set_active(0))
+        self.listbox.bind("<End>", lambda e: self._set_active(len(self.lines) - 1))
+
+    # ---------- Model ----------
+
+    def clear(self):
+        self.lines = []
+        self.top = 0
+        self.active = None
+        self._schedule_render()
+
+    def append(self, line):
+        self.lines.append(line)
+        self._schedule_render()
+
+    def extend(self, lines):
+        self.lines.extend(lines)
+        self._schedule_render()
+
+    def set_lines(self, lines):
+        self.lines = list(lines)
+        self.top = 0
+        self.active = None
+        self._schedule_render()
+
+    # ---------- Scrolling ----------
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units' | 'pages')"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self._scroll_to(round(float(args[1]) * len(self.lines)))
+        elif args[0] == 'scroll':
+            count = int(args[1])
+            self.scroll(count * self.rows if args[2] == 'pages' else count)
+
+    def scroll(self, count):
+        self._scroll_to(self.top + count)
+
+    def _move_active(self, count):
+        if self.active is None:
+            self.scroll(count)
+        else:
+            self._set_active(self.active + count)
+        return "break"
+
+    def _set_active(self, index):
+        """Select line index of the model, scrolling it into view"""
+        if not self.lines:
+            return "break"
+
+        self.active = max(0, min(index, len(self.lines) - 1))
+        if self.active < self.top:
+            self._scroll_to(self.active)
+        elif self.active >= self.top + self.rows:
+            self._scroll_to(self.active - self.rows + 1)
+        self._schedule_render()
+        return "break"
+
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.active = self.top + selection[0]
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, len(self.lines) - self.rows))
+        if top != self.top:
+            self.top = top
+            self._schedule_render()
+
+    def _on_resize(self, event):
+        padding = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        rows = max(1, (event.height - padding) // max(1, self._line_height))
+        if rows != self.rows:
+            self.rows = rows
+            self._scroll_to(self.top)
+            self._schedule_render()
+
+    # ---------- Rendering ----------
+
+    def _schedule_render(self):
+        if self._render_pending is None:
+            self._render_pending = self.after_idle(self.render)
+
+    def render(self):
+        """Put the visible window of lines into the Listbox (one delete, one insert)"""
+        self._render_pending = None
+
+        total = len(self.lines)
+        self.top = max(0, min(self.top, total - self.rows))
+        window = self.lines[self.top:self.top + self.rows]
+
+        self.listbox.delete(0, tk.END)
+        if window:
+            self.listbox.insert(tk.END, *window)
+
+        if self.active is not None and self.top <= self.active < self.top + len(window):
+            row = self.active - self.top
+            self.listbox.selection_set(row)
+            self.listbox.activate(row)
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + len(window)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,85 @@
+"""
+results.py: Immutable pricing results
+
+A PriceResult is a slotted named tuple: numeric miles plus a PriceStatus, with
+the user-facing message kept alongside for display. Results are never mutated
+after creation, so they can be shared between tabs, threads and caches.
+"""
+
+import enum
+from collections import namedtuple
+
+
+class PriceStatus(enum.Enum):
+    """Outcome of pricing one chart for one itinerary"""
+
+    UNPRICED = 'unpriced'          # chart chosen, not priced yet
+    OK = 'ok'                      # miles is an int
+    DYNAMIC = 'dynamic'            # program prices dynamically
+    NO_CABIN = 'no_cabin'          # cabin not on the chart
+    NOT_PRICED = 'not_priced'      # route/distance outside the chart
+    OUT_OF_ZONE = 'out_of_zone'    # airport not in the chart's zone system
+    WRONG_CHART = 'wrong_chart'    # chart selection and chart disagree
+    UNKNOWN_CHART = 'unknown_chart'
+    NO_CHART = 'no_chart'          # no chart applies to the carrier
+    NOT_ALLOWED = 'not_allowed'    # itinerary not allowed by program rules
+    INCOMPLETE = 'incomplete'      # per-segment pricing with unpriced segments
+
+
+# Chart quotes: (status, miles, message). Failures are shared constants.
+QUOTE_DYNAMIC = (PriceStatus.DYNAMIC, None, 'Dynamic')
+QUOTE_NO_CABIN = (PriceStatus.NO_CABIN, None, 'This cabin is not available on this FFP.')
+QUOTE_UNKNOWN_CHART = (PriceStatus.UNKNOWN_CHART, None, 'Unknown type of chart.')
+
+
+def quote_ok(miles):
+    return (PriceStatus.OK, miles, None)
+
+
+def quote_error(status, message):
+    return (status, None, message)
+
+
+def format_miles(miles):
+    """Miles as '12.5k', or the plain number under 1,000"""
+    return f"{miles / 1000:.1f}k" if miles >= 1000 else str(int(miles))
+
+
+class PriceResult(namedtuple('PriceResult', 'ffp ffp_disp_name chart_name status miles message')):
+    """Award price of one FFP/chart: miles when status is OK, else a message"""
+
+    __slots__ = ()
+
+    @classmethod
+    def unpriced(cls, ffp, ffp_disp_name, chart_name):
+        return cls(ffp, ffp_disp_name, chart_name, PriceStatus.UNPRICED, None, None)
+
+    @classmethod
+    def failed(cls, ffp, ffp_disp_name, chart_name, status, message):
+        return cls(ffp, ffp_disp_name, chart_name, status, None, message)
+
+    def priced(self, quote):
+        """Copy of this result with a (status, miles, message) quote applied"""
+        status, miles, message = quote
+        return self._replace(status=status, miles=miles, message=message)
+
+    @property
+    def ok(self):
+        return self.status is PriceStatus.OK
+
+    @property
+    def award_miles(self):
+        """Miles when priced, else the message (the legacy award_miles value)"""
+        return self.miles if self.status is PriceStatus.OK else self.message
+
+    def sort_key(self):
+        """Priced results by miles first, then the rest by message"""
+        if self.status is PriceStatus.OK:
+            return (0, self.miles, '')
+        return (1, 0, str(self.message))
+
+    def display_miles(self):
+        """Miles as '12.5k', or the message"""
+        if self.status is PriceStatus.OK:
+            return format_miles(self.miles)
+        return str(self.message)
@@ -0,0 +1,243 @@
+"""
+routes.py: Multi-hop award route finder
+
+Finds the cheapest award itineraries between two airports over a local route
+network file: a CSV of airport pairs with their operating carriers,
+
+    origin,destination,carriers
+    JFK,LHR,AA BA VS
+    LHR,DOH,BA QR
+
+Each line is flown in both directions unless loaded with directed=True.
+
+Search is a k-shortest-paths Dijkstra (k labels per airport) with the
+cheapest single-segment award of each leg as edge cost, pruned by a
+great-circle detour bound and a segment cap. The best candidate paths are
+then re-priced as whole itineraries through the engine's multi-segment rules
+(one ticket), and compared with buying each leg separately.
+"""
+
+import csv
+import heapq
+import itertools
+import re
+from collections import OrderedDict, namedtuple
+
+# Search bounds
+DEFAULT_MAX_SEGMENTS = 3
+DEFAULT_DETOUR = 1.5           # flown distance <= DETOUR x great-circle distance
+CANDIDATES_PER_RESULT = 4      # candidate paths re-priced per requested itinerary
+CARRIERS_PER_SEGMENT = 3       # cheapest carriers per leg tried in one-ticket pricing
+
+# Cached route queries and priced legs kept per finder
+ROUTE_CACHE_SIZE = 64
+LEG_CACHE_SIZE = 20000
+
+TICKET_SINGLE = 'one ticket'
+TICKET_SEPARATE = 'separate tickets'
+
+
+class RouteNetwork:
+    """Airport -> {airport: frozenset(carriers)} adjacency of a route file"""
+
+    def __init__(self, edges, source=None, skipped=0):
+        self.edges = edges
+        self.source = source
+        self.skipped = skipped  # lines dropped for airports the engine does not know
+
+    def __len__(self):
+        return sum(len(dests) for dests in self.edges.values())
+
+    def neighbours(self, airport_iata):
+        return self.edges.get(airport_iata, {})
+
+
+def load_route_network(path, engine, directed=False):
+    """Read a route CSV into a RouteNetwork, skipping airports without coordinates"""
+    edges = {}
+    skipped = 0
+
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = csv.reader(line for line in f if line.strip() and not line.lstrip().startswith('#'))
+
+        for line_no, row in enumerate(rows, start=1):
+            if line_no == 1 and row and row[0].strip().lower() == 'origin':
+                continue
+            if len(row) < 3:
+                raise ValueError(f'{path}: line {line_no} must be origin,destination,carriers')
+
+            orig = row[0].strip().upper()
+            dest = row[1].strip().upper()
+            carriers = frozenset(c for c in re.split(r'[\s/;|]+', row[2].strip().upper()) if c)
+
+            if not carriers:
+                raise ValueError(f'{path}: line {line_no} lists no carriers')
+
+            if orig not in engine.coords or dest not in engine.coords or orig == dest:
+                skipped += 1
+                continue
+
+            pairs = [(orig, dest)] if directed else [(orig, dest), (dest, orig)]
+            for a, b in pairs:
+                known = edges.setdefault(a, {})
+                known[b] = known.get(b, frozenset()) | carriers
+
+    return RouteNetwork(edges, source=path, skipped=skipped)
+
+
+class RouteOption(namedtuple('RouteOption', 'miles path carriers distance ticketing results')):
+    """
+    One priced itinerary: total miles, airports, carrier per leg, flown
+    distance, TICKET_SINGLE or TICKET_SEPARATE, and the PriceResult of each
+    ticket (one for a single ticket, one per leg otherwise).
+    """
+
+    __slots__ = ()
+
+
+class RouteFinder:
+    """k cheapest award itineraries over a RouteNetwork, priced by a PricingEngine"""
+
+    def __init__(self, engine, network, max_segments=DEFAULT_MAX_SEGMENTS, detour=DEFAULT_DETOUR):
+        self.engine = engine
+        self.network = network
+        self.max_segments = max_segments
+        self.detour = detour
+
+        # (orig, dest, cabin) -> ranked [(miles, carrier, PriceResult)] of one leg, least recently used first
+        self._legs = OrderedDict()
+        # orig -> OrderedDict((dest, cabin, k) -> [RouteOption]), most recently used origin last
+        self._routes = OrderedDict()
+
+    def find(self, orig, dest, cabin, k=5):
+        """Up to k cheapest RouteOption from orig to dest, cheapest first"""
+        by_origin = self._routes.get(orig)
+        key = (dest, cabin, k)
+
+        if by_origin is not None and key in by_origin:
+            self._routes.move_to_end(orig)
+            return by_origin[key]
+
+        options = self._find(orig, dest, cabin, k)
+
+        by_origin = self._routes.setdefault(orig, OrderedDict())
+        by_origin[key] = options
+        self._routes.move_to_end(orig)
+        if sum(len(cached) for cached in self._routes.values()) > ROUTE_CACHE_SIZE:
+            self._routes.popitem(last=False)
+
+        return options
+
+    # ==================== SEARCH ====================
+
+    def _leg(self, orig, dest, cabin):
+        """Priced carriers of one leg, cheapest first (cached)"""
+        key = (orig, dest, cabin)
+        leg = self._legs.get(key)
+        if leg is not None:
+            self._legs.move_to_end(key)
+            return leg
+
+        engine = self.engine
+        distance = engine.distance(orig, dest)
+        leg = []
+
+        for carrier in sorted(self.network.neighbours(orig).get(dest, ())):
+            try:
+                results = engine.search_segment(orig, dest, carrier, cabin, distance)
+            except ValueError:
+                continue
+            priced = [result for result in results if result.ok]
+            if priced:
+                best = min(priced, key=lambda result: result.miles)
+                leg.append((best.miles, carrier, best))
+
+        leg.sort(key=lambda item: (item[0], item[1]))
+        self._legs[key] = leg
+        if len(self._legs) > LEG_CACHE_SIZE:
+            self._legs.popitem(last=False)
+        return leg
+
+    def _candidate_paths(self, orig, dest, cabin, count):
+        """Up to `count` loop-free paths by summed leg cost, Dijkstra with k labels per airport"""
+        engine = self.engine
+        engine.airport_detail(orig)
+        engine.airport_detail(dest)
+
+        budget = self.detour * engine.distance(orig, dest)
+        settled = {}
+        paths = []
+
+        # (leg cost sum, flown distance, path)
+        queue = [(0, 0, (orig,))]
+
+        while queue and len(paths) < count:
+            cost, flown, path = heapq.heappop(queue)
+            node = path[-1]
+
+            if node == dest:
+                paths.append((cost, flown, path))
+                continue
+
+            if settled.get(node, 0) >= count:
+                continue
+            settled[node] = settled.get(node, 0) + 1
+
+            if len(path) > self.max_segments:
+                continue
+
+            for nxt in self.network.neighbours(node):
+                if nxt in path:
+                    continue
+
+                leg_distance = engine.distance(node, nxt)
+                remaining = 0 if nxt == dest else engine.distance(nxt, dest)
+                if flown + leg_distance + remaining > budget:
+                    continue
+                if nxt != dest and len(path) == self.max_segments:
+                    continue
+
+                leg = self._leg(node, nxt, cabin)
+                if not leg:
+                    continue
+
+                heapq.heappush(queue, (cost + leg[0][0], flown + leg_distance, path + (nxt,)))
+
+        return paths
+
+    def _price_path(self, path, cabin, leg_cost):
+        """Cheapest RouteOption for one path: one ticket or separate tickets"""
+        engine = self.engine
+        origs = list(path[:-1])
+        dests = list(path[1:])
+        distances = [engine.distance(a, b) for a, b in zip(origs, dests)]
+        legs = [self._leg(a, b, cabin) for a, b in zip(origs, dests)]
+        flown = sum(distances)
+
+        best = RouteOption(
+            leg_cost, path, tuple(leg[0][1] for leg in legs), flown, TICKET_SEPARATE,
+            tuple(leg[0][2] for leg in legs))
+
+        if len(path) == 2:
+            return best._replace(ticketing=TICKET_SINGLE)
+
+        choices = [[carrier for _, carrier, _ in leg[:CARRIERS_PER_SEGMENT]] for leg in legs]
+        for carriers in itertools.product(*choices):
+            try:
+                results = engine.price_itinerary(list(carriers), origs, dests, cabin, distances)
+            except ValueError:
+                continue
+            if isinstance(results, str):
+                continue
+
+            for result in results:
+                if result.ok and result.miles < best.miles:
+                    best = RouteOption(result.miles, path, carriers, flown, TICKET_SINGLE, (result,))
+
+        return best
+
+    def _find(self, orig, dest, cabin, k):
+        candidates = self._candidate_paths(orig, dest, cabin, k * CANDIDATES_PER_RESULT)
+        options = [self._price_path(path, cabin, cost) for cost, _, path in candidates]
+        options.sort(key=lambda option: (option.miles, len(option.path), option.distance))
+        return options[:k]
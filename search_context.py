@@ -0,0 +1,48 @@
+"""
+search_context.py: Versioned search context shared between tabs
+
+The App keeps one SearchContext holding the last Tab2 search (route, cabin,
+results). It is a dict, so tabs read it as before; every change bumps
+`version` and notifies subscribers once. Tabs that are not visible only note
+the change and rebuild when shown, comparing versions to skip redundant work.
+"""
+
+SEARCH_FIELDS = ('carrier_code', 'origin', 'destination', 'distance', 'cabin', 'results')
+
+
+class SearchContext(dict):
+    """Search fields of the last search plus a change counter and listeners"""
+
+    def __init__(self, **fields):
+        super().__init__(dict.fromkeys(SEARCH_FIELDS))
+        super().update(fields)
+        self.version = 0
+        self._listeners = []
+
+    def subscribe(self, callback):
+        """Call callback(context) after every change"""
+        self._listeners.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def update(self, *args, **fields):
+        """Set several fields as one change (one version bump, one notification)"""
+        super().update(*args, **fields)
+        self._changed()
+
+    def reset(self):
+        """Forget the last search"""
+        super().update(dict.fromkeys(SEARCH_FIELDS), results=[])
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        for callback in list(self._listeners):
+            callback(self)
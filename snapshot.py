@@ -0,0 +1,58 @@
+"""
+snapshot.py: Headless data loading for batch tools
+
+Runs the same load / validate / prepare steps as gui.App on a data directory,
+without opening a Tk window, so batch scripts price with exactly the data the
+GUI would show. One DataSnapshot per data directory; compare two directories
+by loading two snapshots.
+
+Data directories of older releases may lack files added since; those listed
+in BUNDLED_FALLBACK_FILES are then read from the bundled data directory.
+"""
+
+import contextlib
+import io
+import os
+
+from gui import App, BASEDIR, JSONDIR
+
+# Files that do not affect chart prices, added after the first releases
+BUNDLED_FALLBACK_FILES = ('multiseg_rules.json',)
+
+
+class DataSnapshot:
+    """Prepared data of one data directory (the attributes gui.App would have)"""
+
+    load_all_data = App.load_all_data
+    validate_data = App.validate_data
+    prepare_partnerships = App.prepare_partnerships
+    prepare_tab1_data = App.prepare_tab1_data
+    prepare_tab2_data = App.prepare_tab2_data
+    prepare_tab4_data = App.prepare_tab4_data
+
+    def __init__(self, jsondir=JSONDIR):
+        self.BASEDIR = BASEDIR
+        self.JSONDIR = jsondir
+
+        self.load_all_data()
+        self.validate_data()
+        self.prepare_partnerships()
+        self.prepare_tab1_data()
+        self.prepare_tab2_data()
+        self.prepare_tab4_data()
+
+    def data_file_path(self, filename):
+        """Path of a data file in jsondir, or the bundled copy of a file older releases lack"""
+        filepath = os.path.join(self.JSONDIR, filename)
+        if filename in BUNDLED_FALLBACK_FILES and not os.path.exists(filepath):
+            filepath = os.path.join(JSONDIR, filename)
+        return filepath
+
+
+def load_snapshot(jsondir=JSONDIR, verbose=False):
+    """DataSnapshot of jsondir; the GUI's progress lines are only printed when verbose"""
+    if verbose:
+        return DataSnapshot(jsondir)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataSnapshot(jsondir)
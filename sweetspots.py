@@ -0,0 +1,222 @@
+"""
+sweetspots.py: Award sweet-spot scanner
+
+Batch job that lists every zone pair, distance band and domestic price of
+every award chart and cabin, gives each a representative flown distance, and
+ranks them by miles per flown mile (lower is better value). Run it after every
+data update to regenerate the report:
+
+    python sweetspots.py --output sweet_spots.csv
+
+Representative distances:
+  zone pair     median great-circle distance over a fixed sample of airport
+                pairs between the two zones (the median pair is reported)
+  domestic      the same, within the country
+  distance band midpoint of the band; open-ended top bands (beyond the
+                longest possible flight) use their lower edge
+
+Charts are scanned in a process pool. Workers receive the airport samples
+once at start-up; each task is one chart's price table.
+"""
+
+import argparse
+import csv
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from charts import TABLE_BAND, TABLE_DOMESTIC
+from engine import EARTH_RADIUS_MILES
+from snapshot import load_snapshot
+
+# Airports sampled per zone/country, evenly spread over its IATA codes
+SAMPLE_AIRPORTS = 40
+
+# Half the earth's circumference: no flight is longer
+MAX_FLOWN_MILES = round(math.pi * EARTH_RADIUS_MILES)
+
+REPORT_COLUMNS = ['rank', 'ffp', 'program', 'chart', 'applies_to', 'cabin', 'kind', 'from', 'to',
+                  'miles', 'distance', 'miles_per_mile', 'sample_orig', 'sample_dest']
+
+
+# ==================== AIRPORT SAMPLES ====================
+
+def _sample(codes, coords):
+    """Up to SAMPLE_AIRPORTS (iata, lat, lon, cos_lat) spread evenly over sorted codes"""
+    codes = sorted(codes)
+    step = max(1, len(codes) / SAMPLE_AIRPORTS)
+    picked = [codes[int(i * step)] for i in range(min(len(codes), SAMPLE_AIRPORTS))]
+    return tuple((code,) + coords[code] for code in picked)
+
+
+def build_samples(engine, zone_system_names):
+    """
+    Airport samples per zone and per country.
+
+    Returns {zone_system_name: {zone: sample}} and {country: sample}.
+    """
+    coords = engine.coords
+
+    zones = {}
+    for name in zone_system_names:
+        members = {}
+        for code in coords:
+            zone = engine.zone_of(code, name)
+            if zone:
+                members.setdefault(zone, []).append(code)
+        zones[name] = {zone: _sample(codes, coords) for zone, codes in members.items()}
+
+    members = {}
+    for code in coords:
+        members.setdefault(engine.airports[code][1], []).append(code)
+    countries = {country: _sample(codes, coords) for country, codes in members.items()}
+
+    return zones, countries
+
+
+def _median_pair(sample_a, sample_b):
+    """(distance, orig, dest) of the median-distance pair between two samples, or None"""
+    sin = math.sin
+    asin = math.asin
+    sqrt = math.sqrt
+
+    pairs = []
+    for code_a, lat1, lon1, cos1 in sample_a:
+        for code_b, lat2, lon2, cos2 in sample_b:
+            if code_a == code_b:
+                continue
+            a = sin((lat2 - lat1) / 2) ** 2 + cos1 * cos2 * sin((lon2 - lon1) / 2) ** 2
+            pairs.append((round(EARTH_RADIUS_MILES * 2 * asin(sqrt(a))), code_a, code_b))
+
+    if not pairs:
+        return None
+
+    pairs.sort()
+    return pairs[len(pairs) // 2]
+
+
+# ==================== WORKER ====================
+
+# Set in each worker process by _init_worker
+_zone_samples = None
+_country_samples = None
+_pair_memo = {}
+
+
+def _init_worker(zone_samples, country_samples):
+    global _zone_samples, _country_samples
+    _zone_samples = zone_samples
+    _country_samples = country_samples
+    _pair_memo.clear()
+
+
+def _representative(zone_system, kind, a, b):
+    """(distance, orig, dest) representing one price table row, or None if unreachable"""
+    if kind == TABLE_BAND:
+        if a > MAX_FLOWN_MILES:
+            return None
+        return (a if b >= MAX_FLOWN_MILES else (a + b) // 2, '', '')
+
+    if kind == TABLE_DOMESTIC:
+        if a is None:
+            return None
+        samples = _country_samples
+        key = (None, a)
+    else:
+        samples = _zone_samples.get(zone_system, {})
+        key = (zone_system, a, b)
+
+    if key not in _pair_memo:
+        sample_a = samples.get(a)
+        sample_b = samples.get(b)
+        _pair_memo[key] = _median_pair(sample_a, sample_b) if sample_a and sample_b else None
+    return _pair_memo[key]
+
+
+def _scan_chart(task):
+    """Sweet-spot rows of one chart: (miles_per_mile, ...report fields)"""
+    chart_name, zone_system, entries = task
+    rows = []
+
+    for cabin, kind, a, b, miles in entries:
+        located = _representative(zone_system, kind, a, b)
+        if located is None or not located[0]:
+            continue
+
+        distance, orig, dest = located
+        rows.append((miles / distance, chart_name, cabin, kind, a, b, miles, distance, orig, dest))
+
+    return rows
+
+
+# ==================== SCAN ====================
+
+def scan_sweet_spots(snapshot, workers=None, cabins=None):
+    """All chart price table rows ranked by miles per flown mile, best value first"""
+    engine = snapshot.engine
+
+    tasks = []
+    for chart_name, chart in engine.award_charts.items():
+        entries = [entry for entry in chart.entries() if cabins is None or entry[0] in cabins]
+        if entries:
+            tasks.append((chart_name, chart.zone_system, entries))
+
+    zone_system_names = sorted({zone_system for _, zone_system, _ in tasks if zone_system})
+    zone_samples, country_samples = build_samples(engine, zone_system_names)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(zone_samples, country_samples)) as pool:
+        for chart_rows in pool.map(_scan_chart, tasks):
+            rows.extend(chart_rows)
+
+    rows.sort(key=lambda row: (row[0], row[1], row[2], str(row[4]), str(row[5])))
+    return rows
+
+
+def write_report(fileobj, snapshot, rows):
+    """Write ranked scan rows as CSV"""
+    award_chart_dict = snapshot.award_chart_dict
+    ffp_dict = snapshot.ffp_dict_redeem
+
+    writer = csv.writer(fileobj)
+    writer.writerow(REPORT_COLUMNS)
+
+    for rank, (per_mile, chart_name, cabin, kind, a, b, miles, distance, orig, dest) in enumerate(rows, start=1):
+        chart = award_chart_dict[chart_name]
+        ffp_code = chart.get('ffp_code')
+        applies_to = chart.get('applies_to')
+        if chart.get('specific_partners'):
+            applies_to = ' '.join(chart['specific_partners'])
+
+        writer.writerow([rank, ffp_code, ffp_dict[ffp_code].get('name'), chart_name, applies_to, cabin, kind,
+                         '' if a is None else a, '' if b is None else b,
+                         miles, distance, f'{per_mile:.3f}', orig, dest])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rank award chart prices by miles per flown mile.')
+    parser.add_argument('--data-dir', default=None, help='data directory (default: assets/data)')
+    parser.add_argument('--output', default='sweet_spots.csv', help='CSV report path')
+    parser.add_argument('--cabin', action='append', help='only this cabin (repeatable)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--top', type=int, default=20, help='rows to print')
+    args = parser.parse_args(argv)
+
+    snapshot = load_snapshot(args.data_dir) if args.data_dir else load_snapshot()
+    rows = scan_sweet_spots(snapshot, workers=args.workers, cabins=args.cabin)
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        write_report(f, snapshot, rows)
+
+    print(f'✓ Ranked {len(rows)} chart prices into {os.path.abspath(args.output)}')
+    for per_mile, chart_name, cabin, kind, a, b, miles, distance, orig, dest in rows[:args.top]:
+        where = f'{a}-{b}' if kind != TABLE_DOMESTIC else f'{a} domestic'
+        print(f'{per_mile:7.3f}  {chart_name:<22}{cabin:<17}{where:<30}{miles:>7} mi  {distance:>6} flown')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,17 +11,18 @@ from tkinter import ttk, messagebox
 class Tab1Frame(ttk.Frame):
     """Tab 1: Eligibility Finder"""
 
-    def __init__(self, parent, carriers_country_tab1, carrierlist_tab1, ffp_dict_redeem):
+    def __init__(self, parent, carriers_country_tab1, carrier_hierarchy_tab1, country_index_tab1, ffp_dict_redeem):
         super().__init__(parent)
 
         # Store pre-processed data
         self.carriers_country_tab1 = carriers_country_tab1
-        self.carrierlist_tab1 = carrierlist_tab1
+        self.carrier_hierarchy_tab1 = carrier_hierarchy_tab1  # country -> alliance -> carrier names
+        self.country_index_tab1 = country_index_tab1
         self.ffp_dict_redeem = ffp_dict_redeem
 
         # Current filter states
         self.alliance_filtered = []
-        self.carrierlist_tab1_filtered = []
+        self.country_search_state = None
 
         # Setup UI
         self._setup_ui()
@@ -96,15 +97,15 @@ class Tab1Frame(ttk.Frame):
 
     def _on_country_search(self, event):
         """Filter country dropdown as user types"""
-        typed = self.country_var.get().lower()
+        typed = self.country_var.get().strip()
         if not typed:
+            self.country_search_state = None
             self.country_combo['values'] = self.carriers_country_tab1
             return
 
-        # Filter countries that match typed text (code or name)
-        filtered = [country for country in self.carriers_country_tab1 
-                   if typed in country.lower()]
-        self.country_combo['values'] = filtered
+        # Filter countries that match typed text (code or name), narrowing from the last keystroke
+        self.country_search_state = self.country_index_tab1.match(typed, self.country_search_state)
+        self.country_combo['values'] = self.country_index_tab1.values(self.country_search_state)
 
     def _on_country_selected(self, event):
         """Handle country selection - filter alliances"""
@@ -112,18 +113,8 @@ class Tab1Frame(ttk.Frame):
         if not selected_country:
             return
 
-        # Filter carriers for this country
-        self.carrierlist_tab1_filtered = [
-            carrier for carrier in self.carrierlist_tab1 
-            if carrier['country'] == selected_country
-        ]
-
-        # Get unique alliances in this country
-        self.alliance_filtered = []
-        for carrier in self.carrierlist_tab1_filtered:
-            alliance = carrier['alliance']
-            if alliance not in self.alliance_filtered:
-                self.alliance_filtered.append(alliance)
+        # Alliances present in this country, in first-seen order
+        self.alliance_filtered = list(self.carrier_hierarchy_tab1.get(selected_country, {}))
 
         # Update alliance dropdown
         self.alliance_combo['values'] = self.alliance_filtered
@@ -143,14 +134,8 @@ class Tab1Frame(ttk.Frame):
 
         selected_country = self.country_var.get()
 
-        # Filter carriers by country and alliance
-        carriers_filtered = [
-            carrier for carrier in self.carrierlist_tab1 
-            if carrier['country'] == selected_country and carrier['alliance'] == selected_alliance
-        ]
-
-        # Extract carrier names for display
-        carriers_name_display = [carrier['name'] for carrier in carriers_filtered]
+        # Look up carriers by country and alliance
+        carriers_name_display = self.carrier_hierarchy_tab1.get(selected_country, {}).get(selected_alliance, [])
 
         # Update carrier dropdown
         self.carrier_combo['values'] = carriers_name_display
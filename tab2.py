@@ -2,39 +2,62 @@
 tab2_v2.py: Award Chart Lookup - Simplified with Pre-processed Data
 
 Core logic moved to gui.py startup.
-Tab receives pre-processed data structures and handles UI + search logic.
+Tab receives pre-processed data structures and a pricing engine
+(engine.PricingEngine), and handles UI + search orchestration.
 Updated to support multi-segment search functionality.
 
 LOGIC STRICTLY FOLLOWS tab2_example.py structure.
 """
 
+import os
+import textwrap
 import tkinter as tk
-from tkinter import ttk, messagebox
-import math
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk, messagebox, filedialog
+
+from budget import BudgetIndex
+from engine import SWEEP_FILTERS, write_sweep_csv
+from routes import RouteFinder, TICKET_SINGLE, load_route_network
+from result_view import ResultView
+from results import PriceResult, PriceStatus, format_miles
+
+# Autocomplete tuning: wait for typing to pause, and never push more than
+# this many airports into a combobox dropdown at once
+AUTOCOMPLETE_DEBOUNCE_MS = 120
+AUTOCOMPLETE_MAX_RESULTS = 200
+
+# Wildcard carrier entry: price every carrier x FFP for the route in one engine call
+ANY_CARRIER = '*'
+ANY_CARRIER_DISP = '* - Any carrier'
+
+# How often the UI checks on a miles index being built in the background
+BUDGET_POLL_MS = 100
+
+# Cabin entry that prices every cabin at once into a program x cabin grid
+ALL_CABINS = 'all cabins'
 
 
 class Tab2Frame(ttk.Frame):
     """Tab 2: Award Chart Lookup"""
 
-    def __init__(self, parent, app, airports_disp, airports_list, carriers_disp,
-                 ffp_dict_redeem, award_chart_dict, legal_zone_type, zone_system_dict,
-                 alliance_members=None):
+    def __init__(self, parent, app, airports_disp, airport_index, airport_text_index, carriers_disp, engine):
         super().__init__(parent)
         self.app = app
 
         # Store pre-processed data
         self.airports_disp = airports_disp
-        self.airports_list = airports_list
+        self.airport_index = airport_index
+        self.airport_text_index = airport_text_index
         self.carriers_disp = carriers_disp
-        self.ffp_dict_redeem = ffp_dict_redeem
-        self.award_chart_dict = award_chart_dict
-        self.legal_zone_type = legal_zone_type
-        self.zone_system_dict = zone_system_dict
 
-        # Alliance members (for multi-segment)
-        self.OW_member = alliance_members[0].get('members')
-        self.SA_member = alliance_members[1].get('members')
-        self.ST_member = alliance_members[2].get('members')
+        # Immutable pricing snapshot (engine.PricingEngine); all search logic lives there
+        self.engine = engine
+
+        # Per-origin miles index for budget queries, built on first use per origin
+        # in a worker thread so the UI stays responsive
+        self.budget_index = BudgetIndex(engine)
+        self._budget_executor = ThreadPoolExecutor(max_workers=1)
+        self._budget_request = None
 
         # Cabin options (hard-coded)
         self.possible_cabins = ['economy', 'premium_economy', 'business', 'first']
@@ -42,6 +65,20 @@ class Tab2Frame(ttk.Frame):
         # Segment storage
         self.segments = []
 
+        # Pending debounced autocomplete jobs, keyed by (segment_index, location_type)
+        self._filter_jobs = {}
+
+        # Route finder over a user-loaded route network file, None until one is loaded
+        self.route_finder = None
+
+        # Last destination sweep, kept for CSV export: (origin, carrier, cabin, rows)
+        self._last_sweep = None
+
+        # Full airport / carrier lists as Tcl variables: converted once, then every
+        # segment combobox references the same Tcl list object
+        self._airport_values = self._shared_values('airports', self.airports_disp)
+        self._carrier_values = self._shared_values('carriers', [ANY_CARRIER_DISP] + self.carriers_disp)
+
         # Setup UI
         self._setup_ui()
 
@@ -103,6 +140,69 @@ class Tab2Frame(ttk.Frame):
         delete_segment_button = ttk.Button(buttons_frame, text="- Delete Last", command=self._delete_segment_click)
         delete_segment_button.grid(row=0, column=2, sticky="ew", padx=2)
 
+        # Nearby alternatives: also price origins/destinations within a radius (single segment)
+        nearby_frame = ttk.Frame(buttons_frame)
+        nearby_frame.grid(row=1, column=0, columnspan=3, sticky="w", pady=(5, 0))
+
+        self.nearby_var = tk.BooleanVar(value=False)
+        nearby_check = ttk.Checkbutton(nearby_frame, text="Also price airports within", variable=self.nearby_var)
+        nearby_check.grid(row=0, column=0, sticky='w')
+
+        self.nearby_radius_var = tk.StringVar(value='100')
+        nearby_radius_entry = ttk.Entry(nearby_frame, textvariable=self.nearby_radius_var, width=6)
+        nearby_radius_entry.grid(row=0, column=1, padx=2)
+
+        ttk.Label(nearby_frame, text="miles (one carrier, one cabin)").grid(row=0, column=2, sticky='w')
+
+        # Sweep frame: segment 1 origin/carrier/cabin against every destination in a region
+        sweep_frame = ttk.LabelFrame(left_frame, text="Destination Sweep (uses Segment 1)", padding=5)
+        sweep_frame.grid(row=2, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+        sweep_frame.grid_columnconfigure(1, weight=1)
+
+        self.sweep_kind_var = tk.StringVar(value=SWEEP_FILTERS[0])
+        sweep_kind_combo = ttk.Combobox(sweep_frame, textvariable=self.sweep_kind_var, state='readonly', width=10)
+        sweep_kind_combo['values'] = SWEEP_FILTERS
+        sweep_kind_combo.grid(row=0, column=0, sticky='w', padx=2)
+
+        # continent code (AS), country code (JP) or zone as SYSTEM:ZONE (AA:EU)
+        self.sweep_value_var = tk.StringVar()
+        sweep_value_entry = ttk.Entry(sweep_frame, textvariable=self.sweep_value_var, width=15)
+        sweep_value_entry.grid(row=0, column=1, sticky='ew', padx=2)
+
+        sweep_button = ttk.Button(sweep_frame, text="Sweep", command=self._on_sweep_destinations)
+        sweep_button.grid(row=0, column=2, padx=2)
+
+        export_button = ttk.Button(sweep_frame, text="Export CSV", command=self._on_export_sweep)
+        export_button.grid(row=0, column=3, padx=2)
+
+        # Budget frame: everywhere segment 1's origin/cabin reaches for at most N miles
+        budget_frame = ttk.LabelFrame(left_frame, text="Miles Budget (uses Segment 1)", padding=5)
+        budget_frame.grid(row=3, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+        budget_frame.grid_columnconfigure(1, weight=1)
+
+        ttk.Label(budget_frame, text="Max miles:").grid(row=0, column=0, sticky='w', padx=2)
+
+        self.budget_var = tk.StringVar()
+        budget_entry = ttk.Entry(budget_frame, textvariable=self.budget_var, width=15)
+        budget_entry.grid(row=0, column=1, sticky='ew', padx=2)
+
+        budget_button = ttk.Button(budget_frame, text="Where can I go?", command=self._on_budget_search)
+        budget_button.grid(row=0, column=2, padx=2)
+
+        # Route finder frame: cheapest multi-hop itineraries over a route network file
+        route_frame = ttk.LabelFrame(left_frame, text="Route Finder (uses Segment 1)", padding=5)
+        route_frame.grid(row=4, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+        route_frame.grid_columnconfigure(0, weight=1)
+
+        self.route_file_var = tk.StringVar(value="No route network loaded")
+        ttk.Label(route_frame, textvariable=self.route_file_var).grid(row=0, column=0, sticky='w', padx=2)
+
+        load_routes_button = ttk.Button(route_frame, text="Load Routes...", command=self._on_load_routes)
+        load_routes_button.grid(row=0, column=1, padx=2)
+
+        find_routes_button = ttk.Button(route_frame, text="Cheapest Routes", command=self._on_find_routes)
+        find_routes_button.grid(row=0, column=2, padx=2)
+
         # ==================== RIGHT FRAME: Results ====================
 
         results_frame = ttk.LabelFrame(self, text="Award Results", padding=10)
@@ -110,29 +210,13 @@ class Tab2Frame(ttk.Frame):
         results_frame.grid_rowconfigure(0, weight=1)
         results_frame.grid_columnconfigure(0, weight=1)
 
-        # Results display
-        results_scrollbar = ttk.Scrollbar(results_frame, orient="vertical")
-        results_scrollbar.grid(row=0, column=1, sticky="ns")
-
-        self.results_listbox = tk.Listbox(
-            results_frame,
-            yscrollcommand=results_scrollbar.set,
-            height=25,
-            font=("Courier", 10),
-            bg="#f5f5f5"
-        )
-
-        self.results_listbox.grid(row=0, column=0, sticky="nsew")
-        results_scrollbar.config(command=self.results_listbox.yview)
-
-        # Mouse wheel scrolling for results
-        self.results_listbox.bind("<MouseWheel>", lambda e: self.results_listbox.yview_scroll(int(-1 * e.delta / 120), "units"))
-        self.results_listbox.bind("<Button-4>", lambda e: self.results_listbox.yview_scroll(-1, "units"))
-        self.results_listbox.bind("<Button-5>", lambda e: self.results_listbox.yview_scroll(1, "units"))
+        # Results display: lines stay in memory, only the visible window is rendered
+        self.results_view = ResultView(results_frame, font=("Courier", 10), bg="#f5f5f5", height=25)
+        self.results_view.grid(row=0, column=0, sticky="nsew")
 
         # Initial message
-        self.results_listbox.insert(tk.END, "Configure segments and click 'Search Awards'")
-        self.results_listbox.insert(tk.END, "to see available award options.")
+        self.results_view.append("Configure segments and click 'Search Awards'")
+        self.results_view.append("to see available award options.")
 
     # ==================== SEGMENT MANAGEMENT ====================
 
@@ -164,30 +248,30 @@ class Tab2Frame(ttk.Frame):
         # Origin
         ttk.Label(segment_frame, text="Origin:").grid(row=0, column=0, sticky='w', padx=5, pady=5)
         origin_combo = ttk.Combobox(segment_frame, textvariable=origin_var, state='normal', width=40)
-        origin_combo['values'] = self.airports_disp
+        self._set_shared_values(origin_combo, self._airport_values)
         origin_combo.grid(row=0, column=1, sticky='ew', padx=5, pady=5)
         origin_combo.bind('<<ComboboxSelected>>', lambda e, idx=segment_index: self._on_airport_changed(idx))
-        origin_combo.bind('<KeyRelease>', lambda e, idx=segment_index: self._filter_airports(idx, 'origin'))
+        origin_combo.bind('<KeyRelease>', lambda e, idx=segment_index: self._schedule_filter_airports(idx, 'origin'))
 
         # Destination
         ttk.Label(segment_frame, text="Destination:").grid(row=1, column=0, sticky='w', padx=5, pady=5)
         dest_combo = ttk.Combobox(segment_frame, textvariable=dest_var, state='normal', width=40)
-        dest_combo['values'] = self.airports_disp
+        self._set_shared_values(dest_combo, self._airport_values)
         dest_combo.grid(row=1, column=1, sticky='ew', padx=5, pady=5)
         dest_combo.bind('<<ComboboxSelected>>', lambda e, idx=segment_index: self._on_airport_changed(idx))
-        dest_combo.bind('<KeyRelease>', lambda e, idx=segment_index: self._filter_airports(idx, 'dest'))
+        dest_combo.bind('<KeyRelease>', lambda e, idx=segment_index: self._schedule_filter_airports(idx, 'dest'))
 
         # Carrier
         ttk.Label(segment_frame, text="Carrier:").grid(row=2, column=0, sticky='w', padx=5, pady=5)
         carrier_combo = ttk.Combobox(segment_frame, textvariable=carrier_var, state='normal', width=40)
-        carrier_combo['values'] = self.carriers_disp
+        self._set_shared_values(carrier_combo, self._carrier_values)
         carrier_combo.grid(row=2, column=1, sticky='ew', padx=5, pady=5)
         carrier_combo.bind('<KeyRelease>', lambda e, idx=segment_index: self._filter_carriers(idx))
 
         # Cabin
         ttk.Label(segment_frame, text="Cabin:").grid(row=3, column=0, sticky='w', padx=5, pady=5)
         cabin_combo = ttk.Combobox(segment_frame, textvariable=cabin_var, state='readonly', width=40)
-        cabin_combo['values'] = self.possible_cabins
+        cabin_combo['values'] = self.possible_cabins + [ALL_CABINS]
         cabin_combo.grid(row=3, column=1, sticky='ew', padx=5, pady=5)
 
         # Distance
@@ -206,7 +290,10 @@ class Tab2Frame(ttk.Frame):
             'origin_combo': origin_combo,
             'dest_combo': dest_combo,
             'carrier_combo': carrier_combo,
-            'cabin_combo': cabin_combo
+            'cabin_combo': cabin_combo,
+            # Last index state per field, for incremental narrowing
+            'origin_filter': None,
+            'dest_filter': None
         }
 
         self.segments.append(segment_data)
@@ -217,6 +304,16 @@ class Tab2Frame(ttk.Frame):
             if prev_dest:
                 origin_var.set(prev_dest)
 
+    def _shared_values(self, name, values):
+        """Store a value list once as a global Tcl list variable; returns its name"""
+        var_name = f'::tab2_{name}_values'
+        self.tk.call('set', var_name, tuple(values))
+        return var_name
+
+    def _set_shared_values(self, combo, var_name):
+        """Point a combobox at a shared Tcl list without converting it again"""
+        self.tk.eval(f'{combo} configure -values ${var_name}')
+
     def _add_segment_click(self):
         """Handle Add Segment button click"""
         self._add_segment_panel()
@@ -231,6 +328,12 @@ class Tab2Frame(ttk.Frame):
         last_segment = self.segments.pop()
         last_segment['frame'].destroy()
 
+        # Drop any autocomplete still pending for the removed panel
+        for location_type in ('origin', 'dest'):
+            job = self._filter_jobs.pop((len(self.segments), location_type), None)
+            if job:
+                self.after_cancel(job)
+
     # ==================== EVENT HANDLERS ====================
 
     def _on_airport_changed(self, segment_index):
@@ -249,13 +352,27 @@ class Tab2Frame(ttk.Frame):
 
             # Calculate and set GC distance
             try:
-                distance = self._calculateGcdistance(origin_code, dest_code)
+                distance = self.engine.distance(origin_code, dest_code)
                 segment['distance_var'].set(str(distance))
             except Exception as e:
                 messagebox.showerror("Distance Calculation Error", str(e))
 
+    def _schedule_filter_airports(self, segment_index, location_type):
+        """Debounce airport filtering so only the last keystroke of a burst runs"""
+        key = (segment_index, location_type)
+
+        job = self._filter_jobs.pop(key, None)
+        if job:
+            self.after_cancel(job)
+
+        self._filter_jobs[key] = self.after(
+            AUTOCOMPLETE_DEBOUNCE_MS,
+            lambda: self._filter_airports(segment_index, location_type))
+
     def _filter_airports(self, segment_index, location_type):
-        """Filter airports based on user input - match IATA code"""
+        """Filter airports based on user input - IATA prefix, or name/region/country text"""
+        self._filter_jobs.pop((segment_index, location_type), None)
+
         if segment_index >= len(self.segments):
             return
 
@@ -268,19 +385,42 @@ class Tab2Frame(ttk.Frame):
             var = segment['dest_var']
             combo = segment['dest_combo']
 
+        state_key = location_type + '_filter'
         user_input = var.get().strip().upper()
 
         if not user_input:
-            combo['values'] = self.airports_disp
+            if segment[state_key] is not None:
+                self._set_shared_values(combo, self._airport_values)
+                segment[state_key] = None
             return
 
-        # Filter by IATA code (first part before ' - ')
-        filtered = [
-            airport for airport in self.airports_disp
-            if airport.split(' - ')[0].strip().upper().startswith(user_input)
-        ]
+        # Short input is an IATA prefix; longer input is a ranked text search.
+        # Both narrow from the previous keystroke of the same kind.
+        if len(user_input) < 3:
+            index = self.airport_index
+            kind = 'prefix'
+        else:
+            index = self.airport_text_index
+            kind = 'text'
 
-        combo['values'] = filtered
+        previous = segment[state_key]
+        if previous and previous[0] != kind:
+            previous = None
+
+        if kind == 'prefix':
+            state = index.prefix_range(user_input, previous and previous[1])
+        else:
+            state = index.match(user_input, previous and previous[1])
+        segment[state_key] = (kind, state)
+
+        # Same matches as last time: nothing to send to Tcl. Text matches are
+        # ranked by the query, so there the query must be the same too
+        if previous:
+            unchanged = previous[1] == state if kind == 'text' else previous[1][1:] == state[1:]
+            if unchanged:
+                return
+
+        combo['values'] = index.values(state, AUTOCOMPLETE_MAX_RESULTS)
 
     def _filter_carriers(self, segment_index):
         """Filter carriers based on user input - match code or name"""
@@ -291,876 +431,17 @@ class Tab2Frame(ttk.Frame):
         user_input = segment['carrier_var'].get().strip().upper()
 
         if not user_input:
-            segment['carrier_combo']['values'] = self.carriers_disp
+            self._set_shared_values(segment['carrier_combo'], self._carrier_values)
             return
 
         # Filter by code or name
         filtered = [
-            carrier for carrier in self.carriers_disp
+            carrier for carrier in [ANY_CARRIER_DISP] + self.carriers_disp
             if user_input in carrier.upper()
         ]
 
         segment['carrier_combo']['values'] = filtered
 
-    # ==================== HELPER FUNCTIONS ====================
-
-    def _getAirportDetail(self, airport_iata):
-        """Get airport details by IATA code"""
-        for airport in self.airports_list:
-            code = airport.get('iata_code')
-            if code == airport_iata:
-                continent = airport.get('continent')
-                country = airport.get('iso_country')
-                region = airport.get('iso_region')
-                lat = airport.get('latitude_deg')
-                lon = airport.get('longitude_deg')
-                full_name = airport.get('name')
-                return continent, country, region, lat, lon, full_name
-
-        raise ValueError(f'Airport mismatch: {airport_iata} not found')
-
-    def _calculateGcdistance(self, orig, dest):
-        """Calculate great-circle distance between two airports"""
-        _, _, _, lat1, lon1, _ = self._getAirportDetail(orig)
-        _, _, _, lat2, lon2, _ = self._getAirportDetail(dest)
-
-        lat1 = math.radians(lat1)
-        lat2 = math.radians(lat2)
-        lon1 = math.radians(lon1)
-        lon2 = math.radians(lon2)
-
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-        c = 2 * math.asin(math.sqrt(a))
-
-        earth_radius_miles = 3959
-        distance = round(earth_radius_miles * c)
-
-        return distance
-
-    def _stripZones(self, chartValue, wrappername):
-        """Extract zones and from-to pairs in zone-based systems"""
-        chartValue = chartValue.get(wrappername)
-        origdestpair = []
-
-        for _, value in chartValue.items():
-            for iv in range(len(value)):
-                datadict = value[iv]
-                pair = [datadict.get('from'), datadict.get('to')]
-                if pair not in origdestpair:
-                    origdestpair.append(pair)
-
-        return origdestpair
-
-    def _stripZones2(self, chartValue, wrappername):
-        """Extract zones from route_specific restrictions"""
-        chartValue = chartValue.get(wrappername)
-        origdestpair = []
-
-        for i in range(len(chartValue)):
-            datadict = chartValue[i]
-            pair = [datadict.get('from'), datadict.get('to')]
-            if pair not in origdestpair:
-                origdestpair.append(pair)
-
-        return origdestpair
-
-    def _fitAirportWithZone(self, airport_iata, zonedict):
-        """Match airport to zone based on continent/country/region/airport"""
-        continent, country, region, _, _, _ = self._getAirportDetail(airport_iata)
-
-        for name, value in zonedict.items():
-            isInInclude = False
-            isInExclude = False
-
-            I0 = value.get(self.legal_zone_type[0])  # continents
-            I1 = value.get(self.legal_zone_type[1])  # countries
-            I2 = value.get(self.legal_zone_type[2])  # regions
-            I3 = value.get(self.legal_zone_type[3])  # airports
-            E0 = value.get(self.legal_zone_type[4])  # countries_exclude
-            E1 = value.get(self.legal_zone_type[5])  # regions_exclude
-            E2 = value.get(self.legal_zone_type[6])  # airports_exclude
-
-            if I0 and continent in I0:
-                isInInclude = True
-            if I1 and country in I1:
-                isInInclude = True
-            if I2 and region in I2:
-                isInInclude = True
-            if I3 and airport_iata in I3:
-                isInInclude = True
-
-            if E0 and country in E0:
-                isInExclude = True
-            if E1 and region in E1:
-                isInExclude = True
-            if E2 and airport_iata in E2:
-                isInExclude = True
-
-            if isInInclude and not isInExclude:
-                return name
-
-        return None
-
-    def _matchItineraryWithZonePairs(self, pairs, awardchartdict, orig_iata, dest_iata):
-        """Check if itinerary matches zone-based pairs"""
-        zonename = awardchartdict.get('zone_system')
-        zone_system = self.zone_system_dict[zonename]['zones']
-
-        orig_zone = self._fitAirportWithZone(orig_iata, zone_system)
-        dest_zone = self._fitAirportWithZone(dest_iata, zone_system)
-
-        if orig_zone and dest_zone:
-            for pair in pairs:
-                pair_to = pair[0]
-                pair_from = pair[1]
-            
-                pair_to = pair_to if isinstance(pair_to, list) else [pair_to]
-                pair_from = pair_from if isinstance(pair_from, list) else [pair_from]
-
-                if (orig_zone in pair_to and dest_zone in pair_from) or (orig_zone in pair_from and dest_zone in pair_to):
-                    return True
-
-        return False
-
-    # ==================== FIND CHART LOGIC ====================
-
-    def _findChart_attachChart(self, ffpcode, ffpname, chartname, allchartlist):
-        """Attach chart to results list"""
-        chart = dict(ffp_disp_name=ffpname, ffp=ffpcode, chart_name=chartname)
-        allchartlist.append(chart)
-        return allchartlist, True
-
-    def _findChart_SingleSeg(self, orig, dest, distance, carrier, ffp_dict=None):
-        """Find which award chart each FFP should use for this segment"""
-        chart_allffp = []
-
-        # Use provided scope or default to full list
-        search_scope = ffp_dict if ffp_dict else self.ffp_dict_redeem
-
-        for ffp_code, value in search_scope.items():
-            ffp_name = value.get('name')
-            ffp_self_carriers = value.get('carriers')
-            ffp_redeem_partner = value.get('redeem_partner')
-
-            award_chart_ffpspecific = {
-                name2: value2
-                for name2, value2 in self.award_chart_dict.items()
-                if value2.get('ffp_code') == ffp_code and not value2.get('applies_to_multiple')
-            }
-
-            chart_candidates = {}
-            flg = 0
-
-            # Determine if self-redeem or partner-redeem
-            if carrier in ffp_self_carriers:
-                # Self redeem case
-                for chart_name, chart_content in award_chart_ffpspecific.items():
-                    if chart_content['ffp_code'] == ffp_code and chart_content['applies_to'] == 'self':
-                        chart_candidates[chart_name] = chart_content
-
-            elif ffp_redeem_partner and carrier in ffp_redeem_partner:
-                # Partner redeem case
-                award_chart_ffpspecific_specpart = {
-                    name3: value3
-                    for name3, value3 in award_chart_ffpspecific.items()
-                    if value3.get('applies_to') == "specific"
-                }
-
-                award_chart_ffpspecific_genpart = {
-                    name4: value4
-                    for name4, value4 in award_chart_ffpspecific.items()
-                    if value4.get('applies_to') == "all_partners"
-                }
-
-                if award_chart_ffpspecific_specpart:
-                    # Program has partner-specific chart
-                    for name5, value5 in award_chart_ffpspecific_specpart.items():
-                        if carrier in value5.get('specific_partners'):
-                            chart_candidates[name5] = value5
-
-                    if not chart_candidates:
-                        # Program has special charts, but not for this specific carrier
-                        if award_chart_ffpspecific_genpart:
-                            for name6, value6 in award_chart_ffpspecific_genpart.items():
-                                chart_candidates[name6] = value6
-
-                elif award_chart_ffpspecific_genpart:
-                    # Program only has general partner chart
-                    for name7, value7 in award_chart_ffpspecific_genpart.items():
-                        chart_candidates[name7] = value7
-
-                else:
-                    # Program has no defined partner chart despite having partners
-                    flg = 1
-                    print(f'Program {ffp_name} has no defined partner chart despite having partners.')
-
-            else:
-                # Carrier is not a partner with this FFP (normal case)
-                flg = 2
-
-            # Process chart candidates if applicable
-            if flg == 0:
-                if len(chart_candidates) == 0:
-                    print(f'No chart found for carrier {carrier} in program {ffp_name}')
-
-                elif len(chart_candidates) == 1:
-                    # Only one applicable chart
-                    (name, value), = chart_candidates.items()
-                    chart = dict(ffp_disp_name=ffp_name, ffp=ffp_code, chart_name=name)
-                    chart_allffp.append(chart)
-
-                else:
-                    # Multiple charts - need to determine priority
-                    num_specialoverwrite = 0
-                    num_domoverwrite = 0
-                    num_normchart = 0
-
-                    for name, value in chart_candidates.items():
-                        if value.get('is_special_overwrite'):
-                            num_specialoverwrite += 1
-                        elif value.get('is_domestic_overwrite'):
-                            num_domoverwrite += 1
-                        else:
-                            num_normchart += 1
-
-                    if num_specialoverwrite > 1 or num_domoverwrite > 1 or num_normchart < 1:
-                        raise ValueError('More than 1 special chart. Unexpected')
-
-                    isFoundChart = False
-
-                    # Priority 1: Special overwrite chart
-                    for name, value in chart_candidates.items():
-                        if value.get('is_special_overwrite'):
-                            if value.get('type') == "zone_based":
-                                pairs = self._stripZones(value, 'cabins')
-                                isRestrictMatch = self._matchItineraryWithZonePairs(pairs, value, orig, dest)
-
-                                if isRestrictMatch:
-                                    chart_allffp, isFoundChart = self._findChart_attachChart(
-                                        ffp_code, ffp_name, name, chart_allffp)
-                                    break
-
-                            elif value.get('type') == "distance_based":
-                                if value.get('route_specific'):
-                                    pairs = self._stripZones2(value, 'route_specific')
-                                    isRestrictMatch = self._matchItineraryWithZonePairs(pairs, value, orig, dest)
-
-                                    if isRestrictMatch:
-                                        chart_allffp, isFoundChart = self._findChart_attachChart(
-                                            ffp_code, ffp_name, name, chart_allffp)
-                                        break
-
-                    # Priority 2: Domestic overwrite chart
-                    if not isFoundChart:
-                        for name, value in chart_candidates.items():
-                            if value.get('is_domestic_overwrite'):
-                                _, orig_country, _, _, _, _ = self._getAirportDetail(orig)
-                                _, dest_country, _, _, _, _ = self._getAirportDetail(dest)
-
-                                if orig_country == dest_country:
-                                    if value.get('default'):
-                                        # Default domestic chart
-                                        chart_allffp, isFoundChart = self._findChart_attachChart(
-                                            ffp_code, ffp_name, name, chart_allffp)
-                                        break
-
-                                    elif value.get('exceptions'):
-                                        # Exception-based domestic chart
-                                        if orig_country in value.get('exceptions'):
-                                            chart_allffp, isFoundChart = self._findChart_attachChart(
-                                                ffp_code, ffp_name, name, chart_allffp)
-                                            break
-
-                    # Priority 3: Regular charts
-                    if not isFoundChart:
-                        if num_normchart == 1:
-                            for name, value in chart_candidates.items():
-                                if not value.get('is_domestic_overwrite') and not value.get('is_special_overwrite'):
-                                    chart_allffp, isFoundChart = self._findChart_attachChart(
-                                        ffp_code, ffp_name, name, chart_allffp)
-                                    break
-
-                        else:
-                            # Multiple normal charts with limits
-                            for name, value in chart_candidates.items():
-                                if value.get('type') == 'distance_based' and value.get('route_specific'):
-                                    pairs = self._stripZones2(value, 'route_specific')
-                                    isRestrictMatch = self._matchItineraryWithZonePairs(pairs, value, orig, dest)
-
-                                    if isRestrictMatch:
-                                        chart_allffp, isFoundChart = self._findChart_attachChart(
-                                            ffp_code, ffp_name, name, chart_allffp)
-                                        break
-
-                                elif value.get('type') == 'zone_based':
-                                    pairs = self._stripZones(value, 'cabins')
-                                    isRestrictMatch = self._matchItineraryWithZonePairs(pairs, value, orig, dest)
-
-                                    if isRestrictMatch:
-                                        chart_allffp, isFoundChart = self._findChart_attachChart(
-                                            ffp_code, ffp_name, name, chart_allffp)
-                                        break
-
-                        if not isFoundChart:
-                            raise ValueError('Somehow this FFP still has multiple charts for this search')
-
-        return chart_allffp
-
-    # ==================== FIND PRICE LOGIC ====================
-
-    def _findPrice_SingleSeg(self, datadict, orig_iata, dest_iata, cabin, distance):
-        """Calculate award miles for a single segment"""
-        chartname = datadict['chart_name']
-        chart = self.award_chart_dict[chartname]
-
-        def theDistMethod(valuelist, distance):
-            """Find price using distance-based method"""
-            flg = False
-            mile = 0
-            for value_entry in valuelist:
-                start_milage = value_entry['min_miles']
-                end_milage = value_entry['max_miles']
-                if start_milage <= distance <= end_milage:
-                    flg = True
-                    mile = value_entry['miles']
-                    break
-            return flg, mile
-
-        def theZoneMethod(valuelist, orig_zone, dest_zone):
-            """Find price using zone-based method"""
-            flg = False
-            mile = 0
-            for value_entry in valuelist:
-                start_zone = value_entry['from']
-                end_zone = value_entry['to']
-
-                start_zone = start_zone if isinstance(start_zone,list) else [start_zone]
-                end_zone = end_zone if isinstance(end_zone,list) else [end_zone]
-                if orig_zone and dest_zone:
-                    if (orig_zone in start_zone and dest_zone in end_zone) or (orig_zone in end_zone and dest_zone in start_zone):
-                        flg = True
-                        mile = value_entry['miles']
-                        break
-            return flg, mile
-
-        # Process different chart types
-        if chart.get('type') == 'distance_based':
-            value_wrap = chart['cabins']
-            if value_wrap.get(cabin):
-                value_cabin = value_wrap.get(cabin)
-                isfind, awardMiles = theDistMethod(value_cabin, distance)
-
-                if not isfind:
-                    datadict['award_miles'] = 'Distance exceeds award chart maximum.'
-                else:
-                    datadict['award_miles'] = awardMiles
-            else:
-                datadict['award_miles'] = 'This cabin is not available on this FFP.'
-
-        elif chart.get('type') == 'dynamic':
-            datadict['award_miles'] = 'Dynamic'
-
-        elif chart.get('type') == 'zone_based':
-            zonename = chart['zone_system']
-            zone_system = self.zone_system_dict[zonename]['zones']
-
-            orig_zone = self._fitAirportWithZone(orig_iata, zone_system)
-            dest_zone = self._fitAirportWithZone(dest_iata, zone_system)
-
-            if orig_zone and dest_zone:
-                value_wrap = chart['cabins']
-                if value_wrap.get(cabin):
-                    value_cabin = value_wrap.get(cabin)
-                    isfind, awardMiles = theZoneMethod(value_cabin, orig_zone, dest_zone)
-
-                    if not isfind:
-                        datadict['award_miles'] = 'Price of such route is not defined'
-                    else:
-                        datadict['award_miles'] = awardMiles
-                else:
-                    datadict['award_miles'] = 'This cabin is not available on this FFP.'
-            else:
-                datadict['award_miles'] = 'Origin or destination not included in the zone-based chart'
-
-        elif chart.get('type') == 'hybrid_distance_zone':
-            hybrid_priority = chart['priority']
-            zonename = chart['zone_system']
-            zone_system = self.zone_system_dict[zonename]['zones']
-
-            orig_zone = self._fitAirportWithZone(orig_iata, zone_system)
-            dest_zone = self._fitAirportWithZone(dest_iata, zone_system)
-
-            value_wrap = chart['cabins']
-            if value_wrap.get(cabin):
-                value_cabin = value_wrap.get(cabin)
-
-                if hybrid_priority == "zone_first":
-                    highPriorityList = value_cabin.get('zone_based')
-                    lowPriorityList = value_cabin.get('distance_based')
-
-                    if highPriorityList:
-                        isfind, awardMiles = theZoneMethod(highPriorityList, orig_zone, dest_zone)
-
-                        if isfind:
-                            datadict['award_miles'] = awardMiles
-                        elif lowPriorityList:
-                            isfind, awardMiles = theDistMethod(lowPriorityList, distance)
-
-                            if isfind:
-                                datadict['award_miles'] = awardMiles
-                            else:
-                                datadict['award_miles'] = 'Hybrid Zone unable to find such route.'
-                        else:
-                            datadict['award_miles'] = 'Hybrid Zone unable to find such route.'
-
-                    elif lowPriorityList:
-                        isfind, awardMiles = theDistMethod(lowPriorityList, distance)
-
-                        if isfind:
-                            datadict['award_miles'] = awardMiles
-                        else:
-                            datadict['award_miles'] = 'Hybrid Zone unable to find such route.'
-                    else:
-                        datadict['award_miles'] = 'Hybrid Zone unable to find such route.'
-
-                elif hybrid_priority == "distance_first":
-                    dist_thresh = chart['distance_threshold']
-                    highPriorityList = value_cabin.get('distance_based')
-                    lowPriorityList = value_cabin.get('zone_based')
-
-                    if distance <= dist_thresh and highPriorityList:
-                        isfind, awardMiles = theDistMethod(highPriorityList, distance)
-
-                        if isfind:
-                            datadict['award_miles'] = awardMiles
-                        else:
-                            datadict['award_miles'] = 'Hybrid Zone unable to find such route.'
-
-                    elif lowPriorityList:
-                        isfind, awardMiles = theZoneMethod(lowPriorityList, orig_zone, dest_zone)
-
-                        if isfind:
-                            datadict['award_miles'] = awardMiles
-                        else:
-                            datadict['award_miles'] = 'Hybrid Zone unable to find such route.'
-                    else:
-                        datadict['award_miles'] = 'Hybrid Zone unable to find such route.'
-                else:
-                    datadict['award_miles'] = 'Hybrid Zone unable to find such route.'
-
-            else:
-                datadict['award_miles'] = 'This cabin is not available on this FFP.'
-
-        elif chart.get("is_domestic_overwrite"):
-            _, orig_country, _, _, _, _ = self._getAirportDetail(orig_iata)
-            _, dest_country, _, _, _, _ = self._getAirportDetail(dest_iata)
-
-            if orig_country != dest_country:
-                datadict['award_miles'] = 'Wrong chart: Domestic chart picked despite not being domestic'
-            else:
-                value_wrap = chart['cabins']
-
-                if chart.get('default'):
-                    if value_wrap.get(cabin):
-                        value_cabin = value_wrap.get(cabin)
-                        datadict['award_miles'] = value_cabin[0]
-                    else:
-                        datadict['award_miles'] = 'This cabin is not available on this FFP.'
-
-                elif chart.get('exceptions'):
-                    if orig_country not in chart.get('exceptions'):
-                        datadict['award_miles'] = 'Wrong chart: Domestic chart picked despite not being special domestic case.'
-                    elif value_wrap.get(cabin):
-                        value_cabin = value_wrap.get(cabin)
-                        datadict['award_miles'] = next(
-                            (item[orig_country] for item in value_cabin if orig_country in item), None)
-                    else:
-                        datadict['award_miles'] = 'This cabin is not available on this FFP.'
-                else:
-                    datadict['award_miles'] = 'Unknown type of domestic chart.'
-        else:
-            datadict['award_miles'] = 'Unknown type of chart.'
-
-    # ==================== MULTI-SEGMENT HELPER FUNCTIONS ====================
-
-    def _getMultiPartChart(self, ffpname):
-        """Get multi-part chart for FFP"""
-        for name, value in self.award_chart_dict.items():
-            if value.get('ffp_code') == ffpname and value.get('applies_to_multiple'):
-                return name
-        return None
-
-    def _cumulativePricing(self, ffpname, origins, destinations, distances, carrier_eff, cabin, subchart):
-        """Calculate cumulative pricing for all segments"""
-        orig_eff = origins[0]
-        dest_eff = destinations[-1]
-        distance_eff = sum(distances)
-
-        # Create subchart dict for this FFP
-        ffp_subchart = {ffpname: subchart[ffpname]} if ffpname in subchart else {ffpname: self.ffp_dict_redeem.get(ffpname, {})}
-
-        charts = self._findChart_SingleSeg(orig_eff, dest_eff, distance_eff, carrier_eff, ffp_dict=ffp_subchart)
-
-        if charts:
-            chart = charts[0]  # since only 1 ffp is involved
-            self._findPrice_SingleSeg(chart, orig_eff, dest_eff, cabin, distance_eff)
-        else:
-            chart = dict(ffp=ffpname,
-                        ffp_disp_name=subchart.get(ffpname, {}).get('name', ffpname),
-                        chart_name='N/A',
-                        award_miles='No chart found.')
-
-        return chart
-
-    def _cumulativePricing_multipartchart(self, ffpname, origins, destinations, distances, cabin, subchart):
-        """Calculate cumulative pricing using multi-part chart"""
-        multipartchart = self._getMultiPartChart(ffpname)
-
-        chart = dict(ffp=ffpname,
-                    ffp_disp_name=subchart.get(ffpname, {}).get('name', ffpname),
-                    chart_name=multipartchart)
-
-        orig_eff = origins[0]
-        dest_eff = destinations[-1]
-        distance_eff = sum(distances)
-
-        self._findPrice_SingleSeg(chart, orig_eff, dest_eff, cabin, distance_eff)
-
-        return chart
-
-    def _persegPricing(self, origins, destinations, distances, carriers, cabin, ffpname, subchart):
-        """Calculate per-segment pricing"""
-        num_seg = len(origins)
-        awardmile_tot = []
-
-        for iseg in range(num_seg):
-            orig_eff = origins[iseg]
-            dest_eff = destinations[iseg]
-            carrier_eff = carriers[iseg]
-            distance_eff = distances[iseg]
-
-            ffp_subchart = {ffpname: subchart[ffpname]} if ffpname in subchart else {ffpname: self.ffp_dict_redeem.get(ffpname, {})}
-
-            charts = self._findChart_SingleSeg(orig_eff, dest_eff, distance_eff, carrier_eff, ffp_dict=ffp_subchart)
-
-            if charts:
-                chart_seg = charts[0]  # since only 1 ffp is involved
-                self._findPrice_SingleSeg(chart_seg, orig_eff, dest_eff, cabin, distance_eff)
-                awardmile_seg = chart_seg['award_miles']
-                awardmile_tot.append(awardmile_seg)
-            else:
-                awardmile_tot.append('N/A')
-
-        return awardmile_tot
-
-    def _handlePersegPricingReturn(self, awardmile_tot):
-        """Handle per-segment pricing result"""
-        if all(isinstance(item, int) for item in awardmile_tot):
-            result = sum(awardmile_tot)
-        else:
-            result = 'Per Segment Pricing: At least price for one segment is non-int type.'
-
-        return result
-
-    # ==================== MULTI-SEGMENT CASES ====================
-
-    def _multiseg_Case1(self, ffpname, origs, dests, distances, carriers, cabin, subchart):
-        """Case 1: Transfer involving only self as carrier (follows tab2_example.py)"""
-        if ffpname in ['AS', 'AA', 'IB', 'QR', 'CX', 'AV', 'BR', 'SQ', 'TP', 'UA', 'AM', 'VS', 'EK', 'EY', 'B6', 'WN', 'NK']:
-            chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-
-        elif ffpname in ['BA', 'JL', 'TK', 'EI']:
-            # Use self chart, per segment pricing
-            result = self._persegPricing(origs, dests, distances, carriers, cabin, ffpname, subchart)
-            result = self._handlePersegPricingReturn(result)
-            chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='Per Segment', award_miles=result)
-
-        elif ffpname in ['AY']:
-            # Use self chart, per segment pricing with AY-specific exception logic
-            zone_system = self.zone_system_dict['AY_self']['zones']
-            num_seg = len(origs)
-
-            flg_existlonghaul = False
-            flg_existzone1 = False
-            zone1connectionsegment = []
-
-            for i in range(num_seg):
-                orig_zone = self._fitAirportWithZone(origs[i], zone_system)
-                dest_zone = self._fitAirportWithZone(dests[i], zone_system)
-
-                if orig_zone and dest_zone:
-                    if orig_zone in ["FI", "EU_north"] and dest_zone in ["FI", "EU_north"]:
-                        flg_existzone1 = True
-                        zone1connectionsegment.append(i)
-                    elif (orig_zone in ["FI"] and dest_zone not in ["FI", "EU_north"]) or (orig_zone not in ["FI", "EU_north"] and dest_zone in ["FI"]):
-                        flg_existlonghaul = True
-
-            result = self._persegPricing(origs, dests, distances, carriers, cabin, ffpname, subchart)
-
-            if all(isinstance(item, int) for item in result):
-                if flg_existlonghaul and flg_existzone1:
-                    result_tokeep = [item for index, item in enumerate(result) if index not in zone1connectionsegment]
-                    result = sum(result_tokeep)
-                else:
-                    result = sum(result)
-            else:
-                result = 'Per Segment Pricing: At least price for one segment is non-int type.'
-
-            chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='Per Segment', award_miles=result)
-
-        else:
-            # Default fallback
-            chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-
-        return chart
-
-    def _multiseg_Case2(self, ffpname, origs, dests, distances, carriers, cabin, subchart):
-        """Case 2: Transfer involving only one partner as carrier"""
-        if ffpname in ['AS', 'AA', 'AY', 'CX', 'AV', 'BR', 'SQ', 'TP', 'UA', 'AM', 'FB', 'DL', 'VS', 'EY', 'B6']:
-            chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-
-        elif ffpname in ['BA', 'IB', 'QR', 'TK', 'EK']:
-            # Use partner chart, per segment pricing
-            result = self._persegPricing(origs, dests, distances, carriers, cabin, ffpname, subchart)
-            result = self._handlePersegPricingReturn(result)
-            chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='Per Segment', award_miles=result)
-
-        elif ffpname in ['JL']:
-            if carriers[0] == 'GK':
-                result = self._persegPricing(origs, dests, distances, carriers, cabin, ffpname, subchart)
-                result = self._handlePersegPricingReturn(result)
-                chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='Per Segment', award_miles=result)
-            else:
-                chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-
-        else:
-            # Default fallback
-            chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-
-        return chart
-
-    def _multiseg_Case3(self, ffpname, origs, dests, distances, selfcarriers, carriers, cabin, subchart):
-        """Case 3: Transfer involving self and one partner as carrier"""
-        unique_carriers = list(set(carriers))
-        if unique_carriers[0] in selfcarriers:
-            part_carrier = unique_carriers[1]
-        else:
-            part_carrier = unique_carriers[0]
-
-        if ffpname in ['AS', 'AA', 'AY', 'CX', 'UA', 'AM', 'FB', 'DL']:
-            # Use the partner's chart, cumulative pricing
-            chart = self._cumulativePricing(ffpname, origs, dests, distances, part_carrier, cabin, subchart)
-
-        elif ffpname in ['BA', 'TK']:
-            # Use each chart, per segment pricing
-            result = self._persegPricing(origs, dests, distances, carriers, cabin, ffpname, subchart)
-            result = self._handlePersegPricingReturn(result)
-            chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='Per Segment', award_miles=result)
-
-        elif ffpname in ['IB', 'JL']:
-            # Multipartner chart, distance based cumulative pricing. Only allow alliance partner mixing
-            if part_carrier in self.OW_member:
-                chart = self._cumulativePricing_multipartchart(ffpname, origs, dests, distances, cabin, subchart)
-            else:
-                msg = f"{subchart[ffpname]['name']} only allows itinerary carrier mixing with alliance partners."
-                chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='N/A', award_miles=msg)
-
-        elif ffpname in ['AV', 'BR', 'SQ', 'TP']:
-            if part_carrier in self.SA_member:
-                chart = self._cumulativePricing(ffpname, origs, dests, distances, part_carrier, cabin, subchart)
-            else:
-                msg = f"{subchart[ffpname]['name']} only allows itinerary carrier mixing with alliance partners."
-                chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='N/A', award_miles=msg)
-
-        elif ffpname in ['QR', 'VS', 'EK', 'EY', 'B6']:
-            msg = f"{subchart[ffpname]['name']} does not allow Self + Partner."
-            chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='N/A', award_miles=msg)
-
-        else:
-            # Default fallback
-            chart = self._cumulativePricing(ffpname, origs, dests, distances, part_carrier, cabin, subchart)
-
-        return chart
-
-    def _multiseg_Case4(self, ffpname, origs, dests, distances, carriers, cabin, subchart):
-        """Case 4: Transfer involving more than one partner as carrier"""
-        if ffpname in ['AS']:
-            allowedCombo = ["AA", "BA", "AY"]
-            unique_carriers = list(set(carriers))
-            if all(item in allowedCombo for item in unique_carriers):
-                chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-            else:
-                msg = 'This itinerary is not allowed. (AS multi-partner limited to AA/BA/AY)'
-                chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='N/A', award_miles=msg)
-
-        elif ffpname in ['AA', 'UA', 'AM', 'FB', 'DL']:
-            # Use the partner's chart, cumulative pricing
-            chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-
-        elif ffpname in ['BA']:
-            # Multipartner chart, distance based cumulative pricing
-            chart = self._cumulativePricing_multipartchart(ffpname, origs, dests, distances, cabin, subchart)
-
-        elif ffpname in ['IB', 'CX', 'JL']:
-            unique_carriers = list(set(carriers))
-            if all(item in self.OW_member for item in unique_carriers):
-                chart = self._cumulativePricing_multipartchart(ffpname, origs, dests, distances, cabin, subchart)
-            else:
-                msg = f"{subchart[ffpname]['name']} only allows itinerary carrier mixing with alliance partners."
-                chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='N/A', award_miles=msg)
-
-        elif ffpname in ['AV', 'BR', 'SQ', 'TP']:
-            unique_carriers = list(set(carriers))
-            if all(item in self.SA_member for item in unique_carriers):
-                chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-            else:
-                msg = f"{subchart[ffpname]['name']} only allows itinerary carrier mixing with alliance partners."
-                chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='N/A', award_miles=msg)
-
-        elif ffpname in ['AY', 'QR', 'VS', 'EK', 'EY', 'B6']:
-            msg = f"{subchart[ffpname]['name']} does not allow mixed partners"
-            chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='N/A', award_miles=msg)
-
-        elif ffpname in ['TK']:
-            result = self._persegPricing(origs, dests, distances, carriers, cabin, ffpname, subchart)
-            result = self._handlePersegPricingReturn(result)
-            chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'], chart_name='Per Segment', award_miles=result)
-
-        else:
-            # Default fallback
-            chart = self._cumulativePricing(ffpname, origs, dests, distances, carriers[0], cabin, subchart)
-
-        return chart
-
-    # ==================== MULTI-SEGMENT PRICE LOGIC ====================
-
-    def _multiseg_price(self, carriers, origs, dests, cabin, distances):
-        """Calculate award miles for multi-segment itinerary (follows tab2_example.py)"""
-        unique_carriers = list(set(carriers))
-
-        # First, find which programs take all carriers as redeem partners
-        ffp2keep = {}
-
-        for ffpname, ffpcontent in self.ffp_dict_redeem.items():
-            ffp_self_carriers = ffpcontent['carriers']
-            ffp_redeempartners = ffpcontent.get('redeem_partner')
-
-            if ffp_redeempartners:
-                ffp_redeem = ffp_redeempartners + ffp_self_carriers
-            else:
-                ffp_redeem = ffp_self_carriers
-
-            if all(item in ffp_redeem for item in unique_carriers):
-                ffp2keep[ffpname] = ffpcontent
-
-        result_list = []
-
-        if ffp2keep:
-            for ffpname, ffpcontent in ffp2keep.items():
-                subchart = {ffpname: ffpcontent}
-                ffp_self_carriers = ffpcontent['carriers']
-                ffp_redeempartners = ffpcontent.get('redeem_partner', [])
-
-                # ===== SPECIAL CASES: QF, AC and AA =====
-                if ffpname == 'QF':
-                    chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'])
-
-                    type1part_a = self.award_chart_dict['QF_AA']['specific_partners']
-                    type1part_b = self.award_chart_dict['QF_GK']['specific_partners']
-                    type1part = type1part_a + type1part_b
-                    type2part = list(set(ffp_redeempartners) - set(type1part))
-                    type1part += ["QF"]
-                    type3part = ["EK"]
-
-                    if all(item in type1part_b for item in unique_carriers):
-                        chart['chart_name'] = 'QF_GK'
-                        self._findPrice_SingleSeg(chart, origs[0], dests[-1], cabin, sum(distances))
-
-                    elif all(item in self.OW_member for item in unique_carriers) and ((len(unique_carriers) >= 3 and 'QF' in unique_carriers) or (len(unique_carriers) >= 2 and 'QF' not in unique_carriers)):
-                        chart['chart_name'] = 'QF_mulpart'
-                        self._findPrice_SingleSeg(chart, origs[0], dests[-1], cabin, sum(distances))
-
-                    elif all(item in type1part for item in unique_carriers):
-                        chart['chart_name'] = 'QF_AA'
-                        self._findPrice_SingleSeg(chart, origs[0], dests[-1], cabin, sum(distances))
-
-                    elif all(item in type2part for item in unique_carriers):
-                        chart['chart_name'] = 'QF_partners'
-                        self._findPrice_SingleSeg(chart, origs[0], dests[-1], cabin, sum(distances))
-                    elif all(item in type3part for item in unique_carriers):
-                        chart['chart_name'] = 'QF_EK'
-                        self._findPrice_SingleSeg(chart, origs[0], dests[-1], cabin, sum(distances))
-                    else:
-                        chart['chart_name'] = 'N/A'
-                        chart['award_miles'] = 'This itinerary is not allowed. QF charts rules.'
-
-                    result_list.append(chart)
-
-                elif ffpname == 'AC':
-                    chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'])
-
-                    dynpart = self.award_chart_dict['AC_DynPart']['specific_partners']
-                    dynpart = dynpart + ['AC']
-
-                    if all(item in dynpart for item in unique_carriers):
-                        chart['chart_name'] = 'N/A'
-                        chart['award_miles'] = 'Dynamic.'
-                    else:
-                        carrier_eff = next(item for item in unique_carriers if item not in dynpart)
-                        chart = self._cumulativePricing(ffpname, origs, dests, distances, carrier_eff, cabin, subchart)
-
-                    result_list.append(chart)
-                
-                elif ffpname == 'AA':
-                    chart = dict(ffp=ffpname, ffp_disp_name=subchart[ffpname]['name'])
-
-                    dynpart = self.award_chart_dict['AA_DynPart']['specific_partners']
-                    dynpart = dynpart + self.ffp_dict_redeem['AA']['carriers']
-
-                    if all(item in dynpart for item in unique_carriers):
-                        chart['chart_name'] = 'N/A'
-                        chart['award_miles'] = 'Dynamic.'
-                    else:
-                        carrier_eff = next(item for item in unique_carriers if item not in dynpart)
-                        chart = self._cumulativePricing(ffpname, origs, dests, distances, carrier_eff, cabin, subchart)
-
-                    result_list.append(chart)
-
-                else:
-                    # ===== GENERAL CASES: Case1-4 classification =====
-                    is_self_involved = any(c in ffp_self_carriers for c in unique_carriers)
-                    is_partner_involved = any(c in ffp_redeempartners for c in unique_carriers)
-
-                    case1 = all(c in ffp_self_carriers for c in unique_carriers)
-                    case2 = (not case1) and (len(unique_carriers) == 1)
-                    case3 = (len(unique_carriers) > 1) and is_self_involved
-                    case4 = (len(unique_carriers) > 1) and (not is_self_involved)
-
-                    if case1:
-                        chart = self._multiseg_Case1(ffpname, origs, dests, distances, carriers, cabin, subchart)
-                        result_list.append(chart)
-
-                    elif case2:
-                        chart = self._multiseg_Case2(ffpname, origs, dests, distances, carriers, cabin, subchart)
-                        result_list.append(chart)
-
-                    elif case3:
-                        chart = self._multiseg_Case3(ffpname, origs, dests, distances, ffp_self_carriers, carriers, cabin, subchart)
-                        result_list.append(chart)
-
-                    elif case4:
-                        chart = self._multiseg_Case4(ffpname, origs, dests, distances, carriers, cabin, subchart)
-                        result_list.append(chart)
-
-        else:
-            # No FFP can redeem those carriers together
-            result_list = 'No FFP can be used for this carriers combination.'
-
-        return result_list
-
     # ==================== SEARCH HANDLER ====================
 
     def _on_search_awards(self):
@@ -1194,6 +475,14 @@ class Tab2Frame(ttk.Frame):
                 messagebox.showerror("Input Error", f"Segment {idx + 1}: Please fill all fields")
                 return False
 
+            if len(self.segments) > 1 and carrier_str.split('-')[0].strip() == ANY_CARRIER:
+                messagebox.showerror("Input Error", f"Segment {idx + 1}: 'Any carrier' only works for single-segment searches")
+                return False
+
+            if cabin == ALL_CABINS and (len(self.segments) > 1 or carrier_str.split('-')[0].strip() == ANY_CARRIER):
+                messagebox.showerror("Input Error", f"Segment {idx + 1}: 'All cabins' only works for a single segment with one carrier")
+                return False
+
             # Validate distance is positive number
             try:
                 dist = float(distance_str)
@@ -1223,18 +512,53 @@ class Tab2Frame(ttk.Frame):
         carrier = carrier_str.split('-')[0].strip()
         distance = round(float(distance_str))
 
-        # Find charts
-        charts = self._findChart_SingleSeg(origin, dest, distance, carrier)
+        if carrier == ANY_CARRIER:
+            self._search_any_carrier(origin, dest, cabin, distance)
+            return
 
-        # Find prices
-        for chart in charts:
-            self._findPrice_SingleSeg(chart, origin, dest, cabin, distance)
+        if cabin == ALL_CABINS:
+            grid = self.engine.search_all_cabins(origin, dest, carrier, distance, self.possible_cabins)
+            self._display_cabin_grid(grid)
+            return
+
+        if self.nearby_var.get():
+            self._search_nearby(origin, dest, carrier, cabin, distance)
+            return
+
+        # Find charts and prices
+        charts = self.engine.search_segment(origin, dest, carrier, cabin, distance)
 
         # Display results
         self._display_results(charts)
 
         self._pass_results_to_tab3(charts)    
         
+    def _search_nearby(self, origin, dest, carrier, cabin, distance):
+        """Execute search over the route and its nearby-airport alternatives, ranked together"""
+        radius = self.nearby_radius_var.get().strip()
+        if not radius.isdigit() or int(radius) <= 0:
+            messagebox.showerror("Input Error", "Nearby radius must be a positive whole number of miles")
+            return
+
+        rows = self.engine.search_nearby(origin, dest, carrier, cabin, int(radius), distance=distance)
+        self._display_nearby_results(origin, dest, rows)
+
+        # Tab 3 compares programs on the route actually asked for
+        self._pass_results_to_tab3([result for orig, dst, _, result in rows if (orig, dst) == (origin, dest)])
+
+    def _search_any_carrier(self, origin, dest, cabin, distance):
+        """Execute wildcard-carrier search: every carrier x FFP, ranked by miles"""
+        ranked = self.engine.search_any_carrier(origin, dest, cabin, distance)
+
+        self._display_any_carrier_results(ranked)
+
+        # Tab 3 compares programs, so pass each program's best option only
+        best_per_ffp = {}
+        for _, result in ranked:
+            best_per_ffp.setdefault(result.ffp, result)
+
+        self._pass_results_to_tab3(list(best_per_ffp.values()))
+
     def _search_multi_segment(self):
         """Execute multi-segment search with sub-segment breakdown"""
         # Collect data from all segments
@@ -1267,7 +591,7 @@ class Tab2Frame(ttk.Frame):
         all_results = []
 
         # ===== 1. FULL SEGMENT SEARCH =====
-        result_list_full = self._multiseg_price(carriers, origs, dests, cabin, distances)
+        result_list_full = self.engine.price_itinerary(carriers, origs, dests, cabin, distances)
 
         self._pass_results_to_tab3(result_list_full)
 
@@ -1298,7 +622,7 @@ class Tab2Frame(ttk.Frame):
                 cabin_sub = max(cabins_sub, key=lambda c: cabin_hierarchy.get(c, -1))
 
                 # Call multi-segment search logic for this sub-segment
-                result_list_sub = self._multiseg_price(carriers_sub, origs_sub, dests_sub, cabin_sub, distances_sub)
+                result_list_sub = self.engine.price_itinerary(carriers_sub, origs_sub, dests_sub, cabin_sub, distances_sub)
 
                 # Store results
                 all_results.append({
@@ -1319,11 +643,7 @@ class Tab2Frame(ttk.Frame):
             cabin_eff = cabins[i]
 
             # Call single segment search logic
-            charts = self._findChart_SingleSeg(orig_eff, dest_eff, distance_eff, carrier_eff)
-
-            # Find prices
-            for chart in charts:
-                self._findPrice_SingleSeg(chart, orig_eff, dest_eff, cabin_eff, distance_eff)
+            charts = self.engine.search_segment(orig_eff, dest_eff, carrier_eff, cabin_eff, distance_eff)
 
             # Store results
             all_results.append({
@@ -1338,10 +658,173 @@ class Tab2Frame(ttk.Frame):
         # Display all results
         self._display_multi_results(all_results, num_seg)
 
+    def _on_sweep_destinations(self):
+        """Price segment 1's origin/carrier/cabin against every destination matching the filter"""
+        try:
+            segment = self.segments[0]
+            origin = segment['origin_var'].get().strip().split('-')[0].strip()
+            carrier = segment['carrier_var'].get().strip().split('-')[0].strip()
+            cabin = segment['cabin_var'].get()
+
+            kind = self.sweep_kind_var.get()
+            value = self.sweep_value_var.get().strip()
+
+            if not origin or not carrier or not value:
+                messagebox.showerror("Input Error", "Sweep needs Segment 1 origin and carrier, and a destination filter")
+                return
+
+            if carrier == ANY_CARRIER or cabin == ALL_CABINS:
+                messagebox.showerror("Input Error", "Sweep needs one carrier and one cabin")
+                return
+
+            if kind == 'zone':
+                if ':' not in value:
+                    messagebox.showerror("Input Error", "Zone filter must be ZONE_SYSTEM:ZONE, e.g. AA:EU")
+                    return
+                zone_system_name, zone_name = value.split(':', 1)
+                value = (zone_system_name.strip(), zone_name.strip())
+            else:
+                value = value.upper()
+
+            rows = self.engine.sweep_destinations(origin, carrier, cabin, kind, value)
+            self._last_sweep = (origin, carrier, cabin, rows)
+            self._display_sweep_results(origin, rows)
+
+        except Exception as e:
+            messagebox.showerror("Sweep Error", str(e))
+
+    def _on_budget_search(self):
+        """List every destination reachable from segment 1's origin/cabin within the miles budget"""
+        try:
+            segment = self.segments[0]
+            origin = segment['origin_var'].get().strip().split('-')[0].strip()
+            cabin = segment['cabin_var'].get()
+            budget = self.budget_var.get().strip().replace(',', '')
+
+            if not origin or not budget:
+                messagebox.showerror("Input Error", "Budget search needs Segment 1 origin and a miles budget")
+                return
+
+            if cabin == ALL_CABINS:
+                messagebox.showerror("Input Error", "Budget search needs one cabin")
+                return
+
+            if not budget.isdigit():
+                messagebox.showerror("Input Error", "Miles budget must be a whole number, e.g. 70000")
+                return
+
+            request = self._budget_request = (origin, cabin, int(budget))
+
+            if self.budget_index.is_ready(origin):
+                self._show_budget_results(request)
+                return
+
+            self.results_view.set_lines([f"Building the miles index from {origin} (first search from an origin)..."])
+            future = self._budget_executor.submit(self.budget_index.prepare, origin)
+            self.after(BUDGET_POLL_MS, lambda: self._poll_budget_build(future, request))
+
+        except Exception as e:
+            messagebox.showerror("Budget Error", str(e))
+
+    def destroy(self):
+        """Stop the background miles-index build with the frame, so it does not hold up exit"""
+        self.budget_index.close()
+        self._budget_executor.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    def _poll_budget_build(self, future, request):
+        """Show the budget results once the background index build is done"""
+        if not future.done():
+            self.after(BUDGET_POLL_MS, lambda: self._poll_budget_build(future, request))
+            return
+
+        # A newer budget search replaced this one while it was building
+        if request != self._budget_request:
+            return
+
+        error = future.exception()
+        if error is not None:
+            self.results_view.clear()
+            messagebox.showerror("Budget Error", str(error))
+            return
+
+        self._show_budget_results(request)
+
+    def _show_budget_results(self, request):
+        origin, cabin, budget = request
+        try:
+            entries = self.budget_index.best_per_destination(origin, cabin, budget)
+        except Exception as e:
+            messagebox.showerror("Budget Error", str(e))
+            return
+        self._display_budget_results(origin, cabin, budget, entries)
+
+    def _on_load_routes(self):
+        """Load a route network CSV (origin,destination,carriers) for the route finder"""
+        path = filedialog.askopenfilename(filetypes=[('CSV files', '*.csv'), ('All files', '*.*')])
+        if not path:
+            return
+
+        try:
+            network = load_route_network(path, self.engine)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Route Network Error", str(e))
+            return
+
+        self.route_finder = RouteFinder(self.engine, network)
+        self.route_file_var.set(f"{os.path.basename(path)}: {len(network)} routes ({network.skipped} skipped)")
+
+    def _on_find_routes(self):
+        """Find the cheapest itineraries from segment 1's origin to its destination"""
+        try:
+            if self.route_finder is None:
+                messagebox.showerror("Input Error", "Load a route network file first")
+                return
+
+            segment = self.segments[0]
+            origin = segment['origin_var'].get().strip().split('-')[0].strip()
+            dest = segment['dest_var'].get().strip().split('-')[0].strip()
+            cabin = segment['cabin_var'].get()
+
+            if not origin or not dest:
+                messagebox.showerror("Input Error", "Route finder needs Segment 1 origin and destination")
+                return
+
+            if cabin == ALL_CABINS:
+                messagebox.showerror("Input Error", "Route finder needs one cabin")
+                return
+
+            options = self.route_finder.find(origin, dest, cabin)
+            self._display_route_options(origin, dest, cabin, options)
+
+        except Exception as e:
+            messagebox.showerror("Route Finder Error", str(e))
+
+    def _on_export_sweep(self):
+        """Export the last destination sweep to CSV"""
+        if not self._last_sweep:
+            messagebox.showinfo("Export CSV", "Run a destination sweep first.")
+            return
+
+        origin, carrier, cabin, rows = self._last_sweep
+        path = filedialog.asksaveasfilename(
+            defaultextension='.csv',
+            filetypes=[('CSV files', '*.csv')],
+            initialfile=f'sweep_{origin}_{carrier}_{cabin}.csv'
+        )
+        if not path:
+            return
+
+        try:
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                write_sweep_csv(f, self.engine, origin, carrier, cabin, rows)
+        except OSError as e:
+            messagebox.showerror("Export Error", str(e))
+
     def _pass_results_to_tab3(self, results):
         """
         Pass search results to Tab 3.
-        Expects a list of result dictionaries.
+        Expects a list of PriceResult.
         """
         # Specific check to ensure we only pass valid lists, not error strings
         if not isinstance(results, list):
@@ -1383,11 +866,9 @@ class Tab2Frame(ttk.Frame):
             best_program = None
 
             for res in results:
-                miles = res.get('award_miles')
-                if isinstance(miles, (int, float)):
-                    if miles < min_cost:
-                        min_cost = miles
-                        best_program = res.get('ffp_disp_name')
+                if res.status is PriceStatus.OK and res.miles < min_cost:
+                    min_cost = res.miles
+                    best_program = res.ffp_disp_name
 
             if best_program is not None:
                 # If we have multiple entries for the same segment (unlikely in this logic but possible), take best
@@ -1426,12 +907,12 @@ class Tab2Frame(ttk.Frame):
             route = segment_routes.get((curr, next_node), "Unknown")
             
             # Format miles
-            miles_str = f"{cost/1000:.1f}k" if cost >= 1000 else str(int(cost))
+            miles_str = format_miles(cost)
             
             summary_parts.append(f"issue {route} with {program} ({miles_str})")
             curr = next_node
 
-        total_cost_str = f"{total_cost/1000:.1f}k" if total_cost >= 1000 else str(int(total_cost))
+        total_cost_str = format_miles(total_cost)
 
         summary_text = "Summary of broken down segment: \n\n"
         summary_text += f"The cheapest way to finish the entire trip (allowing multiple tickets) will be: "
@@ -1442,52 +923,168 @@ class Tab2Frame(ttk.Frame):
 
     def _display_results(self, charts):
         """Display search results with proper formatting (Single Segment)"""
-        self.results_listbox.delete(0, tk.END)
+        self.results_view.clear()
 
         if not charts:
-            self.results_listbox.insert(tk.END, "No results found")
+            self.results_view.append("No results found")
             return
 
         if isinstance(charts, str):
-            self.results_listbox.insert(tk.END, charts)
+            self.results_view.append(charts)
             return
 
-        # Extract columns (NO CHART NAME)
-        disp_leftcol = [tp['ffp_disp_name'] for tp in charts]
-        disp_rightcol = [tp['award_miles'] for tp in charts]
+        # Priced results first by miles, then messages (NO CHART NAME)
+        sorted_results = sorted(charts, key=PriceResult.sort_key)
 
-        combined = list(zip(disp_leftcol, disp_rightcol))
+        # Display header
+        header = f"{'Program':<35}{'Award Miles':<15}"
+        self.results_view.append(header)
+        self.results_view.append("=" * 50)
+
+        for result in sorted_results:
+            display_line = f"{result.ffp_disp_name:<35}{result.display_miles():<15}"
+            self.results_view.append(display_line)
 
-        def sort_key(item):
-            miles = item[1]
-            if isinstance(miles, (int, float)):
-                return (0, miles)
-            else:
-                return (1, str(miles))
 
-        sorted_results = sorted(combined, key=sort_key)
+    def _display_any_carrier_results(self, ranked):
+        """Display wildcard-carrier results (already ranked by miles)"""
+        self.results_view.clear()
+
+        if not ranked:
+            self.results_view.append("No results found")
+            return
 
         # Display header
-        header = f"{'Program':<35}{'Award Miles':<15}"
-        self.results_listbox.insert(tk.END, header)
-        self.results_listbox.insert(tk.END, "=" * 50)
+        header = f"{'Program':<35}{'Carrier':<10}{'Award Miles':<15}"
+        self.results_view.append(header)
+        self.results_view.append("=" * 60)
 
-        for program_name, miles in sorted_results:
-            if isinstance(miles, (int, float)):
-                miles_str = f"{miles / 1000:.1f}k" if miles >= 1000 else str(int(miles))
-            else:
-                miles_str = str(miles)
+        for carrier, result in ranked:
+            display_line = f"{result.ffp_disp_name:<35}{carrier:<10}{result.display_miles():<15}"
+            self.results_view.append(display_line)
+
+    def _display_cabin_grid(self, grid):
+        """Display a program x cabin price grid"""
+        self.results_view.clear()
+
+        if not grid:
+            self.results_view.append("No results found")
+            return
+
+        cabin_labels = ['Economy', 'Prem. Eco', 'Business', 'First']
+
+        # Display header
+        header = f"{'Program':<35}" + ''.join(f"{label:<12}" for label in cabin_labels)
+        self.results_view.append(header)
+        self.results_view.append("=" * (35 + 12 * len(cabin_labels)))
+
+        # Cheapest economy first, then the next cabins as tie-breaks
+        rows = sorted(grid, key=lambda row: [result.sort_key() for result in row])
+
+        for row in rows:
+            # Messages are long; in the grid only priced and dynamic cells say more than '---'
+            cells = [
+                result.display_miles() if result.ok
+                else 'Dynamic' if result.status is PriceStatus.DYNAMIC
+                else '---'
+                for result in row
+            ]
+            display_line = f"{row[0].ffp_disp_name:<35}" + ''.join(f"{cell:<12}" for cell in cells)
+            self.results_view.append(display_line)
+
+    def _display_sweep_results(self, origin, rows):
+        """Display the best program per destination of a sweep, cheapest first"""
+        self.results_view.clear()
+
+        if not rows:
+            self.results_view.append("No destinations matched the filter")
+            return
+
+        # Rows come ranked within each destination, so the first one is its best
+        best = {}
+        for dest, distance, result in rows:
+            best.setdefault(dest, (distance, result))
+
+        self.results_view.append(f"From {origin}: {len(best)} destinations, {len(rows)} prices (Export CSV for all)")
+        header = f"{'Dest':<6}{'Distance':<10}{'Best Program':<35}{'Award Miles':<15}"
+        self.results_view.append(header)
+        self.results_view.append("=" * 66)
+
+        for dest, (distance, result) in sorted(best.items(), key=lambda item: item[1][1].sort_key()):
+            display_line = f"{dest:<6}{distance:<10}{result.ffp_disp_name:<35}{result.display_miles():<15}"
+            self.results_view.append(display_line)
 
-            display_line = f"{program_name:<35}{miles_str:<15}"
-            self.results_listbox.insert(tk.END, display_line)
+    def _display_nearby_results(self, origin, dest, rows):
+        """Display prices of the route and its nearby alternatives; * marks the route searched"""
+        self.results_view.clear()
 
+        if not rows:
+            self.results_view.append("No results found")
+            return
+
+        pairs = {(orig, dst) for orig, dst, _, _ in rows}
+        self.results_view.append(f"{origin}-{dest} and {len(pairs) - 1} nearby alternatives (* = searched route)")
+        header = f"{'Route':<12}{'Distance':<10}{'Program':<35}{'Award Miles':<15}"
+        self.results_view.append(header)
+        self.results_view.append("=" * 72)
+
+        for orig, dst, distance, result in rows:
+            mark = '*' if (orig, dst) == (origin, dest) else ' '
+            display_line = f"{mark}{orig}-{dst:<7}{distance:<10}{result.ffp_disp_name:<35}{result.display_miles():<15}"
+            self.results_view.append(display_line)
+
+    def _display_budget_results(self, origin, cabin, budget, entries):
+        """Display the cheapest program per destination within a miles budget, cheapest first"""
+        self.results_view.clear()
+
+        if not entries:
+            self.results_view.append(f"Nothing reachable from {origin} in {cabin} for {budget} miles")
+            return
+
+        self.results_view.append(f"From {origin} in {cabin} for up to {budget} miles: {len(entries)} destinations")
+        header = f"{'Dest':<6}{'Distance':<10}{'Best Program':<35}{'Award Miles':<13}{'Carriers':<20}"
+        self.results_view.append(header)
+        self.results_view.append("=" * 84)
+
+        for entry in entries:
+            ffp_name = self.engine.ffp_dict_redeem[entry.ffp].get('name')
+            miles = format_miles(entry.miles)
+            carriers = ', '.join(entry.carriers)
+            if len(carriers) > 20:
+                carriers = carriers[:17] + '...'
+            display_line = f"{entry.dest:<6}{entry.distance:<10}{ffp_name:<35}{miles:<13}{carriers:<20}"
+            self.results_view.append(display_line)
+
+    def _display_route_options(self, origin, dest, cabin, options):
+        """Display route finder itineraries, cheapest first"""
+        self.results_view.clear()
+
+        if not options:
+            self.results_view.append(f"No priced route from {origin} to {dest} in {cabin} on this network")
+            return
+
+        self.results_view.append(f"Cheapest routes {origin} -> {dest} in {cabin}")
+        header = f"{'Award Miles':<13}{'Route':<24}{'Carriers':<14}{'Distance':<10}{'Program(s)':<30}"
+        self.results_view.append(header)
+        self.results_view.append("=" * 91)
+
+        for option in options:
+            miles = format_miles(option.miles)
+            route = '-'.join(option.path)
+            carriers = '/'.join(option.carriers)
+            if option.ticketing == TICKET_SINGLE:
+                programs = option.results[0].ffp_disp_name
+            else:
+                programs = ' + '.join(result.ffp for result in option.results) + ' (separate)'
+            display_line = f"{miles:<13}{route:<24}{carriers:<14}{option.distance:<10}{programs:<30}"
+            self.results_view.append(display_line)
 
     def _display_multi_results(self, all_results, num_seg):
         """Display multi-segment search results with sub-segment breakdown"""
-        self.results_listbox.delete(0, tk.END)
+        self.results_view.clear()
 
         if not all_results:
-            self.results_listbox.insert(tk.END, "No results found")
+            self.results_view.append("No results found")
             return
 
         # 1. Display Full Trip Result (First element)
@@ -1495,18 +1092,15 @@ class Tab2Frame(ttk.Frame):
         self._display_single_group(first_group)
 
         # 2. Display Optimization Summary
-        self.results_listbox.insert(tk.END, "")
+        self.results_view.append("")
         summary_text = self._calculate_cheapest_combination(num_seg, all_results)
         
-        # Split long lines for listbox
-        import textwrap
-        wrapped_summary = textwrap.wrap(summary_text, width=80)
-        for line in wrapped_summary:
-            self.results_listbox.insert(tk.END, line)
+        # Split long lines for the result view
+        self.results_view.extend(textwrap.wrap(summary_text, width=80))
         
         # 3. Display Sub-segments (Rest of the elements)
         for idx, result_group in enumerate(all_results[1:], start=1):
-            self.results_listbox.insert(tk.END, "")
+            self.results_view.append("")
             self._display_single_group(result_group)
 
     def _display_single_group(self, result_group):
@@ -1517,42 +1111,25 @@ class Tab2Frame(ttk.Frame):
 
         # Header
         header_line = f"{'=' * 60}"
-        self.results_listbox.insert(tk.END, header_line)
-        self.results_listbox.insert(tk.END, f"{seg_range}, {route}")
-        self.results_listbox.insert(tk.END, header_line)
+        self.results_view.append(header_line)
+        self.results_view.append(f"{seg_range}, {route}")
+        self.results_view.append(header_line)
 
         if isinstance(results, str):
-            self.results_listbox.insert(tk.END, results)
+            self.results_view.append(results)
         elif results:
-            # Extract and format results (NO CHART NAME)
-            disp_leftcol = [tp['ffp_disp_name'] for tp in results]
-            disp_rightcol = [tp['award_miles'] for tp in results]
-
-            combined = list(zip(disp_leftcol, disp_rightcol))
-
-            def sort_key(item):
-                miles = item[1]
-                if isinstance(miles, (int, float)):
-                    return (0, miles)
-                else:
-                    return (1, str(miles))
-
-            sorted_results = sorted(combined, key=sort_key)
+            # Priced results first by miles, then messages (NO CHART NAME)
+            sorted_results = sorted(results, key=PriceResult.sort_key)
 
             # Display column header
             col_header = f"{'Program':<35}{'Award Miles':<15}"
-            self.results_listbox.insert(tk.END, col_header)
-            self.results_listbox.insert(tk.END, "-" * 50)
-
-            for program_name, miles in sorted_results:
-                if isinstance(miles, (int, float)):
-                    miles_str = f"{miles / 1000:.1f}k" if miles >= 1000 else str(int(miles))
-                else:
-                    miles_str = str(miles)
+            self.results_view.append(col_header)
+            self.results_view.append("-" * 50)
 
-                display_line = f"{program_name:<35}{miles_str:<15}"
-                self.results_listbox.insert(tk.END, display_line)
+            for result in sorted_results:
+                display_line = f"{result.ffp_disp_name:<35}{result.display_miles():<15}"
+                self.results_view.append(display_line)
         else:
-            self.results_listbox.insert(tk.END, "No results for this segment")
+            self.results_view.append("No results for this segment")
 
 
@@ -1,15 +1,14 @@
 """
 tab3.py - UPDATED v3:
 
-- Accepts Tab2-passed results as a list of dicts:
-    {
-        'ffp_disp_name': 'Program Name',
-        'award_miles': 50000 or 'Dynamic',
-        'ffp': 'AA',
-        ...
-    }
+- Accepts Tab2-passed results as a list of results.PriceResult:
+    PriceResult(ffp='AA', ffp_disp_name='Program Name', chart_name=...,
+                status=PriceStatus.OK, miles=50000, message=None)
+  (dicts with 'ffp_disp_name' / 'award_miles' / 'ffp' are still accepted)
 
-- Adds load_data(results) so gui_v2.App.update_tab3_data() can call Tab3 directly.
+- Follows app.search_context (search_context.SearchContext): changes only mark
+  the table stale; it is rebuilt when Tab 3 is shown and the context version
+  moved. Rebuilds diff rows by program instead of clearing the Treeview.
 
 - Converts award_miles (raw miles) -> k-miles for display/cost:
     50000 -> 50.00
@@ -18,11 +17,20 @@ tab3.py - UPDATED v3:
   * first row cash price is editable and syncs to all rows
   * editable: k Miles, YQ, Mile Evaluation, Cash Price (first row only)
   * total cost auto-calculates when possible
+
+- Row state lives in program_rows; every edit recomputes all affected rows
+  from it in one pass and writes each row once (no per-cell read-back).
+
+- Breakeven & sensitivity panel: every program x cash price x YQ x valuation
+  scale from breakeven.sensitivity(), rendered with one bulk refresh.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from breakeven import award_cost, breakeven_cpp, parse_series, sensitivity
+from results import PriceResult, PriceStatus
+
 
 class Tab3Frame(ttk.Frame):
     """Tab 3: Award vs Cash Price Comparison"""
@@ -31,10 +39,13 @@ class Tab3Frame(ttk.Frame):
         super().__init__(parent)
         self.app = app
         self.shared_cash_price = 0.0  # Shared across all programs
+        self._shown_version = None    # search_context.version the table was built from
 
         try:
             self._setup_ui()
-            parent.bind('<<NotebookTabChanged>>', self._on_tab_shown)
+            parent.bind('<<NotebookTabChanged>>', self._on_tab_shown, add='+')
+            if hasattr(self.app, 'search_context') and hasattr(self.app.search_context, 'subscribe'):
+                self.app.search_context.subscribe(self._on_context_changed)
         except Exception as e:
             messagebox.showerror("Tab 3 Error", str(e))
             raise
@@ -43,28 +54,38 @@ class Tab3Frame(ttk.Frame):
 
     def load_data(self, results):
         """
-        Called by App.update_tab3_data(results).
-        Stores results in app.search_context and refreshes the table.
+        Stores results in app.search_context; the table follows when Tab 3 is shown.
         """
-        if not hasattr(self.app, 'search_context') or not isinstance(self.app.search_context, dict):
-            self.app.search_context = {}
-
         self.app.search_context['results'] = results
-        self._refresh_from_context()
 
     # ---------- Tab shown / refresh ----------
 
-    def _on_tab_shown(self, event=None):
-        """Called when any tab is shown - refresh if this is Tab 3"""
+    def _is_shown(self):
         notebook = self.master
-        selected_index = notebook.index(notebook.select())
-        our_index = notebook.index(self)
-        if selected_index == our_index:
+        try:
+            return notebook.index(notebook.select()) == notebook.index(self)
+        except tk.TclError:
+            return False
+
+    def _on_context_changed(self, context):
+        """search_context changed: rebuild now only if Tab 3 is visible"""
+        if self._is_shown():
+            self._refresh_from_context()
+
+    def _on_tab_shown(self, event=None):
+        """Called when any tab is shown - refresh if this is Tab 3 and the context changed"""
+        if self._is_shown():
             self._refresh_from_context()
 
     def _refresh_from_context(self):
-        """Refresh the display based on current search_context"""
-        if hasattr(self.app, 'search_context') and self.app.search_context.get('results'):
+        """Refresh the display from search_context, unless already built from this version"""
+        context = getattr(self.app, 'search_context', None)
+        version = getattr(context, 'version', None)
+        if version is not None and version == self._shown_version:
+            return
+        self._shown_version = version
+
+        if context and context.get('results'):
             self._load_previous_search()
         else:
             self._show_no_search_message()
@@ -132,6 +153,40 @@ class Tab3Frame(ttk.Frame):
         table_frame.columnconfigure(0, weight=1)
         table_frame.rowconfigure(0, weight=1)
 
+        # Breakeven & sensitivity frame
+        sensitivity_frame = ttk.LabelFrame(self, text="Breakeven & Sensitivity (cash price - award cost)", padding=10)
+        sensitivity_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        inputs_frame = ttk.Frame(sensitivity_frame)
+        inputs_frame.grid(row=0, column=0, columnspan=2, sticky='w', pady=(0, 5))
+
+        # Values are lists ("0, 50, 100") or ranges ("start-stop/step")
+        self.sens_cash_var = tk.StringVar(value="200-2000/300")
+        self.sens_yq_var = tk.StringVar(value="0")
+        self.sens_scale_var = tk.StringVar(value="0.75, 1, 1.25")
+
+        for column, (label, var, width) in enumerate((
+                ("Cash prices:", self.sens_cash_var, 16),
+                ("YQ:", self.sens_yq_var, 12),
+                ("Valuation x:", self.sens_scale_var, 14))):
+            ttk.Label(inputs_frame, text=label).grid(row=0, column=2 * column, sticky='w', padx=(8 if column else 0, 2))
+            ttk.Entry(inputs_frame, textvariable=var, width=width).grid(row=0, column=2 * column + 1)
+
+        update_button = ttk.Button(inputs_frame, text="Update", command=self._update_sensitivity)
+        update_button.grid(row=0, column=6, padx=8)
+
+        self.sens_tree = ttk.Treeview(sensitivity_frame, height=8, show='headings')
+        sens_vsb = ttk.Scrollbar(sensitivity_frame, orient=tk.VERTICAL, command=self.sens_tree.yview)
+        sens_hsb = ttk.Scrollbar(sensitivity_frame, orient=tk.HORIZONTAL, command=self.sens_tree.xview)
+        self.sens_tree.configure(yscrollcommand=sens_vsb.set, xscrollcommand=sens_hsb.set)
+        self.sens_tree.tag_configure('worth', background='#E0FFE0')
+
+        self.sens_tree.grid(row=1, column=0, sticky='nsew')
+        sens_vsb.grid(row=1, column=1, sticky='ns')
+        sens_hsb.grid(row=2, column=0, sticky='ew')
+        sensitivity_frame.columnconfigure(0, weight=1)
+        sensitivity_frame.rowconfigure(1, weight=1)
+
         button_frame = ttk.Frame(self)
         button_frame.pack(fill=tk.X, padx=5, pady=5)
 
@@ -143,6 +198,7 @@ class Tab3Frame(ttk.Frame):
         new_search_button.pack(side=tk.LEFT, padx=5)
 
         self.program_rows = {}
+        self.row_values = {}  # row_id -> values last written to the Treeview
         self.first_row_id = None
 
         self.tree.bind('<Double-1>', self._on_cell_click)
@@ -158,7 +214,8 @@ class Tab3Frame(ttk.Frame):
     def _normalize_results(self, results):
         """
         Accept either:
-          - list of dicts from Tab2 (current)
+          - list of PriceResult from Tab2 (current)
+          - list of dicts (legacy Tab2 format)
           - list of tuples (legacy): (program_name, k_miles_or_miles, ffp_code)
         Returns a list of dicts:
           { program_name, k_miles, ffp_code }
@@ -168,7 +225,22 @@ class Tab3Frame(ttk.Frame):
             return normalized
 
         for item in results:
-            # Current format: dict from Tab2
+            # Current format: PriceResult from Tab2
+            if isinstance(item, PriceResult):
+                if item.status is PriceStatus.OK:
+                    # Tab2 sends raw miles; Tab3 uses k-miles
+                    k_miles = item.miles / 1000.0
+                else:
+                    k_miles = item.message
+
+                normalized.append({
+                    'program_name': item.ffp_disp_name or "Unknown",
+                    'k_miles': k_miles,
+                    'ffp_code': item.ffp or "UNKNOWN"
+                })
+                continue
+
+            # Legacy format: dict
             if isinstance(item, dict):
                 program_name = item.get('ffp_disp_name') or item.get('program_name') or "Unknown"
                 ffp_code = item.get('ffp') or item.get('ffp_code') or "UNKNOWN"
@@ -228,60 +300,64 @@ class Tab3Frame(ttk.Frame):
         )
         self.summary_label.config(text=summary_text)
 
-        # Clear table
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        self.program_rows = {}
-        self.first_row_id = None
         self.shared_cash_price = 0.0
+        self._sync_rows(results)
+        self._update_sensitivity(show_errors=False)
 
-        # Populate
+    def _sync_rows(self, results):
+        """
+        Diff the table against normalized results: rows of programs still present
+        are kept (rewritten only if their values change) and moved into order,
+        others are deleted, new ones inserted.
+        """
+        # Existing rows by (ffp_code, program_name, occurrence)
+        existing = {}
+        seen = {}
+        for row_id in self.tree.get_children():
+            row_data = self.program_rows.get(row_id)
+            if row_data is None:
+                self.tree.delete(row_id)
+                continue
+            key = (row_data['ffp_code'], row_data['program_name'])
+            seen[key] = seen.get(key, 0) + 1
+            existing[key + (seen[key],)] = row_id
+
+        program_rows = {}
+        row_values = {}
+        seen = {}
         for idx, r in enumerate(results):
-            program_name = r['program_name']
-            k_miles = r['k_miles']
-            ffp_code = r['ffp_code']
+            row_data = {
+                'ffp_code': r['ffp_code'],
+                'program_name': r['program_name'],
+                'k_miles': float(r['k_miles']) if isinstance(r['k_miles'], (int, float)) else r['k_miles'],
+                'yq': 0.0,
+                'valuation': self._get_valuation(r['ffp_code']),
+                'is_first_row': idx == 0
+            }
+            values = self._row_values(row_data)
 
-            valuation = self._get_valuation(ffp_code)
+            key = (row_data['ffp_code'], row_data['program_name'])
+            seen[key] = seen.get(key, 0) + 1
+            row_id = existing.pop(key + (seen[key],), None)
 
-            if isinstance(k_miles, (int, float)):
-                k_miles_display = f"{float(k_miles):.2f}"
+            if row_id is None:
+                row_id = self.tree.insert('', idx, tags=('editable',), values=values)
             else:
-                k_miles_display = str(k_miles)  # Dynamic / other strings
+                if self.row_values.get(row_id) != values:
+                    self.tree.item(row_id, values=values)
+                if self.tree.index(row_id) != idx:
+                    self.tree.move(row_id, '', idx)
 
-            cash_price_display = "0.00" if idx == 0 else f"{self.shared_cash_price:.2f}"
+            program_rows[row_id] = row_data
+            row_values[row_id] = values
 
-            if isinstance(k_miles, (int, float)) and valuation is not None:
-                total_cost = (float(k_miles) * 10 * float(valuation)) + 0.0  # YQ default 0
-                total_cost_display = f"${total_cost:.2f}"
-            else:
-                total_cost_display = "---"
-
-            row_id = self.tree.insert(
-                '',
-                'end',
-                tags=('editable',),
-                values=(
-                    program_name,
-                    k_miles_display,
-                    "0.00",  # YQ
-                    f"{valuation:.2f}" if valuation is not None else "ERROR",
-                    total_cost_display,
-                    cash_price_display,
-                    "-"  # Worth it?
-                )
-            )
-
-            if idx == 0:
-                self.first_row_id = row_id
-
-            self.program_rows[row_id] = {
-                'ffp_code': ffp_code,
-                'program_name': program_name,
-                'k_miles': k_miles,
-                'valuation': valuation,
-                'is_first_row': idx == 0
-            }
+        if existing:
+            self.tree.delete(*existing.values())
+
+        self.program_rows = program_rows
+        self.row_values = row_values
+        children = self.tree.get_children()
+        self.first_row_id = children[0] if children else None
 
     def _get_valuation(self, ffp_code):
         """Get valuation (cpp) for FFP from valuations.json (supports dict or list formats)"""
@@ -351,19 +427,29 @@ class Tab3Frame(ttk.Frame):
                     entry.focus()
                     return
 
-            values[col_index] = new_value
-            self.tree.item(item, values=values)
             entry.destroy()
 
-            # If Cash Price edited in first row => sync
-            if col_index == 5 and is_first_row:
+            if row_data is None:
+                return
+
+            if col_index == 1:
                 try:
-                    self.shared_cash_price = float(new_value)
+                    row_data['k_miles'] = float(new_value)
                 except ValueError:
-                    self.shared_cash_price = 0.0
-                self._sync_cash_price_all_rows()
+                    row_data['k_miles'] = new_value
+            elif col_index == 2:
+                row_data['yq'] = float(new_value)
+            elif col_index == 3:
+                row_data['valuation'] = float(new_value)
 
-            self._recalculate_row(item)
+            # Cash Price edited in first row => shared by every row
+            if col_index == 5 and is_first_row:
+                self.shared_cash_price = float(new_value)
+                self._refresh_rows()
+            else:
+                self._refresh_rows([item])
+
+            self._update_sensitivity(show_errors=False)
 
         def cancel_edit(event=None):
             entry.destroy()
@@ -373,62 +459,91 @@ class Tab3Frame(ttk.Frame):
         entry.focus()
         entry.select_range(0, tk.END)
 
-    def _sync_cash_price_all_rows(self):
-        """Update Cash Price display in all non-first rows with the shared value"""
-        for item in self.tree.get_children():
-            row_data = self.program_rows.get(item)
-            if not row_data or row_data['is_first_row']:
-                continue
+    def _row_values(self, row_data):
+        """Display values of one table row, computed from its state"""
+        k_miles = row_data['k_miles']
+        valuation = row_data['valuation']
+        yq = row_data['yq']
+        cash_price = self.shared_cash_price
 
-            values = list(self.tree.item(item, 'values'))
-            values[5] = f"{self.shared_cash_price:.2f}"
-            self.tree.item(item, values=values)
-            self._recalculate_row(item)
+        if isinstance(k_miles, (int, float)):
+            k_miles_display = f"{k_miles:.2f}"
+        else:
+            k_miles_display = str(k_miles)  # Dynamic / other strings
 
-    def _recalculate_row(self, row_id):
-        """Recalculate Total Cost and Worth it? for a row"""
-        values = list(self.tree.item(row_id, 'values'))
+        if not isinstance(k_miles, (int, float)):
+            total_cost_display, worth_it = "---", "-"
+        elif valuation is None:
+            total_cost_display, worth_it = "ERROR", "ERROR"
+        else:
+            total_cost = award_cost(k_miles, valuation, yq)
+            total_cost_display = f"${total_cost:.2f}"
+            worth_it = "Y" if total_cost <= cash_price else "N"
+
+        return (
+            row_data['program_name'],
+            k_miles_display,
+            f"{yq:.2f}",
+            f"{valuation:.2f}" if valuation is not None else "ERROR",
+            total_cost_display,
+            f"{cash_price:.2f}",
+            worth_it
+        )
 
-        # k Miles
-        try:
-            k_miles = float(values[1])  # thousands
-        except ValueError:
-            values[4] = "---"
-            values[6] = "-"
-            self.tree.item(row_id, values=values)
-            return
+    def _refresh_rows(self, row_ids=None):
+        """Recompute Total Cost and Worth it? for the given rows (default: all) in one pass"""
+        if row_ids is None:
+            row_ids = self.tree.get_children()
 
-        try:
-            yq = float(values[2])
-            cash_price = float(values[5])
-        except ValueError:
-            messagebox.showerror("Input Error", "Please enter valid numbers")
-            return
+        for row_id in row_ids:
+            row_data = self.program_rows.get(row_id)
+            if row_data:
+                values = self._row_values(row_data)
+                self.row_values[row_id] = values
+                self.tree.item(row_id, values=values)
 
+    def _update_sensitivity(self, show_errors=True):
+        """Recompute the breakeven & sensitivity table from the current rows and render it at once"""
         try:
-            valuation = float(values[3])
-        except ValueError:
-            values[4] = "ERROR"
-            values[6] = "ERROR"
-            self.tree.item(row_id, values=values)
+            cash_prices = parse_series(self.sens_cash_var.get())
+            yq_values = parse_series(self.sens_yq_var.get())
+            cpp_scales = parse_series(self.sens_scale_var.get())
+            programs = [
+                (row['program_name'], row['ffp_code'], row['k_miles'], row['valuation'])
+                for row in (self.program_rows.get(row_id) for row_id in self.tree.get_children())
+                if row
+            ]
+            scenarios = sensitivity(programs, cash_prices, yq_values, cpp_scales)
+        except ValueError as e:
+            if show_errors:
+                messagebox.showerror("Input Error", f"Sensitivity inputs: {e}")
             return
 
-        total_cost = (k_miles * 10 * valuation) + yq
-        worth_it = "Y" if total_cost <= cash_price else "N"
+        cash_columns = [f"${cash:,.0f}" for cash in cash_prices]
+        columns = ('Program', 'YQ', 'cpp', 'Breakeven Cash', 'Breakeven cpp') + tuple(cash_columns)
 
-        values[4] = f"${total_cost:.2f}"
-        values[6] = worth_it
-        self.tree.item(row_id, values=values)
+        tree = self.sens_tree
+        tree.delete(*tree.get_children())
+        tree['columns'] = columns
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=200 if col == 'Program' else 90, anchor=tk.W if col == 'Program' else tk.CENTER,
+                        stretch=col == 'Program')
+
+        # Breakeven cpp is measured against the shared cash price of the main table
+        for scenario in scenarios:
+            cpp_breakeven = breakeven_cpp(scenario.k_miles, self.shared_cash_price, scenario.yq)
+            values = (
+                scenario.program,
+                f"{scenario.yq:.2f}",
+                f"{scenario.cpp:.2f}",
+                f"${scenario.cost:,.2f}",
+                f"{cpp_breakeven:.2f}" if cpp_breakeven is not None and self.shared_cash_price else "-",
+            ) + tuple(f"{saving:+,.0f}" for saving in scenario.savings)
+            tree.insert('', 'end', values=values, tags=('worth',) if scenario.cost <= self.shared_cash_price else ())
 
     def _new_search(self):
         """Return to Tab 2 for new search"""
-        self.app.search_context = {
-            'carrier_code': None,
-            'origin': None,
-            'destination': None,
-            'distance': None,
-            'cabin': None,
-            'results': []
-        }
+        self.app.search_context.reset()
         notebook = self.master
         notebook.select(1)
@@ -1,7 +1,8 @@
 """
 tab4_v2.py: Earning Partner Finder - Find which carriers can earn points on an FFP
 Similar to Tab 1 (redeem), but shows earning partnerships instead.
-Also displays family pooling and expiration info in a table.
+Also displays family pooling and expiration info in a table, and the miles
+a cash ticket earns in every program (accrual.AccrualRules), ranked by value.
 """
 
 import tkinter as tk
@@ -10,18 +11,22 @@ from tkinter import ttk, messagebox
 class Tab4Frame(ttk.Frame):
     """Tab 4: Earning Partner Finder"""
     
-    def __init__(self, parent, carriers_country_tab1, carrierlist_tab1, ffp_dict_earn, ffp_dict):
+    def __init__(self, parent, carriers_country_tab1, carrier_hierarchy_tab1, country_index_tab1, ffp_dict_earn, ffp_dict,
+                 accrual_rules, engine):
         super().__init__(parent)
         
         # Store pre-processed data
         self.carriers_country_tab1 = carriers_country_tab1
-        self.carrierlist_tab1 = carrierlist_tab1
+        self.carrier_hierarchy_tab1 = carrier_hierarchy_tab1  # country -> alliance -> carrier names
+        self.country_index_tab1 = country_index_tab1
         self.ffp_dict_earn = ffp_dict_earn  # Pre-processed with earn_partner
         self.ffp_dict = ffp_dict  # Full FFP data for family_pooling and expiration
+        self.accrual_rules = accrual_rules  # Compiled booking-code earning tables
+        self.engine = engine  # For route distances
         
         # Current filter states
         self.alliance_filtered = []
-        self.carrierlist_tab1_filtered = []
+        self.country_search_state = None
         
         # Setup UI
         self._setup_ui()
@@ -105,6 +110,36 @@ class Tab4Frame(ttk.Frame):
         scrollbar.grid(row=9, column=2, sticky='ns', pady=(0, 10))
         self.results_tree.config(yscrollcommand=scrollbar.set)
         
+        # ==================== Miles Earned ====================
+        
+        earn_frame = ttk.LabelFrame(container, text="Miles Earned (uses the selected carrier)", padding=10)
+        earn_frame.grid(row=10, column=0, columnspan=3, sticky='nsew', pady=(10, 0))
+        
+        ttk.Label(earn_frame, text="Origin:").grid(row=0, column=0, sticky='w')
+        self.earn_origin_var = tk.StringVar()
+        ttk.Entry(earn_frame, textvariable=self.earn_origin_var, width=6).grid(row=0, column=1, padx=(2, 10))
+        
+        ttk.Label(earn_frame, text="Destination:").grid(row=0, column=2, sticky='w')
+        self.earn_dest_var = tk.StringVar()
+        ttk.Entry(earn_frame, textvariable=self.earn_dest_var, width=6).grid(row=0, column=3, padx=(2, 10))
+        
+        ttk.Label(earn_frame, text="Booking code:").grid(row=0, column=4, sticky='w')
+        self.earn_code_var = tk.StringVar()
+        self.earn_code_combo = ttk.Combobox(earn_frame, textvariable=self.earn_code_var, width=4)
+        self.earn_code_combo.grid(row=0, column=5, padx=(2, 10))
+        
+        ttk.Button(earn_frame, text="Calculate", command=self._on_calculate_earning).grid(row=0, column=6)
+        
+        earn_columns = ('Program', 'Cabin', 'Rate', 'Miles', 'Value')
+        self.earn_tree = ttk.Treeview(earn_frame, columns=earn_columns, height=6, show='headings')
+        for column, width, anchor in (('Program', 250, 'w'), ('Cabin', 130, 'center'), ('Rate', 70, 'center'),
+                                      ('Miles', 90, 'e'), ('Value', 90, 'e')):
+            self.earn_tree.column(column, width=width, anchor=anchor)
+            self.earn_tree.heading(column, text=column)
+        self.earn_tree.grid(row=1, column=0, columnspan=7, sticky='nsew', pady=(10, 0))
+        
+        earn_frame.columnconfigure(6, weight=1)
+        
         # Configure grid weights
         container.columnconfigure(0, weight=1)
         container.rowconfigure(9, weight=1)
@@ -112,15 +147,15 @@ class Tab4Frame(ttk.Frame):
     def _on_country_search(self, event):
         """Filter country dropdown as user types"""
         
-        typed = self.country_var.get().lower()
+        typed = self.country_var.get().strip()
         if not typed:
+            self.country_search_state = None
             self.country_combo['values'] = self.carriers_country_tab1
             return
         
-        # Filter countries that match typed text (code or name)
-        filtered = [country for country in self.carriers_country_tab1
-                   if typed in country.lower()]
-        self.country_combo['values'] = filtered
+        # Filter countries that match typed text (code or name), narrowing from the last keystroke
+        self.country_search_state = self.country_index_tab1.match(typed, self.country_search_state)
+        self.country_combo['values'] = self.country_index_tab1.values(self.country_search_state)
     
     def _on_country_selected(self, event):
         """Handle country selection - filter alliances"""
@@ -129,18 +164,8 @@ class Tab4Frame(ttk.Frame):
         if not selected_country:
             return
         
-        # Filter carriers for this country
-        self.carrierlist_tab1_filtered = [
-            carrier for carrier in self.carrierlist_tab1
-            if carrier['country'] == selected_country
-        ]
-        
-        # Get unique alliances in this country
-        self.alliance_filtered = []
-        for carrier in self.carrierlist_tab1_filtered:
-            alliance = carrier['alliance']
-            if alliance not in self.alliance_filtered:
-                self.alliance_filtered.append(alliance)
+        # Alliances present in this country, in first-seen order
+        self.alliance_filtered = list(self.carrier_hierarchy_tab1.get(selected_country, {}))
         
         # Update alliance dropdown
         self.alliance_combo['values'] = self.alliance_filtered
@@ -161,14 +186,8 @@ class Tab4Frame(ttk.Frame):
         
         selected_country = self.country_var.get()
         
-        # Filter carriers by country and alliance
-        carriers_filtered = [
-            carrier for carrier in self.carrierlist_tab1
-            if carrier['country'] == selected_country and carrier['alliance'] == selected_alliance
-        ]
-        
-        # Extract carrier names for display
-        carriers_name_display = [carrier['name'] for carrier in carriers_filtered]
+        # Look up carriers by country and alliance
+        carriers_name_display = self.carrier_hierarchy_tab1.get(selected_country, {}).get(selected_alliance, [])
         
         # Update carrier dropdown
         self.carrier_combo['values'] = carriers_name_display
@@ -209,6 +228,9 @@ class Tab4Frame(ttk.Frame):
         
         # Display results
         self._display_results(display_ffps_available, selected_carrier)
+        
+        # Booking codes this carrier earns on in any program
+        self.earn_code_combo['values'] = self.accrual_rules.booking_codes(carrier_code)
     
     def _display_results(self, ffps, carrier_name):
         """Display FFP results in Treeview table"""
@@ -233,6 +255,44 @@ class Tab4Frame(ttk.Frame):
                 ""
             ))
     
+    def _on_calculate_earning(self):
+        """Miles and value the selected carrier's fare earns in every program, best value first"""
+        
+        selected_carrier = self.carrier_var.get()
+        origin = self.earn_origin_var.get().strip().upper()
+        dest = self.earn_dest_var.get().strip().upper()
+        booking_code = self.earn_code_var.get().strip().upper()
+        
+        if not selected_carrier or not origin or not dest or not booking_code:
+            messagebox.showerror("Input Error", "Select a carrier and enter origin, destination and booking code")
+            return
+        
+        carrier_code = selected_carrier.split('-')[0].strip()
+        
+        try:
+            distance = self.engine.distance(origin, dest)
+        except (ValueError, TypeError) as e:
+            messagebox.showerror("Input Error", str(e))
+            return
+        
+        results = self.accrual_rules.earn(carrier_code, booking_code, distance)
+        
+        self.earn_tree.delete(*self.earn_tree.get_children())
+        
+        if not results:
+            self.earn_tree.insert('', 'end', values=(
+                f"No earning rules for {carrier_code} {booking_code}", "", "", "", ""))
+            return
+        
+        for result in results:
+            self.earn_tree.insert('', 'end', values=(
+                result.ffp_disp_name,
+                result.cabin,
+                f"{result.rate:g}x",
+                f"{result.miles:,}",
+                f"${result.value:,.2f}"
+            ))
+    
     def _clear_results(self):
         """Clear results tree"""
         
@@ -0,0 +1,149 @@
+"""
+zones.py: Compiled zone systems
+
+zone_systems.json is expanded once at startup into frozenset-based zone
+definitions. Identical zone bodies are shared across zone systems, so an
+airport's membership in them is worked out only once, and the compiled
+result is reused across data reloads while the file is unchanged.
+"""
+
+# Legal zone types, in the order zones are tested
+LEGAL_ZONE_TYPES = (
+    "continents", "countries", "regions", "airports",
+    "countries_exclude", "regions_exclude", "airports_exclude"
+)
+
+# Compiled zone systems from the last call, keyed by the digest of
+# zone_systems.json plus the airport store (the memos depend on both)
+_compiled_cache = {}
+
+
+class Zone:
+    """One zone body: include/exclude sets with a per-airport membership memo"""
+
+    __slots__ = ('continents', 'countries', 'regions', 'airports',
+                 'countries_exclude', 'regions_exclude', 'airports_exclude',
+                 '_memo')
+
+    def __init__(self, continents, countries, regions, airports,
+                 countries_exclude, regions_exclude, airports_exclude):
+        self.continents = continents
+        self.countries = countries
+        self.regions = regions
+        self.airports = airports
+        self.countries_exclude = countries_exclude
+        self.regions_exclude = regions_exclude
+        self.airports_exclude = airports_exclude
+        self._memo = {}
+
+    def contains(self, airport_iata, continent, country, region):
+        """Match airport to this zone based on continent/country/region/airport"""
+        hit = self._memo.get(airport_iata)
+        if hit is None:
+            is_in_include = (continent in self.continents or country in self.countries
+                             or region in self.regions or airport_iata in self.airports)
+            is_in_exclude = (country in self.countries_exclude or region in self.regions_exclude
+                             or airport_iata in self.airports_exclude)
+            hit = is_in_include and not is_in_exclude
+            self._memo[airport_iata] = hit
+        return hit
+
+
+class ZoneSystem:
+    """Ordered zones of one zone system, with an airport -> zone name memo"""
+
+    __slots__ = ('name', 'zones', '_airport_zone')
+
+    def __init__(self, name, zones):
+        self.name = name
+        self.zones = zones  # tuple of (zone_name, Zone), first match wins
+        self._airport_zone = {}
+
+    def zone_of(self, airport_iata, airport_detail):
+        """
+        Return the first zone name containing the airport, or None.
+
+        `airport_detail` is called as airport_detail(iata) -> (continent,
+        country, region) and only on the first lookup of each airport.
+        """
+        if airport_iata in self._airport_zone:
+            return self._airport_zone[airport_iata]
+
+        continent, country, region = airport_detail(airport_iata)
+
+        zone_name = None
+        for name, zone in self.zones:
+            if zone.contains(airport_iata, continent, country, region):
+                zone_name = name
+                break
+
+        self._airport_zone[airport_iata] = zone_name
+        return zone_name
+
+
+def _expand_references(datalist, glb_shared_dict, lcl_shared_dict):
+    """Expand $glb_shared./$lcl_shared. references into a frozenset of codes"""
+    expanded = set()
+
+    for element_str in datalist:
+        if element_str.startswith('$lcl_shared.'):
+            referred_group = element_str.split('.')[1]
+            if referred_group not in lcl_shared_dict:
+                raise ValueError(f'Unknown local shared group "{referred_group}"')
+            expanded.update(lcl_shared_dict[referred_group])
+
+        elif element_str.startswith('$glb_shared.'):
+            referred_group = element_str.split('.')[1]
+            if referred_group not in glb_shared_dict:
+                raise ValueError(f'Unknown global shared group "{referred_group}"')
+            expanded.update(glb_shared_dict[referred_group])
+
+        else:
+            expanded.add(element_str)
+
+    return frozenset(expanded)
+
+
+def compile_zone_systems(zonesystems, digest=None):
+    """
+    Compile zone_systems.json into {zone_system_name: ZoneSystem}.
+
+    The raw JSON is left untouched. When `digest` matches the previous call
+    the previously compiled systems (and their warm memos) are returned.
+    """
+    if digest is not None and digest in _compiled_cache:
+        return _compiled_cache[digest]
+
+    glb_shared_dict = zonesystems['shared_groups']
+    interned = {}
+    compiled = {}
+
+    for system_name, system_value in zonesystems['zone_definitions'].items():
+        lcl_shared_dict = system_value.get('local_shared_groups') or {}
+        zones = []
+
+        for zone_name, zone_value in (system_value.get('zones') or {}).items():
+            key = tuple(
+                _expand_references(zone_value.get(zone_type) or [], glb_shared_dict, lcl_shared_dict)
+                for zone_type in LEGAL_ZONE_TYPES
+            )
+
+            # Hash-cons identical zone bodies so they share one membership memo
+            zone = interned.get(key)
+            if zone is None:
+                zone = interned[key] = Zone(*key)
+
+            zones.append((zone_name, zone))
+
+        compiled[system_name] = ZoneSystem(system_name, tuple(zones))
+
+    if digest is not None:
+        _compiled_cache.clear()
+        _compiled_cache[digest] = compiled
+
+    return compiled
+
+
+def count_unique_zones(compiled):
+    """Number of distinct zone bodies after hash-consing"""
+    return len({id(zone) for system in compiled.values() for _, zone in system.zones})